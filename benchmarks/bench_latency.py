@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+End-to-end dictation latency benchmark
+Feeds WAV fixtures through VoiceDictation with a simulated microphone
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_DIR / 'src'))
+
+STAGES = ['device_open', 'calibration', 'endpoint', 'wav_write', 'model_load', 'decode',
+          'transcribe', 'injection', 'speech_end_to_text']
+
+
+class FakeStream:
+    """PyAudio input stream that plays a fixture in real time."""
+
+    def __init__(self, samples: np.ndarray, rate: int, paced: bool = True):
+        self.samples = samples
+        self.rate = rate
+        self.paced = paced
+        self.position = 0
+        self.opened_at = time.perf_counter()
+        # Low-level noise after the fixture so the VAD sees silence
+        self.tail = (np.random.default_rng(0).standard_normal(rate) * 30).astype(np.int16)
+
+    def read(self, frames: int, exception_on_overflow: bool = True) -> bytes:
+        if self.paced:
+            due = self.opened_at + (self.position + frames) / self.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        chunk = self.samples[self.position:self.position + frames]
+        if len(chunk) < frames:
+            start = (self.position + len(chunk)) % len(self.tail)
+            filler = np.resize(np.roll(self.tail, -start), frames - len(chunk))
+            chunk = np.concatenate((chunk, filler))
+        self.position += frames
+        return chunk.astype(np.int16).tobytes()
+
+    def stop_stream(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FakeCallbackStream:
+    """Callback-mode stream: a thread plays the fixture into the stream callback."""
+
+    def __init__(self, stream: FakeStream, callback, frames: int):
+        self.stream = stream
+        self.callback = callback
+        self.frames = frames
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while self.running:
+            self.callback(self.stream.read(self.frames), self.frames, {}, 0)
+            if not self.stream.paced:
+                time.sleep(0)
+
+    def stop_stream(self) -> None:
+        self.running = False
+        self.thread.join()
+
+    def close(self) -> None:
+        pass
+
+
+class FakePyAudio:
+    """Stand-in for pyaudio.PyAudio with a single fixture-backed input device."""
+
+    fixture = None  # (samples, rate) of the fixture currently played
+    paced = True
+    last_stream = None
+
+    def get_device_count(self) -> int:
+        return 1
+
+    def get_device_info_by_index(self, index: int) -> dict:
+        return {'name': 'benchmark fixture', 'maxInputChannels': 1}
+
+    def is_format_supported(self, rate, **kwargs) -> bool:
+        return True
+
+    def open(self, **kwargs) -> FakeStream:
+        samples, rate = FakePyAudio.fixture
+        FakePyAudio.last_stream = FakeStream(samples, rate, FakePyAudio.paced)
+        if kwargs.get('stream_callback'):
+            return FakeCallbackStream(FakePyAudio.last_stream, kwargs['stream_callback'],
+                                      kwargs.get('frames_per_buffer', 1024))
+        return FakePyAudio.last_stream
+
+    def terminate(self) -> None:
+        pass
+
+
+class RecordingInjector:
+    """Injection backend that only records the text."""
+
+    name = 'benchmark'
+
+    def __init__(self):
+        self.texts = []
+        self.finished_at = None
+
+    def inject(self, text: str) -> bool:
+        self.texts.append(text)
+        self.finished_at = time.perf_counter()
+        return True
+
+
+def install_fake_audio() -> None:
+    """Register the simulated microphone (and a no-op pynput when no display is available)."""
+    fake_pyaudio = types.ModuleType('pyaudio')
+    fake_pyaudio.paInt16 = 8
+    fake_pyaudio.paContinue = 0
+    fake_pyaudio.paInputOverflow = 2
+    fake_pyaudio.PyAudio = FakePyAudio
+    sys.modules['pyaudio'] = fake_pyaudio
+
+    try:
+        import pynput.keyboard  # noqa: F401
+    except Exception:
+        # Headless machines: pynput cannot load without a display, text goes to RecordingInjector anyway
+        fake_pynput = types.ModuleType('pynput')
+        fake_keyboard = types.ModuleType('pynput.keyboard')
+        fake_keyboard.Controller = lambda: None
+        fake_pynput.keyboard = fake_keyboard
+        sys.modules['pynput'] = fake_pynput
+        sys.modules['pynput.keyboard'] = fake_keyboard
+
+
+def load_fixture(path: Path, rate: int) -> np.ndarray:
+    """Read a fixture as mono int16 at the given rate."""
+    data, file_rate = sf.read(str(path), dtype='float32', always_2d=True)
+    mono = data.mean(axis=1)
+    if file_rate != rate:
+        positions = np.arange(int(len(mono) * rate / file_rate)) * file_rate / rate
+        mono = np.interp(positions, np.arange(len(mono)), mono)
+    return (np.clip(mono, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def synthetic_fixture(rate: int) -> np.ndarray:
+    """Silence, 2.5 s of modulated tone bursts, silence (pipeline timing only, no words)."""
+    rng = np.random.default_rng(1)
+    t = np.arange(int(rate * 2.5)) / rate
+    voice = 6000 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    silence = rng.standard_normal(rate) * 30
+    return np.concatenate((silence, voice, silence * 0.5)).astype(np.int16)
+
+
+def wrap_timer(obj, name: str, stage: str, timings: dict) -> None:
+    """Replace obj.name with a wrapper that accumulates its wall time in timings[stage]."""
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000
+
+    setattr(obj, name, wrapper)
+
+
+def run_once(dictate, config: dict, samples: np.ndarray, verbose: bool) -> dict:
+    """Run one dictation session on a fixture and collect per-stage timings in ms."""
+    from audio_devices import DeviceCache
+    from vad import find_speech_bounds
+
+    rate = config['sample_rate']
+    FakePyAudio.fixture = (samples, rate)
+    timings = {}
+    marks = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp) / 'config.json'
+        config_path.write_text(json.dumps(config))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if verbose else output):
+            dictation = dictate.VoiceDictation(config_path=str(config_path), use_gsettings=False)
+            dictation.device_cache = DeviceCache(Path(tmp) / 'device.json')
+            injector = RecordingInjector()
+            dictation.injectors = [injector]
+
+            wrap_timer(dictation, '_open_input_stream', 'device_open', timings)
+            wrap_timer(dictation, '_transcribe_pcm', 'transcribe', timings)
+            timed_transcribe = dictation._transcribe_pcm
+
+            def transcribe_pcm(pcm, **kwargs):
+                marks['sent_bytes'] = len(pcm)
+                return timed_transcribe(pcm, **kwargs)
+
+            dictation._transcribe_pcm = transcribe_pcm
+            wrap_timer(dictation, '_type_text', 'injection', timings)
+
+            original_calibration = dictation.vad.finish_calibration
+
+            def finish_calibration():
+                marks['calibrated'] = time.perf_counter()
+                original_calibration()
+
+            dictation.vad.finish_calibration = finish_calibration
+
+            original_record = dictation._record_audio
+
+            def record_audio():
+                original_record()
+                marks['recorded'] = time.perf_counter()
+
+            dictation._record_audio = record_audio
+
+            original_handoff = dictate.WavHandoff
+
+            class TimedHandoff(original_handoff):
+                def __enter__(self):
+                    start = time.perf_counter()
+                    try:
+                        return super().__enter__()
+                    finally:
+                        timings['wav_write'] = timings.get('wav_write', 0.0) + (time.perf_counter() - start) * 1000
+
+            dictate.WavHandoff = TimedHandoff
+            try:
+                dictation.run()
+            finally:
+                dictate.WavHandoff = original_handoff
+                dictation.close()
+
+    stream = FakePyAudio.last_stream
+    bounds = find_speech_bounds(samples, dictation.vad.threshold, int(0.02 * rate))
+    speech_end = stream.opened_at + (bounds[1] if bounds else len(samples)) / rate
+    if 'calibrated' in marks:
+        timings['calibration'] = (marks['calibrated'] - stream.opened_at) * 1000
+    if 'recorded' in marks:
+        timings['endpoint'] = (marks['recorded'] - speech_end) * 1000
+    if injector.finished_at is not None:
+        timings['speech_end_to_text'] = (injector.finished_at - speech_end) * 1000
+
+    whisper = dictation.last_whisper_timings
+    if 'load' in whisper:
+        timings['model_load'] = whisper['load']
+        if 'total' in whisper:
+            timings['decode'] = whisper['total'] - whisper['load']
+
+    sent_seconds = marks.get('sent_bytes', 0) / 2 / rate
+    rtf = timings['decode'] / 1000 / sent_seconds if 'decode' in timings and sent_seconds > 0 else None
+
+    return {
+        'stages_ms': {stage: round(timings[stage], 2) for stage in STAGES if stage in timings},
+        'rtf': round(rtf, 4) if rtf is not None else None,
+        'text': ' '.join(injector.texts),
+        'dropped_frames': dictation.dropped_frames,
+    }
+
+
+def summarize(runs: list) -> dict:
+    """Median of every stage and of the RTF per model."""
+    summary = {}
+    for model in sorted({run['model'] for run in runs}):
+        model_runs = [run for run in runs if run['model'] == model]
+        stats = {}
+        for stage in STAGES:
+            values = [run['stages_ms'][stage] for run in model_runs if stage in run['stages_ms']]
+            if values:
+                stats[stage] = round(statistics.median(values), 2)
+        rtfs = [run['rtf'] for run in model_runs if run['rtf'] is not None]
+        if rtfs:
+            stats['rtf'] = round(statistics.median(rtfs), 4)
+        summary[model] = stats
+    return summary
+
+
+def compare(summary: dict, baseline_path: Path) -> None:
+    """Print the change of every median against a previous result file."""
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\n📊 Compared to {baseline.get('commit', '?')} ({baseline_path})")
+    for model, stats in summary.items():
+        old = baseline.get('summary', {}).get(model)
+        if not old:
+            print(f"   {model}: no baseline")
+            continue
+        print(f"   {model}:")
+        for key, value in stats.items():
+            if key in old and old[key]:
+                change = (value - old[key]) / old[key] * 100
+                print(f"      {key:20s} {old[key]:10.2f} → {value:10.2f}  ({change:+.1f}%)")
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Measure end-to-end dictation latency on WAV fixtures")
+    parser.add_argument('--fixtures', type=Path, default=BENCH_DIR / 'fixtures',
+                        help="directory with fixture audio files (default: benchmarks/fixtures)")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="use a generated tone fixture instead of recordings")
+    parser.add_argument('--models', default='base', help="comma separated whisper models (default: base)")
+    parser.add_argument('--whisper', help="whisper-cli to benchmark (default: stub)")
+    parser.add_argument('--model-path', help="model directory for a real whisper-cli")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per fixture and model")
+    parser.add_argument('--no-pace', action='store_true',
+                        help="feed audio as fast as possible (endpoint timings become meaningless)")
+    parser.add_argument('--cache', type=Path, metavar='FILE',
+                        help="transcript cache file; a second run replays transcripts without decoding")
+    parser.add_argument('--stress', type=int, default=0, metavar='N',
+                        help="run N CPU-burning processes during the sessions (check dropped frames)")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=JSON',
+                        help="override a config value, e.g. --set streaming=true")
+    parser.add_argument('--output', type=Path, help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', type=Path, help="previous result file to compare against")
+    parser.add_argument('--verbose', action='store_true', help="show the dictation log")
+    args = parser.parse_args()
+
+    install_fake_audio()
+    import dictate
+
+    rate = 16000
+    if args.synthetic:
+        fixtures = [('synthetic', synthetic_fixture(rate))]
+    else:
+        paths = sorted(p for p in args.fixtures.glob('*') if p.suffix.lower() in ('.wav', '.flac', '.ogg'))
+        if not paths:
+            print(f"❌ No fixtures in {args.fixtures} (see benchmarks/fixtures/README.md or use --synthetic)")
+            sys.exit(1)
+        fixtures = [(p.name, load_fixture(p, rate)) for p in paths]
+
+    FakePyAudio.paced = not args.no_pace
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+
+    with tempfile.TemporaryDirectory() as stub_models:
+        if args.whisper:
+            whisper_path = os.path.abspath(args.whisper)
+            model_path = args.model_path or os.path.expanduser('~/.local/share/whisper/whisper.cpp/models')
+        else:
+            whisper_path = str(BENCH_DIR / 'stub_whisper.py')
+            model_path = stub_models
+            for model in models:
+                Path(stub_models, f'ggml-{model}.bin').touch()
+
+        runs = []
+        burners = [subprocess.Popen([sys.executable, '-c', 'while True: pass']) for _ in range(args.stress)]
+        try:
+            for model in models:
+                config = {
+                    'whisper_cpp_path': whisper_path,
+                    'model_path': model_path,
+                    'model': model,
+                    'sample_rate': rate,
+                    'channels': 1,
+                }
+                if args.cache:
+                    config['transcript_cache_path'] = str(args.cache.resolve())
+                else:
+                    # Measure decoding, not the user's transcript cache
+                    config['transcript_cache'] = False
+                if args.no_pace:
+                    # Unpaced playback would overrun the callback ring buffer
+                    config['capture_mode'] = 'blocking'
+                for override in args.set:
+                    key, _, value = override.partition('=')
+                    config[key] = json.loads(value)
+
+                for name, samples in fixtures:
+                    for _ in range(args.repeat):
+                        result = run_once(dictate, config, samples, args.verbose)
+                        result.update({'fixture': name, 'model': model})
+                        runs.append(result)
+                        stages = ', '.join(f"{k}={v:.0f}" for k, v in result['stages_ms'].items())
+                        print(f"⏱️  {model:8s} {name}: {stages} | rtf={result['rtf']} "
+                              f"| dropped={result['dropped_frames']}")
+        finally:
+            for burner in burners:
+                burner.kill()
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'whisper': whisper_path,
+        'overrides': args.set,
+        'stress': args.stress,
+        'runs': runs,
+        'summary': summarize(runs),
+    }
+
+    output = args.output or BENCH_DIR / 'results' / f'{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Results written to {output}")
+    for model, stats in results['summary'].items():
+        print(f"   {model}: " + ', '.join(f"{k}={v}" for k, v in stats.items()))
+
+    if args.compare:
+        compare(results['summary'], args.compare)
+
+
+if __name__ == "__main__":
+    main()
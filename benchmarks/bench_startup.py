@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Startup time check
+Measures the hotkey-to-daemon handoff and in-process startup against time budgets
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = REPO_DIR / 'src'
+
+# Modules the thin client must never load (each costs tens of milliseconds)
+CLIENT_FORBIDDEN = ['numpy', 'pyaudio', 'pynput', 'gi', 'urllib.request', 'http.server']
+
+# Loaded on first use only, also for in-process sessions
+SESSION_FORBIDDEN = ['pynput', 'gi', 'soundfile', 'urllib.request', 'http.server']
+
+# Imports dictate and builds VoiceDictation; PyAudio is replaced where it is not installed
+SESSION_SCRIPT = '''
+import json, sys, time, types
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = types.ModuleType('pyaudio')
+    pyaudio.paInt16, pyaudio.paContinue, pyaudio.paInputOverflow = 8, 0, 2
+    sys.modules['pyaudio'] = pyaudio
+import dictate
+imported = time.perf_counter()
+dictation = dictate.VoiceDictation(config_path={config!r}, use_gsettings=False)
+ready = time.perf_counter()
+dictation.close()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'init_ms': (ready - imported) * 1000}}))
+'''
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """
+    Parse ``python -X importtime`` output.
+
+    Returns:
+        (total import time in ms, set of imported modules, top-level imports as (ms, name))
+    """
+    modules = set()
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip())
+        if name.startswith(' ') and not name.startswith('  '):
+            top_level.append((int(cumulative) / 1000, name.strip()))
+    return sum(ms for ms, _ in top_level), modules, top_level
+
+
+class FakeDaemon:
+    """Unix socket listener that answers like a daemon starting a session."""
+
+    def __init__(self, runtime_dir: str):
+        self.path = os.path.join(runtime_dir, 'voice-dictation.sock')
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen(8)
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            with conn:
+                conn.makefile('r').readline()
+                conn.sendall(b"ok: session started\n")
+
+    def close(self) -> None:
+        self.server.close()
+
+
+def run_timed(cmd: list, env: dict) -> tuple:
+    """Run a command, return (wall ms, completed process)."""
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=60)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def measure_client(repeat: int) -> dict:
+    """Time ``voice-dictation`` handing the session to a running daemon."""
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        daemon = FakeDaemon(runtime_dir)
+        env = dict(os.environ, XDG_RUNTIME_DIR=runtime_dir)
+        runs = []
+        try:
+            for _ in range(repeat):
+                wall, result = run_timed([sys.executable, '-X', 'importtime', str(SRC_DIR / 'launcher.py')], env)
+                if 'Daemon: ok' not in result.stdout:
+                    raise RuntimeError(f"client did not reach the daemon:\n{result.stdout}{result.stderr}")
+                runs.append((wall, result.stderr))
+        finally:
+            daemon.close()
+    wall, stderr = min(runs, key=lambda run: run[0])
+    import_ms, modules, top_level = parse_importtime(stderr)
+    return {'wall_ms': wall, 'import_ms': import_ms, 'modules': modules, 'top': top_level}
+
+
+def measure_session(repeat: int) -> dict:
+    """Time importing dictate and building VoiceDictation for an in-process session."""
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, 'ggml-base.bin').touch()
+        config = Path(tmp, 'config.json')
+        config.write_text(json.dumps({
+            'whisper_cpp_path': str(BENCH_DIR / 'stub_whisper.py'),
+            'model_path': tmp,
+            'model': 'base',
+            'trace_log': '',
+            'transcript_cache_path': str(Path(tmp, 'transcripts.json')),
+        }))
+        script = SESSION_SCRIPT.format(src=str(SRC_DIR), config=str(config))
+        env = dict(os.environ, HOME=tmp)
+        runs = []
+        for _ in range(repeat):
+            wall, result = run_timed([sys.executable, '-X', 'importtime', '-c', script], env)
+            if result.returncode != 0:
+                raise RuntimeError(f"session startup failed:\n{result.stdout}{result.stderr}")
+            runs.append((wall, json.loads(result.stdout.strip().splitlines()[-1]), result.stderr))
+    wall, timings, stderr = min(runs, key=lambda run: run[0])
+    import_ms, modules, top_level = parse_importtime(stderr)
+    return dict(timings, wall_ms=wall, importtime_ms=import_ms, modules=modules, top=top_level)
+
+
+def report_top(top_level: list, count: int) -> None:
+    """Print the slowest top-level imports."""
+    for ms, name in sorted(top_level, reverse=True)[:count]:
+        print(f"      {ms:7.1f} ms  {name}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check voice-dictation startup time against budgets")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement, the fastest counts")
+    parser.add_argument('--client-budget', type=float, default=100.0, metavar='MS',
+                        help="hotkey to daemon handoff, whole process (default: 100)")
+    parser.add_argument('--session-budget', type=float, default=400.0, metavar='MS',
+                        help="import and initialization for an in-process session (default: 400)")
+    parser.add_argument('--top', type=int, default=5, help="slowest imports to show")
+    args = parser.parse_args()
+
+    failures = []
+
+    client = measure_client(args.repeat)
+    print(f"🚀 Client handoff: {client['wall_ms']:.0f} ms (imports {client['import_ms']:.0f} ms, "
+          f"budget {args.client_budget:.0f} ms)")
+    report_top(client['top'], args.top)
+    if client['wall_ms'] > args.client_budget:
+        failures.append(f"client handoff {client['wall_ms']:.0f} ms > {args.client_budget:.0f} ms")
+    loaded = [name for name in CLIENT_FORBIDDEN if name in client['modules']]
+    if loaded:
+        failures.append(f"client imports {', '.join(loaded)}")
+
+    session = measure_session(args.repeat)
+    startup = session['import_ms'] + session['init_ms']
+    print(f"🎤 In-process session: {startup:.0f} ms until ready (import {session['import_ms']:.0f} ms, "
+          f"init {session['init_ms']:.0f} ms, budget {args.session_budget:.0f} ms)")
+    report_top(session['top'], args.top)
+    if startup > args.session_budget:
+        failures.append(f"session startup {startup:.0f} ms > {args.session_budget:.0f} ms")
+    loaded = [name for name in SESSION_FORBIDDEN if name in session['modules']]
+    if loaded:
+        failures.append(f"dictate imports {', '.join(loaded)} at startup")
+
+    if failures:
+        print("\n❌ Startup regression:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("\n✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
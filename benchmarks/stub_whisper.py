@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Stub whisper-cli for latency benchmarks
+Simulates model load and decode time without a real model
+"""
+
+import os
+import sys
+import time
+import wave
+
+
+def main():
+    """Parse the whisper-cli arguments we use and fake a transcription."""
+    args = sys.argv[1:]
+    audio_file = args[args.index('-f') + 1]
+    load_ms = float(os.environ.get('STUB_WHISPER_LOAD_MS', '300'))
+    rtf = float(os.environ.get('STUB_WHISPER_RTF', '0.2'))
+
+    with wave.open(audio_file, 'rb') as wf:
+        duration = wf.getnframes() / wf.getframerate()
+
+    time.sleep(load_ms / 1000)
+    decode_ms = duration * rtf * 1000
+    time.sleep(decode_ms / 1000)
+
+    print(f"stub transcript of {duration:.2f} seconds")
+    print(f"whisper_print_timings:     load time = {load_ms:8.2f} ms", file=sys.stderr)
+    print(f"whisper_print_timings:    total time = {load_ms + decode_ms:8.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
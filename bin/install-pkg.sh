@@ -55,7 +55,7 @@ if [[ $REPLY =~ ^[JjYy]$ ]]; then
     echo "      nano ~/.config/voice-dictation/config.json"
     echo ""
     echo "   4. Autostart aktivieren:"
-    echo "      cp /usr/share/applications/voice-dictation.desktop ~/.config/autostart/"
+    echo "      cp /usr/share/voice-dictation/voice-dictation-daemon.desktop ~/.config/autostart/voice-dictation.desktop"
     echo ""
     echo "⌨️  Standard Hotkey: Ctrl+Shift+Space"
 fi
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+In-memory audio handling for Voice Dictation
+Preallocated PCM buffer and WAV handoff without temporary files
+"""
+
+import os
+import struct
+import tempfile
+import threading
+
+
+def wav_header(data_size: int, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    Build a canonical 44-byte PCM WAV header.
+
+    Args:
+        data_size: Size of the PCM payload in bytes
+        sample_rate: Sample rate in Hz
+        channels: Number of interleaved channels
+        sample_width: Bytes per sample (2 = 16-bit)
+
+    Returns:
+        Header bytes to prepend to the PCM payload
+    """
+    byte_rate = sample_rate * channels * sample_width
+    block_align = channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, byte_rate, block_align, sample_width * 8,
+        b'data', data_size,
+    )
+
+
+class PcmBuffer:
+    """Preallocated, reusable buffer for 16-bit PCM audio of one session."""
+
+    def __init__(self, sample_rate: int, channels: int = 1, seconds: float = 30.0):
+        """
+        Initialize the buffer.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of interleaved channels
+            seconds: Capacity to preallocate (grows if exceeded)
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.data = bytearray(int(seconds * sample_rate) * channels * 2)
+        self.length = 0
+        self.chunks = 0
+
+    def clear(self) -> None:
+        """Reset the buffer for the next session without releasing memory."""
+        self.length = 0
+        self.chunks = 0
+
+    def append(self, chunk: bytes) -> None:
+        """Copy one chunk of PCM data into the buffer."""
+        end = self.length + len(chunk)
+        if end > len(self.data):
+            self.data.extend(bytes(max(end - len(self.data), len(self.data) // 2)))
+        self.data[self.length:end] = chunk
+        self.length = end
+        self.chunks += 1
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the recorded PCM data."""
+        return memoryview(self.data)[:self.length]
+
+    def duration(self) -> float:
+        """Recorded duration in seconds."""
+        return self.length / (2 * self.channels * self.sample_rate)
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class WavHandoff:
+    """
+    Expose PCM audio as a WAV file path without touching the disk.
+
+    Uses an anonymous memfd that child processes can open through
+    ``/dev/fd/N``; falls back to a temporary file where memfd is missing.
+    Use as a context manager and pass ``pass_fds`` to subprocess.
+    """
+
+    def __init__(self, pcm, sample_rate: int, channels: int = 1):
+        """
+        Initialize the handoff.
+
+        Args:
+            pcm: 16-bit PCM data (bytes, bytearray or memoryview)
+            sample_rate: Sample rate in Hz
+            channels: Number of interleaved channels
+        """
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.fd = None
+        self.temp_path = None
+        self.path = None
+        self.pass_fds = ()
+
+    def __enter__(self) -> 'WavHandoff':
+        header = wav_header(len(self.pcm), self.sample_rate, self.channels)
+        if hasattr(os, 'memfd_create'):
+            self.fd = os.memfd_create('voice-dictation-wav')
+            self.path = f"/dev/fd/{self.fd}"
+            self.pass_fds = (self.fd,)
+        else:
+            self.fd, self.temp_path = tempfile.mkstemp(suffix='.wav')
+            self.path = self.temp_path
+        with os.fdopen(os.dup(self.fd), 'wb') as f:
+            f.write(header)
+            f.write(self.pcm)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def save_wav_async(path: str, pcm: bytes, sample_rate: int, channels: int = 1) -> threading.Thread:
+    """
+    Write a WAV file in a background thread (used for the opt-in debug copy).
+
+    Args:
+        path: Output file path
+        pcm: Snapshot of the 16-bit PCM data
+        sample_rate: Sample rate in Hz
+        channels: Number of interleaved channels
+
+    Returns:
+        The started writer thread
+    """
+    def _write() -> None:
+        try:
+            with open(path, 'wb') as f:
+                f.write(wav_header(len(pcm), sample_rate, channels))
+                f.write(pcm)
+            print(f"🧪 Saved last recording to {path}")
+        except OSError as e:
+            print(f"⚠️  Could not save debug wav: {e}")
+
+    thread = threading.Thread(target=_write, daemon=True)
+    thread.start()
+    return thread
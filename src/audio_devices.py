@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Audio input device selection for Voice Dictation
+Ranks input devices once and caches the choice until the device set changes
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+# Rates probed for the selected device (whisper wants 16 kHz, hardware often 44.1/48 kHz)
+PROBE_RATES = [16000, 44100, 48000]
+
+# Files whose content changes whenever a sound card or PCM endpoint appears/disappears
+TOPOLOGY_SOURCES = ['/proc/asound/cards', '/proc/asound/pcm']
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache/voice-dictation/input-device.json'
+
+# Sound server and ALSA plugin devices; they all record the default source again
+VIRTUAL_DEVICE_NAMES = ('pipewire', 'pulse', 'default', 'sysdefault', 'dsnoop', 'dmix', 'jack', 'speex')
+
+
+def topology_fingerprint() -> str:
+    """
+    Fingerprint the current audio device topology without initializing PortAudio.
+
+    Returns:
+        Hex digest that changes when cards or PCM endpoints are hot-plugged
+    """
+    digest = hashlib.sha1()
+    for source in TOPOLOGY_SOURCES:
+        try:
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b'-')
+    return digest.hexdigest()
+
+
+def _probe_rates(pa, index: int, channels: int, sample_format: int) -> list:
+    """Return the probe rates the device accepts for input."""
+    rates = []
+    for rate in PROBE_RATES:
+        try:
+            if pa.is_format_supported(rate, input_device=index, input_channels=channels,
+                                      input_format=sample_format):
+                rates.append(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+def select_input_device(pa, desired: str, channels: int, sample_format: int,
+                        prefer_hardware: bool = False) -> Optional[dict]:
+    """
+    Enumerate input devices once and pick the best one.
+
+    Priority in auto mode: pipewire > pulse > built-in > hardware mic > default,
+    preferring sound servers because they resample automatically. With
+    prefer_hardware (audio is resampled in-process) ALSA hw: microphones
+    come first, skipping the sound server's buffering.
+
+    Args:
+        pa: Initialized PyAudio instance
+        desired: 'auto', a device index or a device name substring
+        channels: Number of input channels required
+        sample_format: PortAudio sample format (e.g. pyaudio.paInt16)
+        prefer_hardware: Rank hardware microphones above sound servers
+
+    Returns:
+        Dict with index, name, native rate and supported rates, or None for the system default
+    """
+    desired = (desired or 'auto').lower()
+    candidates = {}
+    chosen = None
+
+    print("\n📋 Available input devices:")
+    try:
+        device_count = pa.get_device_count()
+    except Exception as e:
+        print(f"   ⚠️  Could not list devices: {e}")
+        device_count = 0
+
+    for i in range(device_count):
+        try:
+            dev = pa.get_device_info_by_index(i)
+        except Exception:
+            continue
+        max_input = int(dev.get('maxInputChannels', 0))
+        if max_input < 1:
+            continue
+        name = dev.get('name', 'Unknown')
+        print(f"   [{i}] {name} (inputs: {max_input})")
+        lname = name.lower()
+
+        if desired != 'auto':
+            # Explicit device selection (by index or name substring)
+            if chosen is None and (desired == str(i) or desired in lname):
+                print(f"🔌 Matched requested device '{desired}': [{i}] {name}")
+                chosen = (i, name, int(dev.get('defaultSampleRate', 0)))
+            continue
+
+        # Auto mode: collect candidates by priority
+        if 'pipewire' in lname:
+            kind = 'pipewire'
+        elif 'pulse' in lname:
+            kind = 'pulse'
+        elif ('alc' in lname or 'hda' in lname or 'analog' in lname) and 'hw:' in lname:
+            kind = 'hardware mic'
+        elif 'built-in' in lname:
+            kind = 'built-in'
+        elif 'default' in lname:
+            kind = 'default'
+        else:
+            continue
+        candidates.setdefault(kind, (i, name, int(dev.get('defaultSampleRate', 0))))
+    print()
+
+    if desired == 'auto':
+        priority = ['pipewire', 'pulse', 'built-in', 'hardware mic', 'default']
+        if prefer_hardware:
+            priority.remove('hardware mic')
+            priority.insert(0, 'hardware mic')
+        for kind in priority:
+            if kind in candidates:
+                chosen = candidates[kind]
+                print(f"🔌 Selected {kind}: [{chosen[0]}] {chosen[1]}")
+                break
+        else:
+            print("🔌 Using system default input device")
+    elif chosen is None:
+        print(f"⚠️  Requested device '{desired}' not found, using system default")
+
+    if chosen is None:
+        return None
+    index, name, native_rate = chosen
+    return {
+        'index': index,
+        'name': name,
+        'native_rate': native_rate,
+        'rates': _probe_rates(pa, index, channels, sample_format),
+    }
+
+
+def list_input_devices(pa) -> List[dict]:
+    """
+    Enumerate all input devices.
+
+    Args:
+        pa: Initialized PyAudio instance
+
+    Returns:
+        Dicts with index, name, channels (maximum input channels) and native_rate
+    """
+    devices = []
+    try:
+        device_count = pa.get_device_count()
+    except Exception as e:
+        print(f"   ⚠️  Could not list devices: {e}")
+        return devices
+    for i in range(device_count):
+        try:
+            dev = pa.get_device_info_by_index(i)
+        except Exception:
+            continue
+        max_input = int(dev.get('maxInputChannels', 0))
+        if max_input < 1:
+            continue
+        devices.append({
+            'index': i,
+            'name': dev.get('name', 'Unknown'),
+            'channels': max_input,
+            'native_rate': int(dev.get('defaultSampleRate', 0)),
+        })
+    return devices
+
+
+def select_multi_devices(pa, spec: str) -> List[dict]:
+    """
+    Pick the input devices for parallel capture.
+
+    Args:
+        pa: Initialized PyAudio instance
+        spec: 'auto' for every physical microphone, or comma separated
+              device indexes / name substrings
+
+    Returns:
+        Selected devices in the order of the specification (auto: device order)
+    """
+    devices = list_input_devices(pa)
+    spec = (spec or 'auto').strip().lower()
+    if spec == 'auto':
+        # Physical devices only, sound servers would record the same source twice
+        return [dev for dev in devices
+                if not any(virtual in dev['name'].lower() for virtual in VIRTUAL_DEVICE_NAMES)]
+    selected = []
+    for wanted in (entry.strip() for entry in spec.split(',')):
+        for dev in devices:
+            if wanted and (wanted == str(dev['index']) or wanted in dev['name'].lower()) and dev not in selected:
+                selected.append(dev)
+                break
+        else:
+            print(f"⚠️  Requested microphone '{wanted}' not found")
+    return selected
+
+
+class DeviceCache:
+    """Small on-disk cache of the selected input device, keyed by topology."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file (default: ~/.cache/voice-dictation/input-device.json)
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+
+    def load(self, fingerprint: str, desired: str) -> Optional[dict]:
+        """
+        Return the cached device if it was selected for the same topology and setting.
+
+        Args:
+            fingerprint: Current topology fingerprint
+            desired: Current input_device setting
+
+        Returns:
+            Cached entry (index, name, rates) or None on a miss
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('fingerprint') != fingerprint or entry.get('input_device') != desired:
+            return None
+        return entry
+
+    def save(self, fingerprint: str, desired: str, device: Optional[dict]) -> None:
+        """Persist the selection for the given topology and setting."""
+        entry = {'fingerprint': fingerprint, 'input_device': desired}
+        if device:
+            entry.update(device)
+        else:
+            entry.update({'index': None, 'name': 'system default', 'rates': []})
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not write device cache: {e}")
+
+    def invalidate(self) -> None:
+        """Drop the cached selection."""
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Batch transcription for Voice Dictation
+Transcribes directories of recordings on a pool of whisper workers and skips files already done
+"""
+
+import json
+import os
+import queue
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_buffer import WavHandoff
+from cpu_tuning import apply_process_tuning, cpu_topology
+from resample import PolyphaseResampler
+from whisper_server import WhisperServer
+
+SAMPLE_RATE = 16000
+OUTPUT_FORMATS = ['txt', 'jsonl', 'srt']
+JSONL_NAME = 'transcripts.jsonl'
+
+# Extensions libsndfile reads besides the lower-case format names it reports
+FORMAT_ALIASES = {'OGG': ['oga', 'opus'], 'AIFF': ['aif'], 'MPEG': ['mp3'], 'CAF': ['caf']}
+
+FRAME_SECONDS = 0.03
+# RMS below which a frame is silence regardless of the noise floor (int16 scale)
+MIN_SPEECH_RMS = 100.0
+READ_BLOCK_SECONDS = 10
+
+# whisper.cpp gains little beyond a few threads per decode; more workers use the cores better
+DEFAULT_WORKER_THREADS = 4
+# Compute buffers of one whisper worker on top of the model weights (MB)
+WORKER_OVERHEAD_MB = 200
+# Share of the available memory the worker pool may take
+MEMORY_SHARE = 0.8
+
+
+def find_audio_files(paths: List[str]) -> List[Tuple[Path, Path]]:
+    """
+    Collect the audio files below the given files and directories.
+
+    Args:
+        paths: Files or directories (searched recursively)
+
+    Returns:
+        Sorted list of (file, root) pairs; root is the argument the file was found under
+    """
+    import soundfile as sf  # Batch mode only, not imported at startup
+
+    extensions = set()
+    for name in sf.available_formats():
+        extensions.add(name.lower())
+        extensions.update(FORMAT_ALIASES.get(name, []))
+
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found += [(file, path) for file in sorted(path.rglob('*'))
+                      if file.is_file() and file.suffix[1:].lower() in extensions]
+        elif path.is_file():
+            found.append((path, path.parent))
+        else:
+            print(f"⚠️  {path} does not exist, skipping")
+    return found
+
+
+def load_audio(path: Path) -> np.ndarray:
+    """
+    Read an audio file as 16 kHz mono int16 samples.
+
+    The file is read in blocks and resampled as a stream, so long recordings
+    never exist in memory at their original rate.
+
+    Args:
+        path: Any file libsndfile reads (WAV, FLAC, OGG/Opus, MP3, ...)
+
+    Returns:
+        int16 samples at 16 kHz
+
+    Raises:
+        RuntimeError: If the file cannot be decoded (soundfile.LibsndfileError)
+    """
+    import soundfile as sf
+
+    info = sf.info(str(path))
+    resampler = PolyphaseResampler(info.samplerate, SAMPLE_RATE)
+    parts = []
+    for block in sf.blocks(str(path), blocksize=info.samplerate * READ_BLOCK_SECONDS,
+                           dtype='int16', always_2d=True):
+        mono = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1).astype(np.int16)
+        parts.append(np.frombuffer(resampler.process(mono.tobytes()), dtype=np.int16))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+
+
+def split_segments(samples: np.ndarray, max_seconds: float = 30.0, min_pause: float = 0.5,
+                   padding: float = 0.2, threshold_factor: float = 3.0) -> List[Tuple[int, int]]:
+    """
+    Cut a recording into speech segments whisper can decode in one window.
+
+    Pauses of at least min_pause split the audio; neighbouring parts are
+    joined again as long as they fit into max_seconds. Speech without a long
+    enough pause is cut at its quietest frame. Silence-only stretches are
+    dropped, which also keeps whisper from hallucinating on them.
+
+    Args:
+        samples: 16 kHz int16 samples
+        max_seconds: Longest segment (whisper's window is 30 s)
+        min_pause: Shortest pause that may separate segments
+        padding: Seconds of context kept around the speech
+        threshold_factor: Speech threshold as a multiple of the noise floor
+
+    Returns:
+        List of (start, end) sample positions
+    """
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    count = len(samples) // frame
+    if count == 0:
+        return []
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame)
+    floor, peak = np.percentile(rms, [10, 90])
+    if peak < MIN_SPEECH_RMS:
+        return []
+    # Capped below the loud frames, so recordings without pauses keep their quieter speech
+    threshold = min(max(floor * threshold_factor, MIN_SPEECH_RMS), peak * 0.25)
+    voiced = rms > threshold
+
+    # Speech runs separated by pauses of at least min_pause
+    pause_frames = max(1, int(min_pause / FRAME_SECONDS))
+    indexes = np.flatnonzero(voiced)
+    gaps = np.flatnonzero(np.diff(indexes) > pause_frames)
+    starts = np.concatenate(([indexes[0]], indexes[gaps + 1]))
+    ends = np.concatenate((indexes[gaps], [indexes[-1]])) + 1
+
+    pad = int(padding / FRAME_SECONDS)
+    max_frames = max(3, int(max_seconds / FRAME_SECONDS) - 2 * pad)
+    runs = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        # Too long without a pause: cut at the quietest frame of the last third
+        while end - start > max_frames:
+            window = rms[start + max_frames * 2 // 3:start + max_frames]
+            cut = start + max_frames * 2 // 3 + int(np.argmin(window))
+            runs.append((start, cut))
+            start = cut
+        runs.append((start, end))
+
+    segments = []
+    for start, end in runs:
+        if segments and end - segments[-1][0] <= max_frames:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+
+    # Padding never reaches into the neighbour, so no word is decoded twice
+    bounds = []
+    for i, (start, end) in enumerate(segments):
+        low = max(0, start - pad, segments[i - 1][1] if i else 0)
+        high = min(count, end + pad, segments[i + 1][0] if i + 1 < len(segments) else count)
+        bounds.append((low * frame, high * frame))
+    return bounds
+
+
+def available_memory_mb() -> Optional[float]:
+    """MemAvailable from /proc/meminfo in MB, None if unknown."""
+    try:
+        with open('/proc/meminfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def plan_workers(model_mb: float, jobs: Optional[int] = None, threads: Optional[int] = None,
+                 topology: Optional[List[dict]] = None) -> dict:
+    """
+    Size the whisper worker pool to the cores and the free memory.
+
+    Every worker holds its own copy of the model, so memory limits the pool
+    as well as the number of physical cores.
+
+    Args:
+        model_mb: Memory of one loaded model
+        jobs: Worker count (None = as many as cores and memory allow)
+        threads: Decode threads per worker (None = derived from the cores)
+        topology: Result of cpu_topology (default: this machine)
+
+    Returns:
+        Dict with workers, threads and cpus (one CPU list per worker, or None = unpinned)
+    """
+    topology = topology or cpu_topology()
+    primaries = {}
+    for entry in sorted(topology, key=lambda entry: (not entry['performance'], entry['cpu'])):
+        primaries.setdefault(entry['core'], entry)
+    cores = [entry['cpu'] for entry in primaries.values()]
+
+    if jobs:
+        workers = jobs
+        threads = threads or max(1, len(cores) // jobs)
+    else:
+        threads = threads or min(DEFAULT_WORKER_THREADS, len(cores))
+        workers = max(1, len(cores) // threads)
+        available = available_memory_mb()
+        if available is not None:
+            workers = max(1, min(workers, int(available * MEMORY_SHARE // (model_mb + WORKER_OVERHEAD_MB))))
+
+    cpus = [None] * workers
+    if workers * threads <= len(cores):
+        cpus = [sorted(cores[i * threads:(i + 1) * threads]) for i in range(workers)]
+    return {'workers': workers, 'threads': threads, 'cpus': cpus}
+
+
+def srt_timestamp(seconds: float) -> str:
+    """Format seconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def source_stamp(path: Path) -> dict:
+    """Size and modification time that identify a version of a source file."""
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class BatchOutput:
+    """
+    Writes finished transcripts as text, SRT or JSONL and knows which files are done.
+
+    Text and SRT transcripts are one file per recording, mirrored below the
+    output directory (or next to the recording without one) and count as
+    done while they are newer than the recording. JSONL appends one record
+    per recording to a single file, done while size and modification time
+    match. Everything is written atomically, so an interrupted run never
+    leaves a transcript that looks complete.
+    """
+
+    def __init__(self, fmt: str, output_dir: Optional[str] = None):
+        """
+        Initialize the output.
+
+        Args:
+            fmt: txt, srt or jsonl
+            output_dir: Directory for the transcripts (default: next to each
+                recording, JSONL into the current directory)
+        """
+        self.format = fmt
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.lock = threading.Lock()
+        self.records: Dict[str, dict] = {}
+        if fmt == 'jsonl':
+            self.jsonl_path = (self.output_dir or Path.cwd()) / JSONL_NAME
+            self.records = self._load_jsonl()
+
+    def _load_jsonl(self) -> Dict[str, dict]:
+        """Read the records of earlier runs, dropping a line cut off by an interruption."""
+        records = {}
+        try:
+            with open(self.jsonl_path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+                    data = data[:data.rfind(b'\n') + 1]
+        except OSError:
+            return records
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+                records[record['file']] = record
+            except (ValueError, KeyError):
+                continue
+        return records
+
+    def path_for(self, source: Path, root: Path) -> Path:
+        """Transcript file of a recording (txt and srt)."""
+        target = source.with_suffix(f'.{self.format}')
+        if self.output_dir is None:
+            return target
+        return self.output_dir / target.relative_to(root)
+
+    def is_done(self, source: Path, root: Path) -> bool:
+        """True if the recording was transcribed in an earlier run and has not changed since."""
+        if self.format == 'jsonl':
+            record = self.records.get(str(source.resolve()))
+            return record is not None and all(record.get(k) == v for k, v in source_stamp(source).items())
+        try:
+            return self.path_for(source, root).stat().st_mtime_ns >= source.stat().st_mtime_ns
+        except OSError:
+            return False
+
+    def write(self, source: Path, root: Path, record: dict) -> Path:
+        """
+        Store the transcript of one recording.
+
+        Args:
+            source: Recording
+            root: Argument the recording was found under
+            record: Result of BatchTranscriber.transcribe_file
+
+        Returns:
+            File the transcript was written to
+        """
+        if self.format == 'jsonl':
+            line = json.dumps(dict(record, file=str(source.resolve()), **source_stamp(source)), ensure_ascii=False)
+            with self.lock:
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            return self.jsonl_path
+
+        if self.format == 'srt':
+            cues = [f"{i}\n{srt_timestamp(s['start'])} --> {srt_timestamp(s['end'])}\n{s['text']}\n"
+                    for i, s in enumerate(record['segments'], 1)]
+            content = '\n'.join(cues)
+        else:
+            content = ''.join(f"{segment['text']}\n" for segment in record['segments'])
+        target = self.path_for(source, root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.part")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, target)
+        return target
+
+
+class BatchTranscriber:
+    """
+    Pool of whisper workers, each pinned to its own cores.
+
+    With whisper-server every worker is a resident server process that loads
+    the model once; otherwise each segment runs through whisper-cli on the
+    worker's cores. Files are decoded and resampled on threads (libsndfile
+    and numpy release the GIL) while the workers transcribe earlier ones.
+    """
+
+    def __init__(self, whisper_cli_path: str, model_file: str, plan: dict, language: str = 'de',
+                 server_path: Optional[str] = None, timeout_factor: float = 3.0, nice: int = 0,
+                 ioprio: Optional[int] = None):
+        """
+        Initialize the pool (workers are started by ``start``).
+
+        Args:
+            whisper_cli_path: whisper-cli executable
+            model_file: ggml model file
+            plan: Result of plan_workers
+            language: Recognition language
+            server_path: whisper-server executable (None = whisper-cli per segment)
+            timeout_factor: Decode timeout as a multiple of the segment length (at least 60 s)
+            nice: Nice value of the workers
+            ioprio: Best-effort I/O priority level 0-7 of the workers (None = unchanged)
+        """
+        self.whisper_cli_path = whisper_cli_path
+        self.model_file = model_file
+        self.plan = plan
+        self.language = language
+        self.server_path = server_path
+        self.timeout_factor = timeout_factor
+        self.nice = nice
+        self.ioprio = ioprio
+        self.idle = queue.Queue()  # Worker slots not decoding right now
+        self.servers = []
+        self.decoders = None
+        self.loaders = None
+
+    def start(self) -> bool:
+        """
+        Start the workers.
+
+        Returns:
+            True if at least one worker is ready
+        """
+        for cpus in self.plan['cpus']:
+            server = None
+            if self.server_path:
+                server = WhisperServer(self.server_path, self.model_file, language=self.language,
+                                       threads=self.plan['threads'], cpus=cpus, nice=self.nice,
+                                       ioprio=self.ioprio)
+                if not server.start():
+                    continue
+                self.servers.append(server)
+            self.idle.put({'server': server, 'cpus': cpus})
+        if self.idle.empty():
+            return False
+        workers = self.idle.qsize()
+        self.decoders = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='whisper-worker')
+        # One file ahead per worker, so decoding never waits for the next file to load
+        self.loaders = ThreadPoolExecutor(max_workers=workers + 1, thread_name_prefix='batch-file')
+        return True
+
+    def stop(self) -> None:
+        """Stop the workers."""
+        for executor in (self.loaders, self.decoders):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        for server in self.servers:
+            server.stop()
+        self.servers = []
+
+    def _decode(self, pcm: bytes) -> Optional[str]:
+        """Transcribe one segment on the next free worker ('' = no words, None = failed)."""
+        worker = self.idle.get()
+        try:
+            timeout = max(60.0, len(pcm) / (2 * SAMPLE_RATE) * self.timeout_factor)
+            if worker['server'] is None:
+                return self._decode_cli(pcm, worker['cpus'], timeout)
+            return worker['server'].transcribe(pcm, SAMPLE_RATE, timeout=timeout)
+        finally:
+            self.idle.put(worker)
+
+    def _decode_cli(self, pcm: bytes, cpus: Optional[List[int]], timeout: float) -> Optional[str]:
+        """Transcribe one segment with whisper-cli pinned to the worker's cores ('' = no words, None = failed)."""
+        try:
+            with WavHandoff(pcm, SAMPLE_RATE) as wav:
+                cmd = [
+                    self.whisper_cli_path,
+                    '-m', self.model_file,
+                    '-f', wav.path,
+                    '--language', self.language,
+                    '--threads', str(self.plan['threads']),
+                    '--no-timestamps'
+                ]
+                with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                      pass_fds=wav.pass_fds) as process:
+                    apply_process_tuning(process.pid, cpus, nice=self.nice, ioprio=self.ioprio)
+                    try:
+                        stdout, stderr = process.communicate(timeout=timeout)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                        process.communicate()
+                        print("❌ whisper.cpp timeout")
+                        return None
+        except OSError as e:
+            print(f"❌ Could not run whisper.cpp: {e}")
+            return None
+        if process.returncode != 0:
+            print(f"❌ whisper.cpp error: {stderr.strip() or stdout.strip()}")
+            return None
+        return ' '.join(line.strip() for line in stdout.splitlines() if line.strip())
+
+    def transcribe_file(self, path: Path, max_segment: float = 30.0,
+                        postprocess: Optional[Callable[[str], Optional[str]]] = None) -> dict:
+        """
+        Load, segment and transcribe one recording.
+
+        Args:
+            path: Audio file
+            max_segment: Longest segment in seconds
+            postprocess: Cleans each segment's text (None = raw whisper output)
+
+        Returns:
+            Dict with duration, segments (start, end, text) and failed (segments without result)
+
+        Raises:
+            RuntimeError: If the file cannot be decoded
+        """
+        samples = load_audio(path)
+        bounds = split_segments(samples, max_seconds=max_segment)
+        futures = [self.decoders.submit(self._decode, samples[start:end].tobytes()) for start, end in bounds]
+        segments = []
+        failed = 0
+        for (start, end), future in zip(bounds, futures):
+            text = future.result()
+            if text is None:
+                failed += 1
+                continue
+            if postprocess is not None:
+                text = postprocess(text)
+            if text:
+                segments.append({'start': round(start / SAMPLE_RATE, 2), 'end': round(end / SAMPLE_RATE, 2),
+                                 'text': text})
+        return {
+            'duration': round(len(samples) / SAMPLE_RATE, 2),
+            'segments': segments,
+            'text': ' '.join(segment['text'] for segment in segments),
+            'failed': failed,
+        }
+
+    def run(self, files: List[Tuple[Path, Path]], output: BatchOutput, max_segment: float = 30.0,
+            postprocess: Optional[Callable[[str], Optional[str]]] = None,
+            extra: Optional[dict] = None) -> Tuple[int, int]:
+        """
+        Transcribe recordings and write each one as soon as it is finished.
+
+        Args:
+            files: (file, root) pairs from find_audio_files
+            output: Where transcripts go
+            max_segment: Longest segment in seconds
+            postprocess: Cleans each segment's text
+            extra: Fields added to every record (model, language)
+
+        Returns:
+            (transcribed, failed) file counts
+        """
+        futures = {self.loaders.submit(self.transcribe_file, path, max_segment, postprocess): (path, root)
+                   for path, root in files}
+        done = failed = 0
+        for future in as_completed(futures):
+            path, root = futures[future]
+            try:
+                record = future.result()
+            except (OSError, RuntimeError) as e:
+                print(f"❌ {path}: {e}")
+                failed += 1
+                continue
+            if record['failed']:
+                # Not written, so the next run tries the file again
+                print(f"❌ {path}: {record['failed']} of {record['failed'] + len(record['segments'])} "
+                      f"segments failed")
+                failed += 1
+                continue
+            del record['failed']
+            target = output.write(path, root, dict(record, **(extra or {})))
+            done += 1
+            print(f"✅ [{done + failed}/{len(files)}] {path} ({record['duration']:.0f}s) → {target}")
+        return done, failed
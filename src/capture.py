@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Callback-mode microphone capture for Voice Dictation
+PortAudio delivers audio into a lock-free ring buffer, the recorder consumes it
+"""
+
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+class SpscRingBuffer:
+    """
+    Preallocated int16 ring buffer for one producer and one consumer thread.
+
+    The producer only advances ``write_pos`` and the consumer only advances
+    ``read_pos``; each position is published after the data it covers has
+    been copied, so neither side takes a lock. When the consumer falls
+    behind, new samples are dropped and counted instead of overwriting
+    audio that has not been read yet.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Number of samples that can be pending
+        """
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+        self.write_pos = 0  # Absolute position of the next sample to write
+        self.read_pos = 0  # Absolute position of the next sample to read
+        self.dropped = 0  # Samples discarded because the buffer was full
+
+    def available(self) -> int:
+        """Number of samples waiting to be read."""
+        return self.write_pos - self.read_pos
+
+    def write(self, data: bytes) -> int:
+        """
+        Append 16-bit PCM data (producer side).
+
+        Args:
+            data: Raw PCM bytes
+
+        Returns:
+            Number of samples dropped because the buffer was full
+        """
+        samples = np.frombuffer(data, dtype=np.int16)
+        free = self.capacity - (self.write_pos - self.read_pos)
+        dropped = 0
+        if len(samples) > free:
+            dropped = len(samples) - free
+            samples = samples[:free]
+            self.dropped += dropped
+        start = self.write_pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:len(samples) - first] = samples[first:]
+        self.write_pos += len(samples)
+        return dropped
+
+    def read(self, count: int) -> Optional[bytes]:
+        """
+        Take exactly count samples (consumer side).
+
+        Args:
+            count: Number of samples
+
+        Returns:
+            Raw PCM bytes, or None if fewer samples are available
+        """
+        if self.write_pos - self.read_pos < count:
+            return None
+        start = self.read_pos % self.capacity
+        if start + count <= self.capacity:
+            data = self.buffer[start:start + count].tobytes()
+        else:
+            data = self.buffer[start:].tobytes() + self.buffer[:count - (self.capacity - start)].tobytes()
+        self.read_pos += count
+        return data
+
+
+class CallbackCapture:
+    """
+    Input stream in PortAudio callback mode with the interface of a blocking stream.
+
+    PortAudio's audio thread only copies each buffer into the ring, so a slow
+    consumer (VAD, logging, decoding) can no longer make the device overflow.
+    Audio lost anyway is counted: ``dropped_frames`` for frames that did not
+    fit into the ring and ``overflows`` for input overflows PortAudio reported.
+    """
+
+    def __init__(self, channels: int, rate: int, seconds: float = 5.0, timeout: float = 2.0,
+                 cpus: Optional[List[int]] = None):
+        """
+        Initialize the capture (the stream is opened by ``open``).
+
+        Args:
+            channels: Number of interleaved channels
+            rate: Capture sample rate
+            seconds: Audio the ring buffer can hold before frames are dropped
+            timeout: Seconds ``read`` waits for audio before failing
+            cpus: CPUs reserved for capture; PortAudio's audio thread pins itself there
+        """
+        self.channels = channels
+        self.rate = rate
+        self.timeout = timeout
+        self.ring = SpscRingBuffer(int(seconds * rate) * channels)
+        self.data_ready = threading.Event()
+        self.overflows = 0
+        self.cpus = cpus
+        self.pinned = not cpus
+        self.stream = None
+        self.overflow_flag = 0  # PortAudio status/return codes, set by open
+        self.continue_flag = 0
+
+    def open(self, pa, **kwargs) -> 'CallbackCapture':
+        """
+        Open and start the PortAudio stream.
+
+        Args:
+            pa: Initialized PyAudio instance
+            **kwargs: Arguments for pa.open (format, rate, device, ...)
+
+        Returns:
+            self
+        """
+        import pyaudio  # Stream opening only; the callback uses the copied codes
+        self.overflow_flag = pyaudio.paInputOverflow
+        self.continue_flag = pyaudio.paContinue
+        self.stream = pa.open(stream_callback=self._callback, **kwargs)
+        return self
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """PortAudio audio thread: store the buffer and wake the consumer."""
+        if not self.pinned:
+            # Once, from the audio thread itself: affinity of pid 0 is the calling thread
+            self.pinned = True
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except OSError:
+                pass
+        if status & self.overflow_flag:
+            self.overflows += 1
+        if in_data:
+            self.ring.write(in_data)
+            self.data_ready.set()
+        return None, self.continue_flag
+
+    @property
+    def dropped_frames(self) -> int:
+        """Frames discarded because the consumer fell behind."""
+        return self.ring.dropped // self.channels
+
+    def read(self, frames: int, exception_on_overflow: bool = False) -> bytes:
+        """
+        Wait for and return the next frames (consumer side).
+
+        Args:
+            frames: Number of frames to read
+            exception_on_overflow: Accepted for compatibility; losses are counted instead
+
+        Returns:
+            Raw 16-bit PCM bytes
+
+        Raises:
+            OSError: If the device delivers no audio within the timeout
+        """
+        count = frames * self.channels
+        deadline = time.monotonic() + self.timeout
+        while True:
+            data = self.ring.read(count)
+            if data is not None:
+                return data
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise OSError(f"no audio from input device for {self.timeout:.1f}s")
+            self.data_ready.clear()
+            # Re-check after clearing, the producer may have written in between
+            if self.ring.available() < count:
+                self.data_ready.wait(remaining)
+
+    def stop_stream(self) -> None:
+        """Stop the PortAudio stream."""
+        if self.stream is not None:
+            self.stream.stop_stream()
+
+    def close(self) -> None:
+        """Close the PortAudio stream."""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Configuration cache for Voice Dictation
+Keeps the resolved GSettings configuration so launches skip loading GObject introspection
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache/voice-dictation/config.json'
+
+# Compiled schemas: their defaults change when the package is upgraded
+SCHEMA_FILES = [
+    '/usr/share/glib-2.0/schemas/gschemas.compiled',
+    '/usr/local/share/glib-2.0/schemas/gschemas.compiled',
+    os.path.expanduser('~/.local/share/glib-2.0/schemas/gschemas.compiled'),
+]
+
+
+def settings_fingerprint(code_path: str) -> Optional[str]:
+    """
+    Fingerprint everything the resolved GSettings configuration depends on.
+
+    gsettings and the settings app write through dconf, which rewrites its
+    database file on every change, so its modification time is enough.
+
+    Args:
+        code_path: Source file that builds the configuration (new keys after an update)
+
+    Returns:
+        Hex digest, or None if settings may change without a file changing
+        (non-dconf backends, custom schema directories)
+    """
+    if os.environ.get('GSETTINGS_BACKEND', 'dconf') != 'dconf' or os.environ.get('GSETTINGS_SCHEMA_DIR'):
+        return None
+    config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    digest = hashlib.sha1()
+    for path in [os.path.join(config_home, 'dconf/user'), code_path] + SCHEMA_FILES:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size};".encode('utf-8'))
+        except OSError:
+            digest.update(f"{path}:-;".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ConfigCache:
+    """Small on-disk cache of the resolved configuration, keyed by settings fingerprint."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file (default: ~/.cache/voice-dictation/config.json)
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+
+    def load(self, fingerprint: str) -> Optional[dict]:
+        """
+        Return the cached configuration if it was resolved from the same settings.
+
+        Args:
+            fingerprint: Current settings fingerprint
+
+        Returns:
+            Configuration dict or None on a miss
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('fingerprint') != fingerprint:
+            return None
+        return entry.get('config')
+
+    def save(self, fingerprint: str, config: dict) -> None:
+        """Persist the configuration for the given fingerprint."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'config': config}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not write configuration cache: {e}")
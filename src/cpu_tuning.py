@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+CPU tuning for Voice Dictation
+Finds the fastest whisper.cpp thread count and core set per machine and applies it to the decoder
+"""
+
+import ctypes
+import hashlib
+import json
+import os
+import platform
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+DEFAULT_TUNING_PATH = Path.home() / '.cache/voice-dictation/cpu-tuning.json'
+
+SYSFS_CPU = Path('/sys/devices/system/cpu')
+
+# ioprio_set(2) syscall numbers (not exposed by the os module)
+IOPRIO_SET_SYSCALL = {'x86_64': 251, 'aarch64': 30, 'i686': 289, 'armv7l': 314, 'riscv64': 30}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_SHIFT = 13
+
+# Passes over a process's threads in apply_process_tuning (threads may appear meanwhile)
+TUNING_ROUNDS = 5
+
+
+def parse_cpu_list(text: str) -> Set[int]:
+    """Parse a kernel CPU list such as ``0-3,8,10-11``."""
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _read(path: Path) -> Optional[str]:
+    """Read a small sysfs file, None if it does not exist."""
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cpu_topology() -> List[dict]:
+    """
+    Describe the CPUs this process may run on.
+
+    Returns:
+        One dict per logical CPU: cpu, core (physical core key), siblings and
+        performance (False for efficiency cores of hybrid processors)
+    """
+    allowed = sorted(os.sched_getaffinity(0))
+    # Intel hybrid processors list their E-cores separately
+    atom = _read(Path('/sys/devices/cpu_atom/cpus'))
+    efficiency = parse_cpu_list(atom) if atom else set()
+    # Arm big.LITTLE reports a relative capacity per CPU instead
+    capacities = {cpu: _read(SYSFS_CPU / f'cpu{cpu}/cpu_capacity') for cpu in allowed}
+    if not efficiency and all(capacities.values()):
+        top = max(int(value) for value in capacities.values())
+        efficiency = {cpu for cpu, value in capacities.items() if int(value) < top}
+
+    topology = []
+    for cpu in allowed:
+        base = SYSFS_CPU / f'cpu{cpu}/topology'
+        siblings = _read(base / 'thread_siblings_list') or _read(base / 'core_cpus_list')
+        core = (_read(base / 'physical_package_id') or '0', _read(base / 'core_id') or str(cpu))
+        topology.append({
+            'cpu': cpu,
+            'core': core,
+            'siblings': parse_cpu_list(siblings) if siblings else {cpu},
+            'performance': cpu not in efficiency,
+        })
+    return topology
+
+
+def machine_key() -> str:
+    """Identify the CPU configuration the tuning was measured on."""
+    digest = hashlib.sha1(platform.machine().encode('utf-8'))
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8') as f:
+            models = {line.split(':', 1)[1].strip() for line in f if line.startswith('model name')}
+        digest.update('|'.join(sorted(models)).encode('utf-8'))
+    except OSError:
+        pass
+    digest.update(repr(sorted(os.sched_getaffinity(0))).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def reserved_capture_cpus(topology: List[dict]) -> Set[int]:
+    """
+    Choose the core kept free of decoder threads for audio capture.
+
+    An efficiency core is enough for capture; without one the last physical
+    core is used. Nothing is reserved on machines with fewer than two cores.
+
+    Returns:
+        Logical CPUs of the reserved core (all SMT siblings)
+    """
+    cores = {}
+    for entry in topology:
+        cores.setdefault(entry['core'], entry)
+    if len(cores) < 2:
+        return set()
+    efficiency = [entry for entry in cores.values() if not entry['performance']]
+    chosen = (efficiency or list(cores.values()))[-1]
+    allowed = {entry['cpu'] for entry in topology}
+    return chosen['siblings'] & allowed
+
+
+def candidate_configs(topology: List[dict], reserved: Set[int]) -> List[dict]:
+    """
+    Build the thread count / core set combinations to benchmark.
+
+    Args:
+        topology: Result of cpu_topology
+        reserved: CPUs kept free for capture
+
+    Returns:
+        Dicts with label, threads and cpus (sorted list, None = unpinned),
+        most preferred first
+    """
+    pool = [entry for entry in topology if entry['cpu'] not in reserved] or topology
+    primaries = {}
+    for entry in pool:
+        primaries.setdefault(entry['core'], entry)
+    # Performance cores first, so halving keeps the fast ones
+    cores = sorted(primaries.values(), key=lambda entry: (not entry['performance'], entry['cpu']))
+    performance = [entry for entry in cores if entry['performance']]
+
+    configs = [{'label': 'one thread per core', 'threads': len(cores), 'cpus': sorted(e['cpu'] for e in cores)}]
+    if 0 < len(performance) < len(cores):
+        configs.append({'label': 'performance cores', 'threads': len(performance),
+                        'cpus': sorted(e['cpu'] for e in performance)})
+    configs.append({'label': 'all logical CPUs', 'threads': len(pool), 'cpus': sorted(e['cpu'] for e in pool)})
+    half = cores[:max(1, len(cores) // 2)]
+    if len(half) < len(cores):
+        configs.append({'label': 'half of the cores', 'threads': len(half), 'cpus': sorted(e['cpu'] for e in half)})
+    # Unpinned, all CPUs: the behaviour before tuning, as reference
+    configs.append({'label': 'unpinned', 'threads': max(1, os.cpu_count() or 1), 'cpus': None})
+
+    unique = []
+    for config in configs:
+        if all((config['threads'], config['cpus']) != (other['threads'], other['cpus']) for other in unique):
+            unique.append(config)
+    return unique
+
+
+def default_config(topology: List[dict], reserved: Set[int]) -> dict:
+    """Untuned configuration: one thread per core, capture core left free."""
+    return candidate_configs(topology, reserved)[0]
+
+
+def set_ioprio(pid: int, level: int) -> bool:
+    """
+    Set the best-effort I/O priority of a process (0 = highest, 7 = lowest).
+
+    Returns:
+        True on success
+    """
+    syscall = IOPRIO_SET_SYSCALL.get(platform.machine())
+    if syscall is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        value = (IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT) | max(0, min(7, int(level)))
+        return libc.syscall(syscall, IOPRIO_WHO_PROCESS, pid, value) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def process_threads(pid: int) -> Set[int]:
+    """Thread IDs of a process (just the process ID if /proc is not readable)."""
+    try:
+        return {int(tid) for tid in os.listdir(f'/proc/{pid}/task')}
+    except (OSError, ValueError):
+        return {pid}
+
+
+def apply_process_tuning(pid: int, cpus: Optional[List[int]] = None, nice: Optional[int] = None,
+                         ioprio: Optional[int] = None) -> None:
+    """
+    Pin a freshly started decoder process and set its priorities.
+
+    Affinity, nice value and I/O priority belong to single threads on Linux,
+    and a thread inherits them from the thread that creates it. Every thread
+    of the process is therefore tuned, repeating until no thread created in
+    the meantime is left out, so worker threads that already exist do not
+    keep the old settings.
+
+    Args:
+        pid: Process ID of the decoder
+        cpus: CPUs the decoder may use (None = unchanged)
+        nice: Nice value (negative values need CAP_SYS_NICE)
+        ioprio: Best-effort I/O priority level 0-7 (None = unchanged)
+    """
+    if not cpus and not nice and ioprio is None:
+        return
+    tuned = set()
+    for _ in range(TUNING_ROUNDS):
+        threads = process_threads(pid) - tuned
+        if not threads:
+            return
+        for tid in threads:
+            try:
+                if cpus:
+                    os.sched_setaffinity(tid, cpus)
+                if nice:
+                    os.setpriority(os.PRIO_PROCESS, tid, nice)
+            except ProcessLookupError:
+                continue  # Thread (or process) already exited
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not apply decoder CPU settings: {e}")
+                return
+            if ioprio is not None:
+                set_ioprio(tid, ioprio)
+        tuned |= threads
+
+
+class CpuTuner:
+    """Benchmarks decoder configurations once per machine and model and remembers the fastest."""
+
+    def __init__(self, path: Optional[Path] = None, reserve_capture_core: bool = True):
+        """
+        Initialize the tuner and load stored results.
+
+        Args:
+            path: Result file (default: ~/.cache/voice-dictation/cpu-tuning.json)
+            reserve_capture_core: Keep one core free of decoder threads for capture
+        """
+        self.path = Path(path) if path else DEFAULT_TUNING_PATH
+        self.topology = cpu_topology()
+        self.reserved = reserved_capture_cpus(self.topology) if reserve_capture_core else set()
+        self.key = machine_key()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.results = json.load(f)
+        except (OSError, ValueError):
+            self.results = {}
+
+    def config_for(self, model: str) -> dict:
+        """
+        Return the decoder configuration for a model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Dict with threads and cpus (tuned result or the untuned default)
+        """
+        stored = self.results.get(self.key, {}).get(model)
+        return stored or default_config(self.topology, self.reserved)
+
+    def is_tuned(self, model: str) -> bool:
+        """True if a measured configuration exists for this machine and model."""
+        return model in self.results.get(self.key, {})
+
+    def tune(self, model: str, measure: Callable[[dict], Optional[float]], repeats: int = 2,
+             tolerance: float = 0.05) -> Optional[dict]:
+        """
+        Benchmark all candidate configurations and store the fastest.
+
+        Args:
+            model: Model name the measurements belong to
+            measure: Runs one decode with a configuration, returns seconds or None on failure
+            repeats: Runs per configuration (the fastest counts)
+            tolerance: Configurations within this fraction of the fastest count as
+                equal; the more preferred one (fewer threads, capture core free) wins
+
+        Returns:
+            Fastest configuration, or None if every run failed
+        """
+        configs = candidate_configs(self.topology, self.reserved)
+        print(f"⚙️  Tuning {model} on {len(configs)} CPU configurations...")
+        timings: Dict[str, float] = {}
+        measured = []
+        for config in configs:
+            runs = [measure(config) for _ in range(repeats)]
+            runs = [seconds for seconds in runs if seconds is not None]
+            if not runs:
+                print(f"   {config['label']:<22} failed")
+                continue
+            seconds = min(runs)
+            timings[config['label']] = round(seconds * 1000, 1)
+            print(f"   {config['label']:<22} {config['threads']:>2} threads  {seconds * 1000:8.0f} ms")
+            measured.append((seconds, config))
+        if not measured:
+            return None
+
+        fastest = min(seconds for seconds, _ in measured)
+        best = next(config for seconds, config in measured if seconds <= fastest * (1 + tolerance))
+        result = dict(best, decode_ms=timings[best['label']], measured=timings)
+        self.results.setdefault(self.key, {})[model] = result
+        self._save()
+        print(f"✅ Fastest: {result['label']} ({result['threads']} threads, {result['decode_ms']:.0f} ms)")
+        return result
+
+    def _save(self) -> None:
+        """Write the results atomically."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.results, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not write CPU tuning results: {e}")
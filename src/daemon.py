@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Dictation daemon for Voice Dictation
+Keeps the recognizer resident and accepts session triggers over a Unix socket
+"""
+
+import os
+import signal
+import socket
+import threading
+from typing import Optional
+
+
+def get_socket_path() -> str:
+    """Return the per-user Unix socket path of the daemon."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'voice-dictation.sock')
+    return f"/tmp/voice-dictation-{os.getuid()}.sock"
+
+
+def send_command(command: str, socket_path: Optional[str] = None, timeout: float = 2.0) -> Optional[str]:
+    """
+    Send a command to a running daemon.
+
+    Args:
+        command: Command to send (dictate, stop, ping, quit)
+        socket_path: Socket path (default: per-user runtime socket)
+        timeout: Connection timeout in seconds
+
+    Returns:
+        Reply line from the daemon, or None if no daemon is listening
+    """
+    path = socket_path or get_socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(f"{command}\n".encode('utf-8'))
+            reply = sock.makefile('r', encoding='utf-8').readline()
+            return reply.strip() or None
+    except OSError:
+        return None
+
+
+class DictationDaemon:
+    """Long-lived process that runs dictation sessions on request."""
+
+    def __init__(self, dictation, socket_path: Optional[str] = None):
+        """
+        Initialize the daemon.
+
+        Args:
+            dictation: VoiceDictation instance reused for every session
+            socket_path: Socket path (default: per-user runtime socket)
+        """
+        self.dictation = dictation
+        self.socket_path = socket_path or get_socket_path()
+        self.server_socket = None
+        self.session_thread = None
+        self.session_lock = threading.Lock()
+        self.running = False
+
+    def _session_active(self) -> bool:
+        """Return True while a dictation session is recording (or, without the session queue, in progress)."""
+        return self.session_thread is not None and self.session_thread.is_alive()
+
+    def _run_session(self) -> None:
+        """Run one dictation session in the worker thread."""
+        try:
+            self.dictation.run()
+        except Exception as e:
+            print(f"❌ Dictation session failed: {e}")
+
+    def _handle_command(self, command: str) -> str:
+        """
+        Execute a client command.
+
+        Args:
+            command: Command received from the client
+
+        Returns:
+            Reply sent back to the client
+        """
+        with self.session_lock:
+            if command == 'ping':
+                return 'pong'
+            if command == 'dictate':
+                # Hotkey toggles: a second press while recording stops the session
+                if self._session_active():
+                    self.dictation.is_recording = False
+                    return 'stopping'
+                self.session_thread = threading.Thread(target=self._run_session, daemon=True)
+                self.session_thread.start()
+                # Earlier sessions may still be decoding; their text is typed first
+                queue = self.dictation.session_queue
+                decoding = queue.pending() if queue is not None else 0
+                return f'started ({decoding} decoding)' if decoding else 'started'
+            if command == 'stop':
+                if self._session_active():
+                    self.dictation.is_recording = False
+                    return 'stopping'
+                return 'idle'
+            if command == 'quit':
+                self.running = False
+                return 'bye'
+        return 'unknown command'
+
+    def _bind(self) -> bool:
+        """Bind the listening socket, replacing a stale one if needed."""
+        if os.path.exists(self.socket_path):
+            if send_command('ping', self.socket_path) == 'pong':
+                print(f"❌ Daemon already running on {self.socket_path}")
+                return False
+            os.unlink(self.socket_path)
+
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server_socket.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.server_socket.listen(4)
+        # Periodic timeout so the accept loop notices 'quit' and signals
+        self.server_socket.settimeout(0.5)
+        return True
+
+    def serve_forever(self) -> None:
+        """Accept client commands until 'quit' or SIGTERM/SIGINT."""
+        if not self._bind():
+            return
+
+        def _request_shutdown(_signum, _frame):
+            self.running = False
+
+        signal.signal(signal.SIGTERM, _request_shutdown)
+        signal.signal(signal.SIGINT, _request_shutdown)
+
+        self.running = True
+        print(f"🟢 Daemon listening on {self.socket_path}")
+        try:
+            while self.running:
+                try:
+                    conn, _ = self.server_socket.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    if self.running:
+                        raise
+                    break
+                with conn:
+                    conn.settimeout(2.0)
+                    try:
+                        command = conn.makefile('r', encoding='utf-8').readline().strip().lower()
+                        reply = self._handle_command(command)
+                        conn.sendall(f"{reply}\n".encode('utf-8'))
+                    except OSError as e:
+                        print(f"⚠️  Client error: {e}")
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop any running session and release the socket."""
+        self.running = False
+        self.dictation.is_recording = False
+        if self.session_thread is not None:
+            self.session_thread.join(timeout=5)
+        if self.server_socket is not None:
+            self.server_socket.close()
+            self.server_socket = None
+        try:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        except OSError:
+            pass
+        print("👋 Daemon stopped")
@@ -4,28 +4,51 @@ Voice Dictation for Linux using whisper.cpp
 Voice-to-text dictation triggered via GNOME keyboard shortcut
 """
 
-import pyaudio
-import wave
-from pynput.keyboard import Controller
 import time
 import sys
 import json
 import os
+import argparse
 import subprocess
+import re
 import tempfile
-import numpy as np
-import soundfile as sf
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-try:
-    import gi
-    gi.require_version('Gio', '2.0')
-    from gi.repository import Gio
-    HAS_GSETTINGS = True
-except (ImportError, ValueError):
-    HAS_GSETTINGS = False
-    print("⚠️  GSettings not available, using config.json")
+from whisper_server import WhisperServer
+import launcher
+from daemon import DictationDaemon
+from streaming import SpeculativeDecode, StreamingTranscriber
+from audio_buffer import PcmBuffer, WavHandoff, save_wav_async
+from batch import BatchOutput, BatchTranscriber, find_audio_files, plan_workers
+from capture import CallbackCapture
+from config_cache import ConfigCache, settings_fingerprint
+from cpu_tuning import CpuTuner, apply_process_tuning
+from audio_devices import DeviceCache, select_input_device, select_multi_devices, topology_fingerprint
+from vad import create_vad, find_speech_bounds
+from injection import LazyKeyboardController, create_injectors, inject_text
+from model_manager import DEFAULT_MODEL_SOURCE, ModelManager, split_model_name
+from model_tiers import ModelTierPolicy, model_memory_mb, parse_tiers
+from multi_capture import MultiCapture
+from postprocess import PostProcessor
+from recognition import Transcript, plain_text
+from resample import PolyphaseResampler
+from session_queue import SessionQueue
+from tracing import DEFAULT_TRACE_LOG, Tracer
+from transcript_cache import TranscriptCache
+from warm_capture import WarmCapture
+
+# Settings changes are applied this long after the last one (the settings app writes per keystroke)
+SETTINGS_SETTLE_MS = 300
+
+# Re-decode the whole utterance instead of spans when this share of the speech is uncertain
+REDECODE_FULL_SHARE = 0.5
+# Audio around an uncertain span that is decoded with it (whisper needs context)
+REDECODE_CONTEXT_SECONDS = 1.0
+
+# "whisper_print_timings:     load time =   123.45 ms" lines on whisper-cli stderr
+WHISPER_TIMING_PATTERN = re.compile(r'whisper_print_timings:\s+(\w+) time =\s+([\d.]+) ms')
 
 
 class VoiceDictation:
@@ -39,39 +62,167 @@ class VoiceDictation:
             config_path: Path to configuration file (optional, fallback if no GSettings)
             use_gsettings: Use GSettings if available (default: True)
         """
-        self.use_gsettings = use_gsettings and HAS_GSETTINGS
+        init_start = time.perf_counter()
+        self.use_gsettings = use_gsettings
+        self.settings = None  # Gio.Settings, only opened when the cached configuration is stale
+        self.config = None
         
         if self.use_gsettings:
             try:
-                self.settings = Gio.Settings.new('org.gnome.voicedictation')
-                self.config = self._load_from_gsettings()
-                print("✅ Using GSettings for configuration")
+                self.config = self._load_gsettings_cached()
             except Exception as e:
                 print(f"⚠️  GSettings error: {e}, using config.json")
-                self.use_gsettings = False
-                self.config = self._load_config(config_path)
-        else:
+            if self.config is not None:
+                print("✅ Using GSettings for configuration")
+                self.settings_snapshot = dict(self.config)  # Raw values, reloads are compared against them
+        if self.config is None:
+            self.use_gsettings = False
             self.config = self._load_config(config_path)
         
-        self.keyboard_controller = Controller()
+        self.keyboard_controller = LazyKeyboardController()
+        self.injectors = create_injectors(self.config.get('injection_backend', 'auto'), self.keyboard_controller)
         self.is_recording = False
-        self.audio_frames = []
+        # Preallocated PCM buffer, reused across sessions
+        self.audio_buffer = PcmBuffer(
+            self.config['sample_rate'],
+            self.config['channels'],
+            seconds=self.config.get('max_recording_time', 30.0) + 1.0,
+        )
         self.audio_stream = None
-        self.pyaudio_instance = None
-        # Adaptive silence threshold: will be calculated from initial noise floor
-        self.silence_threshold = self.config.get('silence_threshold', 500)
+        self.warm_capture = None  # Always-open microphone between daemon sessions
+        self.session_warm = False  # Current session took over the warm stream
+        self.preroll_chunks = []  # Audio captured before the hotkey, recorded first
+        self.pyaudio_instance = None  # Kept across sessions while the device topology is unchanged
+        self.pyaudio_fingerprint = None
+        self.device_cache = DeviceCache()
+        self.resampler = None  # Converts native-rate capture to sample_rate, None if they match
+        self.capture_frames = 1024  # Frames read per chunk at the capture rate
+        self.resample_pending = bytearray()  # Resampled audio not yet cut into 1024-frame chunks
+        self.dropped_frames = 0  # Frames lost in the last session (consumer fell behind)
+        self.input_overflows = 0  # Input overflows PortAudio reported in the last session
         self.silence_duration = self.config.get('silence_duration', 2.0)
+        self.trimmed_seconds = 0.0  # Silence cut before inference in the last session
+        self.last_whisper_timings = {}  # whisper.cpp's own timings (ms) of the last whisper-cli run
         self.last_sound_time = None
-        self.noise_floor = None  # Will be measured during recording
+        # Voice activity detector; adaptive threshold is calibrated from the noise floor
+        self.vad = self._create_vad()
+        self.whisper_servers = {}  # Resident whisper-server per model (daemon mode only)
+        self.resident = False  # Daemon keeps models loaded (start_resident_model was called)
+        # Optional routing of utterances to fast/accurate models by duration
+        self.model_tiers = self._create_tier_policy()
+        self.last_model = self.config['model']  # Model that produced the last transcript
+        self.decode_local = threading.local()  # Per-thread decode state, queued sessions decode in parallel
+        self.used_substitute = False
+        # Decoder thread count and cores, measured once per machine and model
+        self.cpu_tuner = CpuTuner(reserve_capture_core=self.config.get('reserve_capture_core', True))
+        self.retune_models = set()  # Tuned in the background, resident server still runs untuned
+        # Transcripts of repeated clips (retries, short commands) are reused instead of decoded
+        self.transcript_cache = None
+        if self.config.get('transcript_cache', True) and self.config['channels'] == 1:
+            cache_path = self.config.get('transcript_cache_path')
+            self.transcript_cache = TranscriptCache(
+                os.path.expanduser(cache_path) if cache_path else None,
+                capacity=self.config.get('transcript_cache_size', 500),
+                fuzzy_max_seconds=self.config.get('transcript_cache_fuzzy_seconds', 3.0),
+            )
+        # Hallucination filter, spoken punctuation and replacements, compiled once
+        self.postprocessor = self._create_postprocessor()
+        self.streamer = None  # StreamingTranscriber while a streaming session records
+        self.longform = False  # Long-form session: segments are typed while recording continues
+        self.segments_typed = 0
+        self.captured_bytes = 0  # Audio recorded in the current session
+        self.stream_last_voice = None
+        self.stream_pause_marked = False
+        self.speculation = None  # SpeculativeDecode while a non-streaming session records
+        self.last_speech_pos = 0
+        self.spec_last_voice = None
+        self.spec_pause_handled = False
+        # Live GSettings changes (daemon mode), applied between sessions
+        self.reload_lock = threading.Lock()
+        self.active_sessions = 0  # Sessions recording, decoding or typing
+        self.reload_pending = False
+        self.reload_timer = None  # GLib source that applies changes once they settle
+        # Daemon: ended recordings are decoded here while the next session records
+        self.session_queue = None
         
         # Validate whisper.cpp installation
         self._check_whisper_installation()
+        # Installed models; missing ones are fetched in the background, never during a session
+        self.models = ModelManager(
+            self.config['model_path'],
+            source=self.config.get('model_source'),
+            whisper_cli_path=self.config['whisper_cpp_path'],
+            auto_download=self.config.get('model_auto_download', True),
+            allow_unverified=self.config.get('model_allow_unverified', False),
+        )
         
         print("🎤 Voice Dictation for Linux (whisper.cpp)")
         print(f"Hotkey: {self.config['hotkey']}")
-        print(f"Model: {self.config['model']}")
+        if self.model_tiers is not None:
+            print(f"Model tiers: {self.config['model_tiers']}")
+        else:
+            print(f"Model: {self.config['model']}")
         print(f"Language: {self.config['language']}")
         print("Ready to dictate!")
+        
+        # Per-stage latency tracing (JSONL log, optional metrics endpoint)
+        trace_log = self.config.get('trace_log', str(DEFAULT_TRACE_LOG))
+        self.tracer = Tracer(
+            os.path.expanduser(trace_log) if trace_log else None,
+            metrics_port=self.config.get('metrics_port'),
+        )
+        self.init_duration = (init_start, time.perf_counter() - init_start)  # Reported with the first session
+    
+    @property
+    def used_substitute(self) -> bool:
+        """A requested model was missing and another one decoded (tracked per decoding thread)."""
+        return getattr(self.decode_local, 'used_substitute', False)
+    
+    @used_substitute.setter
+    def used_substitute(self, value: bool) -> None:
+        self.decode_local.used_substitute = value
+    
+    def _load_gsettings_cached(self) -> Optional[dict]:
+        """
+        Load the GSettings configuration, from the cache while the settings are unchanged.
+        
+        Importing GObject introspection and opening the schema is the slowest
+        part of a launch, so both are skipped on a cache hit.
+        
+        Returns:
+            Configuration dict, or None if GSettings is not available
+        """
+        fingerprint = settings_fingerprint(os.path.abspath(__file__))
+        cache = ConfigCache()
+        config = cache.load(fingerprint) if fingerprint else None
+        if config is not None:
+            return config
+        
+        if not self._open_gsettings():
+            return None
+        config = self._load_from_gsettings()
+        if fingerprint:
+            cache.save(fingerprint, config)
+        return config
+    
+    def _open_gsettings(self) -> bool:
+        """
+        Open the GSettings schema (imports GObject introspection).
+        
+        Returns:
+            True if self.settings is available
+        """
+        if self.settings is not None:
+            return True
+        try:
+            import gi
+            gi.require_version('Gio', '2.0')
+            from gi.repository import Gio
+        except (ImportError, ValueError):
+            print("⚠️  GSettings not available, using config.json")
+            return False
+        self.settings = Gio.Settings.new('org.gnome.voicedictation')
+        return True
     
     def _load_from_gsettings(self) -> dict:
         """Load configuration from GSettings."""
@@ -83,10 +234,22 @@ class VoiceDictation:
             "model_path": os.path.expanduser(self.settings.get_string('model-path')),
             "silence_threshold": self.settings.get_int('silence-threshold'),
             "silence_duration": self.settings.get_double('silence-duration'),
-            "sample_rate": self.settings.get_int('sample-rate'),
+            "sample_rate": 16000,
+            "capture_rate": self.settings.get_int('sample-rate') or 'auto',
+            "input_device": self.settings.get_string('input-device') or 'auto',
             "channels": 1,
             "enabled": self.settings.get_boolean('enabled'),
             "show_notifications": self.settings.get_boolean('show-notifications'),
+            "streaming": self.settings.get_boolean('streaming'),
+            "longform": self.settings.get_boolean('long-form'),
+            "speculative": self.settings.get_boolean('speculative-endpointing'),
+            "vad": self.settings.get_string('vad-engine'),
+            "injection_backend": self.settings.get_string('injection-backend'),
+            "model_tiers": self.settings.get_string('model-tiers'),
+            "warm_capture": self.settings.get_boolean('warm-capture'),
+            "multi_mic": self.settings.get_boolean('multi-mic'),
+            "spoken_punctuation": self.settings.get_boolean('spoken-punctuation'),
+            "model_quantization": self.settings.get_string('model-quantization'),
         }
         print(f"Sprache: {self.config['language']}")
         print("Bereit zum Diktieren!")
@@ -99,11 +262,65 @@ class VoiceDictation:
             "model": "base",
             "whisper_cpp_path": os.path.expanduser("~/.local/bin/whisper-cli"),
             "model_path": os.path.expanduser("~/.local/share/whisper/whisper.cpp/models"),
+            "model_source": DEFAULT_MODEL_SOURCE,  # base URL, file:// URL or local directory (mirror)
+            "model_quantization": "",  # "q5_1", "q8_0", ... = decode with a quantized model, "" = original
+            "model_auto_download": True,  # fetch missing models in the background
+            "model_allow_unverified": False,  # accept downloads without a published checksum
             "silence_threshold": 500,
             "silence_duration": 2.0,
             "sample_rate": 16000,
             "channels": 1,
-            "input_device": "auto"  # "auto" | "pulse" | device name substring
+            "input_device": "auto",  # "auto" | "pulse" | device name substring
+            "capture_rate": "auto",  # "auto" = device native rate, resampled to sample_rate in-process
+            "prefer_hw_device": False,  # auto mode: use ALSA hw: microphones before PipeWire/Pulse
+            "capture_mode": "callback",  # "callback" (ring buffer, counts lost frames) | "blocking"
+            "capture_buffer_seconds": 5.0,  # audio buffered in callback mode before frames are dropped
+            "cpu_tuning": True,  # daemon measures the fastest decoder threads/cores once per machine
+            "decoder_threads": None,  # override the tuned thread count
+            "decoder_nice": 0,  # nice value of whisper.cpp (negative needs CAP_SYS_NICE)
+            "decoder_ioprio": 0,  # best-effort I/O priority of whisper.cpp, 0 = highest, None = unchanged
+            "reserve_capture_core": True,  # keep one core free of decoder threads for audio capture
+            "multi_mic": False,  # record all microphones in parallel and use the one with the best SNR
+            "multi_mic_devices": "auto",  # "auto" = all physical microphones, or comma separated names/indexes
+            "multi_mic_switch_db": 3.0,  # SNR advantage another microphone needs to take over
+            "warm_capture": True,  # daemon keeps the microphone open between sessions
+            "preroll_seconds": 0.3,  # audio before the hotkey included in each daemon session
+            "max_recording_time": 30.0,
+            "debug_wav": False,  # save /tmp/voice-dictation-last.wav after each session
+            "vad": "spectral",  # "energy" | "spectral" | "webrtc"
+            "vad_threshold_factor": 3.0,  # adaptive threshold = noise floor * factor
+            "vad_max_threshold": 15000,
+            "vad_hangover": 0.3,  # seconds speech is held after the last voiced chunk
+            "trim_silence": True,  # cut non-speech at both ends before transcription
+            "trim_padding": 0.25,  # seconds of context kept around the speech
+            "streaming": False,  # decode while recording (best with --daemon)
+            "streaming_step": 1.0,  # seconds between incremental decodes
+            "streaming_pause": 0.4,  # pause length that closes a streaming segment
+            "longform": False,  # type each segment at natural pauses, no length limit, constant memory
+            "longform_silence_duration": 5.0,  # silence that ends a long-form session
+            "longform_max_recording_time": None,  # seconds, None = unlimited
+            "decode_timeout_factor": 3.0,  # whisper timeout = max(60 s, audio length * factor)
+            "transcript_cache": True,  # reuse transcripts of identical/near-identical clips
+            "transcript_cache_path": None,  # default ~/.cache/voice-dictation/transcripts.json
+            "transcript_cache_size": 500,  # entries kept (least recently used are evicted)
+            "transcript_cache_fuzzy_seconds": 3.0,  # clips up to this length also match by similarity
+            "speculative": True,  # decode at short pauses, before the silence timeout
+            "speculative_pause": 0.3,  # pause length that starts a speculative decode
+            "model_tiers": "",  # e.g. "tiny:4,base:12,small" - model per speech duration, "" = single model
+            "tier_max_load": 0.8,  # per-core load above which the next smaller tier is used
+            "tier_min_confidence": 0.5,  # re-decode results below this with the next larger tier
+            "tier_redecode": True,
+            "word_confidence": True,  # ask whisper.cpp for token timestamps and probabilities
+            "word_min_confidence": 0.4,  # words below this are re-decoded with the next larger model
+            "redecode_model": "",  # larger model for uncertain words without model tiers, "" = none
+            "model_memory_mb": 1024,  # budget for resident tier models in daemon mode
+            "session_decode_workers": 2,  # daemon: decodes of back-to-back sessions running at once
+            "injection_backend": "auto",  # "auto" | wtype | xdotool | ydotool | clipboard | pynput (comma separated)
+            "type_delay": 0.05,  # seconds to wait before inserting text (lets the target window settle)
+            "spoken_punctuation": False,  # "Komma", "neue Zeile" ... become punctuation (opt-in)
+            "postprocess_rules": None,  # default ~/.config/voice-dictation/postprocess.json
+            "trace_log": str(DEFAULT_TRACE_LOG),  # per-session stage timings (JSONL), "" disables
+            "metrics_port": None  # serve Prometheus metrics on 127.0.0.1:<port>
         }
         
         if config_path and Path(config_path).exists():
@@ -140,363 +357,957 @@ class VoiceDictation:
         print("  Run: /usr/share/voice-dictation/bin/install-whisper.sh")
         sys.exit(1)
     
-    def _download_model(self, model_name: str, model_dir: Path) -> bool:
-        """Download whisper model if not present."""
-        try:
-            print(f"📥 Downloading model: {model_name}")
-            print(f"   This may take a few minutes depending on model size...")
-            
-            # Ensure model directory exists
-            model_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Use whisper.cpp download script if available
-            whisper_cpp_dir = Path.home() / '.local/share/whisper/whisper.cpp'
-            download_script = whisper_cpp_dir / 'models/download-ggml-model.sh'
+    def _create_vad(self):
+        """Build the voice activity detector from the configuration."""
+        return create_vad(
+            self.config.get('vad', 'spectral'),
+            self.config['sample_rate'],
+            1024 * self.config['channels'],
+            threshold=self.config.get('silence_threshold', 500),
+            threshold_factor=self.config.get('vad_threshold_factor', 3.0),
+            max_threshold=self.config.get('vad_max_threshold', 15000),
+            hangover=self.config.get('vad_hangover', 0.3),
+        )
+    
+    def _create_tier_policy(self) -> Optional[ModelTierPolicy]:
+        """Build the model tier routing, None for a single model."""
+        tiers = parse_tiers(self.config.get('model_tiers', ''))
+        if not tiers:
+            return None
+        return ModelTierPolicy(
+            tiers,
+            max_load=self.config.get('tier_max_load', 0.8),
+            min_confidence=self.config.get('tier_min_confidence', 0.5),
+            redecode=self.config.get('tier_redecode', True),
+        )
+    
+    def _create_postprocessor(self) -> PostProcessor:
+        """Build the post-processor for the configured language."""
+        rules_path = self.config.get('postprocess_rules')
+        return PostProcessor(
+            self.config.get('language', 'de'),
+            rules_path=os.path.expanduser(rules_path) if rules_path else None,
+            spoken_punctuation=self.config.get('spoken_punctuation', False),
+        )
+    
+    def _get_model_path(self, model_name: Optional[str] = None) -> str:
+        """Get the path to the whisper model file (default: the configured model)."""
+        return str(self.models.path(model_name or self.config['model']))
+    
+    def _model_variant(self, model: str) -> str:
+        """Model name with the configured quantization applied (e.g. base → base-q5_1)."""
+        qtype = self.config.get('model_quantization') or ''
+        if not qtype or split_model_name(model)[1]:
+            return model
+        return f"{model}-{qtype}"
+    
+    def _resolve_model(self, model: str) -> Optional[str]:
+        """
+        Choose the installed model to decode with, without waiting for downloads.
+        
+        A missing (or not yet quantized) model is fetched in the background
+        and the closest installed model is used until it arrives.
+        
+        Args:
+            model: Requested model
             
-            if download_script.exists():
-                # Use official download script
-                result = subprocess.run(
-                    ['bash', str(download_script), model_name],
-                    cwd=str(whisper_cpp_dir / 'models'),
-                    capture_output=True,
-                    text=True
-                )
-                
-                if result.returncode == 0:
-                    # Move model to correct location if needed
-                    source_model = whisper_cpp_dir / f'models/ggml-{model_name}.bin'
-                    target_model = model_dir / f'ggml-{model_name}.bin'
-                    
-                    if source_model.exists() and source_model != target_model:
-                        import shutil
-                        shutil.copy2(str(source_model), str(target_model))
-                    
-                    print(f"✅ Model downloaded: {target_model}")
-                    return True
-                else:
-                    print(f"❌ Download failed: {result.stderr}")
-                    return False
+        Returns:
+            Installed model name, or None if no model is installed at all
+        """
+        resolved = self.models.resolve(self._model_variant(model))
+        self.used_substitute = self.used_substitute or resolved != self._model_variant(model)
+        if resolved is None:
+            print(f"❌ No whisper model installed in {self.config['model_path']}")
+            if self.models.is_fetching(self._model_variant(model)):
+                print("   The download is running - dictate again when it has finished")
             else:
-                # Fallback: direct download from HuggingFace
-                url = f"https://huggingface.co/ggerganov/whisper.cpp/resolve/main/ggml-{model_name}.bin"
-                target = model_dir / f"ggml-{model_name}.bin"
-                
-                result = subprocess.run(
-                    ['wget', '-O', str(target), url],
-                    capture_output=True,
-                    text=True
-                )
-                
-                if result.returncode == 0:
-                    print(f"✅ Model downloaded: {target}")
-                    return True
-                else:
-                    print(f"❌ Download failed: {result.stderr}")
-                    return False
-                    
-        except Exception as e:
-            print(f"❌ Error downloading model: {e}")
+                print(f"   Run: voice-dictation models fetch {model}")
+        return resolved
+    
+    def start_resident_model(self) -> bool:
+        """
+        Load the whisper model once into a long-lived whisper-server process.
+        
+        With model tiers, every tier that fits into model_memory_mb is kept
+        loaded; the remaining tiers fall back to whisper-cli.
+        
+        Returns:
+            True if a resident server is ready, False to fall back to whisper-cli
+        """
+        self.resident = True
+        server_path = self.config.get('whisper_server_path') or \
+            WhisperServer.find_executable(self.config['whisper_cpp_path'])
+        if not server_path:
+            print("⚠️  whisper-server not found, using whisper-cli per session")
             return False
+        
+        for variant in self._resident_models():
+            if not self.models.is_installed(variant):
+                # Load it once the background download has finished; sessions fall back meanwhile
+                if self.config.get('model_auto_download', True):
+                    self.models.fetch_async(variant, on_done=lambda name: self._start_server(server_path, name))
+                continue
+            self._start_server(server_path, variant)
+        return bool(self.whisper_servers)
     
-    def _get_model_path(self) -> str:
-        """Get the path to the whisper model file."""
-        model_dir = Path(self.config['model_path'])
-        model_name = self.config['model']
-        model_file = model_dir / f"ggml-{model_name}.bin"
+    def _resident_models(self) -> list:
+        """Models (with quantization applied) the daemon keeps loaded."""
+        if self.model_tiers is not None:
+            models = self.model_tiers.warm_models(
+                self.config['model_path'],
+                self.config.get('model_memory_mb', 1024),
+                # Size the file that is loaded (quantized variant), not the plain tier
+                resolve=lambda model: (self._model_variant(model), self.models.path(self._model_variant(model))),
+            )
+            if not models:
+                print("⚠️  No model tier fits into model_memory_mb, using whisper-cli per session")
+        else:
+            models = [self.config['model']]
+        return [self._model_variant(model) for model in models]
+    
+    def _start_server(self, server_path: str, model: str) -> bool:
+        """
+        Start a resident whisper-server for an installed model.
         
-        if not model_file.exists():
-            print(f"⚠️  Model not found: {model_file}")
-            print(f"🔄 Attempting to download model...")
+        Args:
+            server_path: whisper-server executable
+            model: Installed model name
             
-            if self._download_model(model_name, model_dir):
-                return str(model_file)
-            else:
-                print(f"\n❌ Failed to download model automatically.")
-                print(f"Please download manually:")
-                print(f"  mkdir -p {model_dir}")
-                print(f"  cd {model_dir}")
-                print(f"  wget https://huggingface.co/ggerganov/whisper.cpp/resolve/main/ggml-{model_name}.bin")
-                sys.exit(1)
+        Returns:
+            True if the server is ready
+        """
+        if model in self.whisper_servers:
+            return True
+        self.models.prefetch(model)
+        decoder = self._decoder_config(model)
+        server = WhisperServer(
+            server_path,
+            self._get_model_path(model),
+            language=self.config.get('language', 'de'),
+            threads=decoder['threads'],
+            cpus=decoder.get('cpus'),
+            nice=self.config.get('decoder_nice', 0),
+            ioprio=self.config.get('decoder_ioprio', 0),
+            timestamps=self.config.get('word_confidence', True),
+        )
+        if not server.start():
+            return False
+        self.whisper_servers[model] = server
+        return True
+    
+    def stop_resident_model(self) -> None:
+        """Shut down the resident whisper-servers, if any."""
+        for server in self.whisper_servers.values():
+            server.stop()
+        self.whisper_servers = {}
+    
+    def start_warm_capture(self) -> bool:
+        """
+        Keep the microphone open between sessions (daemon mode).
+        
+        Sessions then start with the last preroll_seconds of audio already
+        captured and with the noise floor tracked while idle, so neither the
+        device setup nor the calibration window delays the first word.
         
-        return str(model_file)
+        Returns:
+            True if warm capture was started
+        """
+        if not self.config.get('warm_capture', True):
+            return False
+        self.warm_capture = WarmCapture(
+            self._open_input_stream,
+            self._read_chunk,
+            self.vad,
+            chunk_seconds=1024 / self.config['sample_rate'],
+            preroll_seconds=self.config.get('preroll_seconds', 0.3),
+        )
+        self.warm_capture.start()
+        print(f"🎙️  Microphone kept open with {self.config.get('preroll_seconds', 0.3):.1f}s pre-roll")
+        return True
     
-    def _calculate_rms(self, audio_data: bytes) -> float:
-        """Calculate RMS (Root Mean Square) of audio data."""
-        audio_array = np.frombuffer(audio_data, dtype=np.int16)
-        return np.sqrt(np.mean(audio_array.astype(np.float32) ** 2))
+    def start_session_queue(self) -> None:
+        """
+        Decode ended daemon sessions in the background.
+        
+        A session returns from run() as soon as its recording ends, so the
+        hotkey can start the next one while earlier ones are still decoded;
+        transcripts are typed strictly in recording order.
+        """
+        workers = self.config.get('session_decode_workers', 2)
+        self.session_queue = SessionQueue(workers=workers)
+        print(f"📥 Session queue: up to {workers} decodes at once, typed in order")
     
-    def _type_text(self, text: str) -> None:
+    def watch_settings(self) -> bool:
+        """
+        Follow GSettings changes while the daemon runs.
+        
+        The 'changed' signal is dispatched by a GLib main loop thread. Changes
+        are applied once they settle (text fields are written on every
+        keystroke) and never during a session.
+        
+        Returns:
+            True if settings are watched
+        """
+        if not self.use_gsettings or not self._open_gsettings():
+            return False
+        from gi.repository import GLib
+        
+        def on_changed(_settings, _key: str) -> None:
+            if self.reload_timer is not None:
+                GLib.source_remove(self.reload_timer)
+            self.reload_timer = GLib.timeout_add(SETTINGS_SETTLE_MS, settled)
+        
+        def settled() -> bool:
+            self.reload_timer = None
+            self.reload_settings()
+            return False  # One-shot timeout
+        
+        self.settings.connect('changed', on_changed)
+        threading.Thread(target=GLib.MainLoop().run, daemon=True).start()
+        print("👂 Applying settings changes live")
+        return True
+    
+    def reload_settings(self) -> None:
+        """Apply changed GSettings keys now, or after the running session."""
+        with self.reload_lock:
+            if self.active_sessions:
+                self.reload_pending = True
+                return
+            self.reload_pending = False
+            current = self._load_from_gsettings()
+            changed = {key for key, value in current.items() if self.settings_snapshot.get(key) != value}
+            if not changed:
+                return
+            self.settings_snapshot = current
+            previous = {key: self.config.get(key) for key in changed}
+            self.config.update({key: current[key] for key in changed})
+            print(f"⚙️  Settings changed: {', '.join(sorted(changed))}")
+            self._apply_settings(changed, previous)
+    
+    def _apply_settings(self, changed: set, previous: dict) -> None:
+        """
+        Rebuild only the state that depends on changed configuration keys.
+        
+        Args:
+            changed: Configuration keys whose value changed
+            previous: Their values before the change
+        """
+        whisper_path = os.path.expanduser(self.config['whisper_cpp_path'])
+        if 'whisper_cpp_path' in changed and not os.access(whisper_path, os.X_OK):
+            print(f"⚠️  whisper.cpp not found at {whisper_path}, keeping {previous['whisper_cpp_path']}")
+            self.config['whisper_cpp_path'] = previous['whisper_cpp_path']
+            changed.discard('whisper_cpp_path')
+        if changed & {'whisper_cpp_path', 'model_path'}:
+            self.models = ModelManager(
+                self.config['model_path'],
+                source=self.config.get('model_source'),
+                whisper_cli_path=self.config['whisper_cpp_path'],
+                auto_download=self.config.get('model_auto_download', True),
+                allow_unverified=self.config.get('model_allow_unverified', False),
+            )
+        if 'model_tiers' in changed:
+            self.model_tiers = self._create_tier_policy()
+        if self.resident and changed & {'model', 'model_tiers', 'model_quantization', 'model_path', 'whisper_cpp_path'}:
+            # Keep servers whose model is still wanted; a new binary or directory reloads all
+            wanted = set(self._resident_models())
+            for model in list(self.whisper_servers):
+                if model not in wanted or changed & {'whisper_cpp_path', 'model_path'}:
+                    self.whisper_servers.pop(model).stop()
+            self.start_resident_model()
+        if 'language' in changed:
+            for server in self.whisper_servers.values():
+                server.language = self.config['language']  # Sent with every request
+        if changed & {'language', 'spoken_punctuation'}:
+            self.postprocessor = self._create_postprocessor()
+        if changed & {'vad', 'silence_threshold'}:
+            self.vad = self._create_vad()
+            if self.warm_capture is not None:
+                self.warm_capture.vad = self.vad
+        if 'silence_duration' in changed:
+            self.silence_duration = self.config['silence_duration']
+        if 'injection_backend' in changed:
+            self.injectors = create_injectors(self.config['injection_backend'], self.keyboard_controller)
+        if 'warm_capture' in changed:
+            if self.config['warm_capture'] and self.warm_capture is None:
+                self.start_warm_capture()
+            elif not self.config['warm_capture'] and self.warm_capture is not None:
+                self.warm_capture.stop()
+                self.warm_capture = None
+        elif self.warm_capture is not None and changed & {'input_device', 'capture_rate', 'multi_mic'}:
+            self.warm_capture.reopen()
+    
+    def close(self) -> None:
+        """Release the audio system, the resident model and the metrics endpoint."""
+        if self.session_queue is not None:
+            # Type what was dictated before the daemon stopped
+            self.session_queue.close()
+            self.session_queue = None
+        if self.warm_capture is not None:
+            self.warm_capture.stop()
+            self.warm_capture = None
+        self._release_pyaudio()
+        self.stop_resident_model()
+        self.tracer.close()
+    
+    def _type_text(self, text: str, separator: str = '') -> None:
         """
         Type the recognized text at the current cursor position.
         
         Args:
             text: Text to type
+            separator: Inserted before the text (e.g. a space between long-form segments)
         """
         if not text or text.strip() == "":
             return
         
         # Clean up the text
-        text = text.strip()
+        text = separator + text.strip()
         
-        # Small delay to ensure the application is ready
-        time.sleep(0.1)
+        # Optional delay for applications that need time to regain focus
+        type_delay = self.config.get('type_delay', 0.05)
+        if type_delay > 0:
+            time.sleep(type_delay)
         
-        # Type the text
-        self.keyboard_controller.type(text)
-        print(f"✅ Inserted: {text}")
+        # Insert with the first backend that works (fast batched backends first)
+        start = time.perf_counter()
+        with self.tracer.span('type', chars=len(text)):
+            backend = inject_text(self.injectors, text)
+        if backend is None:
+            print(f"❌ Could not insert text: {text}")
+            return
+        print(f"✅ Inserted via {backend} in {(time.perf_counter() - start) * 1000:.0f} ms: {text}")
     
-    def _record_audio(self) -> None:
-        """Record audio from microphone until stopped or silence detected."""
-        print("📡 Initializing PyAudio...")
-        self.pyaudio_instance = pyaudio.PyAudio()
+    def _get_pyaudio(self, fingerprint: str):
+        """
+        Return a PyAudio instance, reusing the previous one while the topology is unchanged.
         
-        try:
-            # List available input devices for debugging
-            print("\n📋 Available input devices:")
+        PortAudio snapshots the device list at initialization, so the instance is
+        recreated after a hotplug.
+        
+        Args:
+            fingerprint: Current device topology fingerprint
+        """
+        if self.pyaudio_instance is not None and self.pyaudio_fingerprint != fingerprint:
+            self._release_pyaudio()
+        if self.pyaudio_instance is None:
+            import pyaudio  # First session only, not imported at startup
+            print("📡 Initializing PyAudio...")
+            self.pyaudio_instance = pyaudio.PyAudio()
+            self.pyaudio_fingerprint = fingerprint
+        return self.pyaudio_instance
+    
+    def _release_pyaudio(self) -> None:
+        """Terminate the PyAudio instance."""
+        if self.pyaudio_instance is not None:
+            self.pyaudio_instance.terminate()
+            self.pyaudio_instance = None
+            self.pyaudio_fingerprint = None
+    
+    def _open_input_stream(self):
+        """
+        Open the microphone stream on the cached or freshly selected input device.
+        
+        The device choice is only re-evaluated when the device topology changed
+        or the cached device fails to open.
+        
+        Returns:
+            Opened PyAudio input stream
+        """
+        desired = str(self.config.get('input_device') or 'auto')
+        import pyaudio  # Stream opening only, not imported at startup
+        prefer_hardware = bool(self.config.get('prefer_hw_device', False))
+        cache_key = desired + (':hw' if prefer_hardware else '')
+        fingerprint = topology_fingerprint()
+        if self.config.get('multi_mic', False):
+            capture = self._open_multi_capture(fingerprint)
+            if capture is not None:
+                return capture
+        cached = self.device_cache.load(fingerprint, cache_key)
+        
+        for attempt in range(2):
+            pa = self._get_pyaudio(fingerprint)
+            with self.tracer.span('device_select', cached=cached is not None):
+                if cached is not None:
+                    device = cached if cached.get('index') is not None else None
+                    print(f"🔌 Using cached input device: [{cached.get('index')}] {cached.get('name')}")
+                else:
+                    device = select_input_device(pa, desired, self.config['channels'], pyaudio.paInt16,
+                                                 prefer_hardware=prefer_hardware)
+                    self.device_cache.save(fingerprint, cache_key, device)
+            
+            rate = self._capture_rate(device)
+            self._setup_resampler(rate)
+            print(f"🔌 Opening audio stream (rate={rate}, channels={self.config['channels']})...")
             try:
-                device_count = self.pyaudio_instance.get_device_count()
-                for i in range(device_count):
-                    try:
-                        dev = self.pyaudio_instance.get_device_info_by_index(i)
-                        max_input = int(dev.get('maxInputChannels', 0))
-                        if max_input > 0:
-                            print(f"   [{i}] {dev.get('name', 'Unknown')} (inputs: {max_input})")
-                    except Exception:
-                        continue
+                with self.tracer.span('stream_open', rate=rate):
+                    stream_args = dict(
+                        format=pyaudio.paInt16,
+                        channels=self.config['channels'],
+                        rate=rate,
+                        input=True,
+                        input_device_index=device['index'] if device else None,
+                        frames_per_buffer=self.capture_frames
+                    )
+                    if self.config.get('capture_mode', 'callback') == 'callback':
+                        # PortAudio thread fills a ring buffer, this thread only consumes
+                        capture = CallbackCapture(
+                            self.config['channels'],
+                            rate,
+                            seconds=self.config.get('capture_buffer_seconds', 5.0),
+                            cpus=sorted(self.cpu_tuner.reserved) or None,
+                        )
+                        return capture.open(pa, **stream_args)
+                    return pa.open(**stream_args)
             except Exception as e:
-                print(f"   ⚠️  Could not list devices: {e}")
-            print()
+                if cached is None or attempt > 0:
+                    raise
+                # Stale cache (device vanished or changed): re-enumerate once
+                print(f"⚠️  Cached device failed to open ({e}), re-selecting...")
+                self.device_cache.invalidate()
+                self._release_pyaudio()
+                cached = None
+    
+    def _open_multi_capture(self, fingerprint: str) -> Optional[MultiCapture]:
+        """
+        Open all configured microphones in parallel.
+        
+        Args:
+            fingerprint: Current device topology fingerprint
             
-            # Try to pick best input device
-            # Priority: pipewire/pulse (with resampling) > hardware mic > built-in > default
-            device_index = None
-            desired = (self.config.get('input_device') or 'auto').lower()
+        Returns:
+            Opened MultiCapture, or None to fall back to a single device
+        """
+        pa = self._get_pyaudio(fingerprint)
+        with self.tracer.span('device_select', multi=True):
+            devices = select_multi_devices(pa, self.config.get('multi_mic_devices', 'auto'))
+        if len(devices) < 2:
+            print(f"ℹ️  {len(devices)} microphone(s) for parallel capture found, using a single device")
+            return None
+        
+        # Every device is resampled by MultiCapture, the session reads sample_rate directly
+        self._setup_resampler(self.config['sample_rate'])
+        print(f"🔌 Opening {len(devices)} microphones in parallel...")
+        try:
+            with self.tracer.span('stream_open', devices=len(devices)):
+                return MultiCapture(
+                    devices,
+                    self.config['channels'],
+                    self.config['sample_rate'],
+                    switch_margin_db=self.config.get('multi_mic_switch_db', 3.0),
+                    buffer_seconds=self.config.get('capture_buffer_seconds', 5.0),
+                    cpus=sorted(self.cpu_tuner.reserved) or None,
+                ).open(pa)
+        except OSError as e:
+            print(f"⚠️  Parallel capture failed ({e}), using a single device")
+            return None
+    
+    def _capture_rate(self, device: Optional[dict]) -> int:
+        """
+        Choose the rate the microphone is opened with.
+        
+        In auto mode the device's native rate is used, so neither ALSA nor the
+        sound server resamples; the audio is converted in-process instead.
+        
+        Args:
+            device: Selected device entry (None for the system default)
             
-            # Priority ranking for auto mode
-            # Prefer pipewire/pulse because they handle resampling automatically
-            pipewire_device = None
-            pulse_device = None
-            hardware_mic = None  # Direct hardware like ALC285, HDA
-            builtin_device = None
-            default_device = None
-
-            try:
-                device_count = self.pyaudio_instance.get_device_count()
-            except Exception:
-                device_count = 0
-
-            for i in range(device_count):
-                try:
-                    dev = self.pyaudio_instance.get_device_info_by_index(i)
-                    name = dev.get('name', '').lower()
-                    max_input = int(dev.get('maxInputChannels', 0))
-                    if max_input < 1:
-                        continue
-                    
-                    # Explicit device selection (by substring or index)
-                    if desired != 'auto':
-                        # Check if desired is a device index
-                        try:
-                            if int(desired) == i:
-                                device_index = i
-                                print(f"🔌 Matched requested device index {desired}: [{i}] {dev.get('name')}")
-                                break
-                        except ValueError:
-                            pass
-                        
-                        # Otherwise match by name substring
-                        if desired in name:
-                            device_index = i
-                            print(f"🔌 Matched requested device '{desired}': [{i}] {dev.get('name')}")
-                            break
-                        continue
-                    
-                    # Auto mode: collect candidates by priority
-                    if 'pipewire' in name and pipewire_device is None:
-                        pipewire_device = i
-                    elif 'pulse' in name and pulse_device is None:
-                        pulse_device = i
-                    # Hardware devices (ALSA hw:X,Y) - direct mic access
-                    elif ('alc' in name or 'hda' in name or 'analog' in name) and 'hw:' in name and hardware_mic is None:
-                        hardware_mic = i
-                    elif 'built-in' in name and builtin_device is None:
-                        builtin_device = i
-                    elif 'default' in name and default_device is None:
-                        default_device = i
-                        
-                except Exception:
-                    continue
-
-            # Auto mode: select best available (prefer sound servers for resampling support)
-            if desired == 'auto':
-                if pipewire_device is not None:
-                    device_index = pipewire_device
-                    dev_info = self.pyaudio_instance.get_device_info_by_index(device_index)
-                    print(f"🔌 Selected pipewire: [{device_index}] {dev_info.get('name')}")
-                elif pulse_device is not None:
-                    device_index = pulse_device
-                    dev_info = self.pyaudio_instance.get_device_info_by_index(device_index)
-                    print(f"🔌 Selected pulse: [{device_index}] {dev_info.get('name')}")
-                elif builtin_device is not None:
-                    device_index = builtin_device
-                    dev_info = self.pyaudio_instance.get_device_info_by_index(device_index)
-                    print(f"🔌 Selected built-in: [{device_index}] {dev_info.get('name')}")
-                elif hardware_mic is not None:
-                    device_index = hardware_mic
-                    dev_info = self.pyaudio_instance.get_device_info_by_index(device_index)
-                    print(f"🔌 Selected hardware mic: [{device_index}] {dev_info.get('name')}")
-                elif default_device is not None:
-                    device_index = default_device
-                    dev_info = self.pyaudio_instance.get_device_info_by_index(device_index)
-                    print(f"🔌 Selected default: [{device_index}] {dev_info.get('name')}")
-                else:
-                    print("🔌 Using system default input device")
-            elif device_index is None:
-                print(f"⚠️  Requested device '{desired}' not found, using system default")
-
-            print(f"🔌 Opening audio stream (rate={self.config['sample_rate']}, channels={self.config['channels']})...")
-            self.audio_stream = self.pyaudio_instance.open(
-                format=pyaudio.paInt16,
-                channels=self.config['channels'],
-                rate=self.config['sample_rate'],
-                input=True,
-                input_device_index=device_index,
-                frames_per_buffer=1024
-            )
+        Returns:
+            Capture sample rate in Hz
+        """
+        target = self.config['sample_rate']
+        capture = self.config.get('capture_rate', 'auto')
+        if capture not in (None, '', 'auto', 0):
+            return int(capture)
+        if not device:
+            return target
+        return device.get('native_rate') or target
+    
+    def _setup_resampler(self, rate: int) -> None:
+        """Prepare the conversion from the capture rate to sample_rate."""
+        target = self.config['sample_rate']
+        self.resample_pending.clear()
+        if rate == target:
+            self.resampler = None
+            self.capture_frames = 1024
+            return
+        if self.resampler is None or self.resampler.in_rate != rate:
+            self.resampler = PolyphaseResampler(rate, target, self.config['channels'])
+            print(f"🎚️  Resampling {rate} Hz → {target} Hz in-process")
+        self.resampler.reset()
+        # Read enough native-rate frames for one 1024-frame chunk at the target rate
+        self.capture_frames = -(-1024 * rate // target)
+    
+    def _read_chunk(self, stream=None) -> bytes:
+        """
+        Read the next 1024-frame chunk at sample_rate from the microphone.
+        
+        Args:
+            stream: Stream to read (default: the session's audio_stream)
+        
+        Returns:
+            16-bit PCM chunk (resampled if the device runs at another rate)
+        """
+        stream = stream or self.audio_stream
+        if self.resampler is None:
+            return stream.read(1024, exception_on_overflow=False)
+        chunk_bytes = 1024 * self.config['channels'] * 2
+        while len(self.resample_pending) < chunk_bytes:
+            data = stream.read(self.capture_frames, exception_on_overflow=False)
+            self.resample_pending += self.resampler.process(data)
+        chunk = bytes(self.resample_pending[:chunk_bytes])
+        del self.resample_pending[:chunk_bytes]
+        return chunk
+    
+    def _record_audio(self) -> None:
+        """Record audio from microphone until stopped or silence detected."""
+        stream_failed = False
+        try:
+            if self.audio_stream is None:
+                self.audio_stream = self._open_input_stream()
+            # Warm streams count losses since the daemon started
+            loss_base = (getattr(self.audio_stream, 'dropped_frames', 0),
+                         getattr(self.audio_stream, 'overflows', 0))
             
             print("🎤 Recording... (speak now)")
             start_time = time.time()
             self.last_sound_time = start_time
             grace_period = 1.0  # seconds before we consider silence (increased)
             min_recording_time = 1.5  # minimum recording duration in seconds
-            max_recording_time = 30.0  # maximum recording duration in seconds
+            max_recording_time = self.config.get('max_recording_time', 30.0)  # maximum recording duration in seconds
+            silence_duration = self.silence_duration
+            if self.longform:
+                # Segments are transcribed and typed as they complete, length is not limited
+                max_recording_time = self.config.get('longform_max_recording_time') or float('inf')
+                silence_duration = self.config.get('longform_silence_duration', 5.0)
             has_detected_sound = False  # track if we've detected any sound above threshold
             
-            # Measure noise floor in first 0.5 seconds (skip first few to avoid initialization spike)
-            noise_samples = []
+            # Measure noise floor in first 0.8 seconds (skip first few to avoid initialization spike),
+            # unless it was tracked by the warm capture
             calibration_time = 0.8
             skip_initial = 0.2  # Skip first 0.2s to avoid initialization spikes
             
             while self.is_recording:
                 try:
-                    data = self.audio_stream.read(1024, exception_on_overflow=False)
-                    self.audio_frames.append(data)
+                    # Pre-roll from the warm capture first, then live audio
+                    data = self.preroll_chunks.pop(0) if self.preroll_chunks else self._read_chunk()
+                    if not self.captured_bytes:
+                        self.tracer.event('first_audio')
+                    self.captured_bytes += len(data)
+                    if not self.longform:
+                        # Long-form audio lives only in the streamer's ring buffer
+                        self.audio_buffer.append(data)
+                    if self.streamer is not None:
+                        self.streamer.push(data)
                     
-                    # Check for silence
-                    rms = self._calculate_rms(data)
                     current_time = time.time()
                     elapsed = current_time - start_time
                     
                     # Calibrate noise floor between 0.2s and 0.8s (skip initialization spike)
-                    if elapsed >= skip_initial and elapsed < calibration_time:
-                        noise_samples.append(rms)
+                    if not self.vad.calibrated and skip_initial <= elapsed < calibration_time:
+                        self.vad.calibrate(data)
                         continue
                     
                     # After calibration, set adaptive threshold
-                    if self.noise_floor is None and len(noise_samples) > 0:
-                        # Use median instead of mean to ignore outliers
-                        self.noise_floor = np.median(noise_samples)
-                        # Set threshold to 3x noise floor, capped between 8000-15000
-                        adaptive_threshold = self.noise_floor * 3.0
-                        adaptive_threshold = max(8000, min(adaptive_threshold, 15000))
-                        print(f"🔊 Noise floor: {self.noise_floor:.0f}, Threshold: {adaptive_threshold:.0f}")
-                        self.silence_threshold = adaptive_threshold
+                    if not self.vad.calibrated and self.vad.noise_levels:
+                        self.vad.finish_calibration()
+                        print(f"🔊 Noise floor: {self.vad.noise_floor:.0f}, Threshold: {self.vad.threshold:.0f}")
+                    
+                    # Check for silence
+                    is_speech = self.vad.process(data)
+                    
+                    if self.streamer is not None:
+                        self._update_streamer(is_speech, current_time)
+                    elif self.speculation is not None:
+                        self._update_speculation(is_speech, current_time)
                     
                     # Debug: occasional RMS log
                     if int(elapsed * 4) % 4 == 0:  # log every 0.25s
-                        is_sound = "🗣️" if rms > self.silence_threshold else "🤫"
-                        print(f"{is_sound} RMS={rms:.0f} | {elapsed:.1f}s")
+                        is_sound = "🗣️" if is_speech else "🤫"
+                        print(f"{is_sound} RMS={self.vad.level:.0f} | {elapsed:.1f}s")
                     
                     # Maximum recording time safety
                     if elapsed > max_recording_time:
                         print(f"⏸️  Maximum recording time ({max_recording_time}s) reached - stopping...")
+                        self.tracer.event('endpoint', reason='max_time')
                         self.is_recording = False
                         break
                     
                     # During grace period, don't stop on silence
                     if elapsed < grace_period:
-                        if rms > self.silence_threshold:
+                        if is_speech:
                             has_detected_sound = True
                         self.last_sound_time = current_time
                         continue
                     
                     # Don't stop before minimum recording time
                     if elapsed < min_recording_time:
-                        if rms > self.silence_threshold:
+                        if is_speech:
                             has_detected_sound = True
                             self.last_sound_time = current_time
                         continue
 
                     # Normal silence detection after grace + minimum time
-                    if rms > self.silence_threshold:
+                    if is_speech:
                         has_detected_sound = True
                         self.last_sound_time = current_time
-                    elif has_detected_sound and (current_time - self.last_sound_time > self.silence_duration):
+                    elif has_detected_sound and (current_time - self.last_sound_time > silence_duration):
                         print(f"⏸️  Silence detected after {elapsed:.1f}s - stopping recording...")
+                        self.tracer.event('endpoint', reason='silence')
                         self.is_recording = False
                         break
                         
                 except Exception as e:
                     print(f"⚠️  Recording error: {e}")
+                    stream_failed = True
                     break
+            else:
+                # Loop ended without break: stopped from outside (hotkey/daemon)
+                self.tracer.event('endpoint', reason='manual')
                     
         except Exception as e:
             print(f"❌ Error opening microphone: {e}")
             self.is_recording = False
         finally:
             if self.audio_stream:
-                self.audio_stream.stop_stream()
-                self.audio_stream.close()
-            if self.pyaudio_instance:
-                self.pyaudio_instance.terminate()
+                if isinstance(self.audio_stream, MultiCapture):
+                    self._report_microphones(self.audio_stream)
+                if self.session_warm:
+                    # Keep the device open, the warm capture resumes the pre-roll
+                    self._report_capture_losses(self.audio_stream, loss_base)
+                    self.warm_capture.release(failed=stream_failed)
+                else:
+                    self.audio_stream.stop_stream()
+                    self.audio_stream.close()
+                    self._report_capture_losses(self.audio_stream)
+                self.audio_stream = None
+    
+    def _report_capture_losses(self, stream, base: tuple = (0, 0)) -> None:
+        """
+        Record frames lost during capture (callback mode only).
+        
+        Args:
+            stream: Input stream of the session
+            base: (dropped frames, overflows) of the stream before the session
+        """
+        # Clamped: a failed microphone of a parallel capture takes its counts with it
+        self.dropped_frames = max(0, getattr(stream, 'dropped_frames', 0) - base[0])
+        self.input_overflows = max(0, getattr(stream, 'overflows', 0) - base[1])
+        self.tracer.count('dropped_frames', self.dropped_frames)
+        self.tracer.count('input_overflows', self.input_overflows)
+        if self.dropped_frames or self.input_overflows:
+            print(f"⚠️  Audio lost: {self.dropped_frames} frames dropped, "
+                  f"{self.input_overflows} input overflows")
+    
+    def _report_microphones(self, capture: MultiCapture) -> None:
+        """Log the SNR of each microphone of a parallel capture and the one used."""
+        print("🎙️  Microphone SNR: " + ", ".join(
+            f"{score['name']} {score['snr_db']:.1f} dB" for score in capture.scores()))
+        self.tracer.event('microphone', device=capture.selected.name,
+                          snr_db=round(capture.selected.snr_db, 1), switches=capture.switches)
+    
+    def _update_streamer(self, is_speech: bool, current_time: float) -> None:
+        """
+        Report speech and pauses of the current chunk to the streaming transcriber.
+        
+        Args:
+            is_speech: VAD decision for the chunk
+            current_time: Timestamp of the chunk
+        """
+        if is_speech:
+            self.streamer.mark_speech()
+            self.stream_last_voice = current_time
+            self.stream_pause_marked = False
+        elif (self.stream_last_voice is not None and not self.stream_pause_marked and
+              current_time - self.stream_last_voice >= self.config.get('streaming_pause', 0.4)):
+            self.streamer.mark_pause()
+            self.stream_pause_marked = True
     
-    def _transcribe_with_whisper(self, audio_file: str) -> Optional[str]:
+    def _update_speculation(self, is_speech: bool, current_time: float) -> None:
+        """
+        Start a speculative decode at a short pause and roll it back if speech resumes.
+        
+        Args:
+            is_speech: VAD decision for the chunk
+            current_time: Timestamp of the chunk
+        """
+        if is_speech:
+            self.last_speech_pos = len(self.audio_buffer)
+            self.spec_last_voice = current_time
+            self.spec_pause_handled = False
+            if self.speculation.valid and self.speculation.end < self.last_speech_pos:
+                print("↩️  Speech resumed - discarding speculative transcript")
+                self.speculation.rollback()
+            return
+        
+        if (self.spec_last_voice is None or self.spec_pause_handled or
+                current_time - self.spec_last_voice < self.config.get('speculative_pause', 0.3)):
+            return
+        
+        self.spec_pause_handled = True
+        pcm = self.audio_buffer.view()
+        if self.config.get('trim_silence', True):
+            pcm = self._trim_silence(pcm)
+        # Snapshot: the recording keeps appending to the buffer
+        if self.speculation.launch(bytes(pcm), len(self.audio_buffer)):
+            print("⚡ Pause detected - transcribing speculatively")
+    
+    def _trim_silence(self, pcm: memoryview) -> memoryview:
+        """
+        Cut leading and trailing non-speech before inference.
+        
+        The stream initialization spike, the calibration window and the
+        silence_duration tail are removed, keeping trim_padding seconds of
+        context around the speech. Uses the threshold calibrated by the VAD.
+        
+        Args:
+            pcm: Recorded 16-bit PCM audio
+            
+        Returns:
+            Zero-copy view of the speech part (the input if no speech was found)
+        """
+        import numpy as np  # Sample processing only
+        channels = self.config['channels']
+        rate = self.config['sample_rate']
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        bounds = find_speech_bounds(
+            samples,
+            self.vad.threshold,
+            frame_size=int(0.02 * rate) * channels,
+            skip=0 if self.session_warm else int(0.2 * rate) * channels,  # initialization spike
+        )
+        self.trimmed_seconds = 0.0
+        if bounds is None:
+            print("⚠️  No speech above threshold found, sending untrimmed audio")
+            return pcm
+        
+        padding = int(self.config.get('trim_padding', 0.25) * rate) * channels
+        start = max(0, bounds[0] - padding)
+        end = min(len(samples), bounds[1] + padding)
+        self.trimmed_seconds = (len(samples) - (end - start)) / (rate * channels)
+        print(f"✂️  Trimmed {self.trimmed_seconds:.2f}s of silence "
+              f"({len(samples) / (rate * channels):.2f}s → {(end - start) / (rate * channels):.2f}s)")
+        return pcm[start * 2:end * 2]
+    
+    def _pcm_seconds(self, length: int) -> float:
+        """Duration of length bytes of 16-bit PCM in the configured format."""
+        return length / (2 * self.config['channels'] * self.config['sample_rate'])
+    
+    def _transcribe_pcm(self, pcm, fuzzy: bool = False) -> Optional[str]:
+        """
+        Transcribe raw 16-bit PCM audio, answering repeated clips from the cache.
+        
+        Args:
+            pcm: Audio data in the configured sample rate and channel count
+            fuzzy: Also answer from similar clips (final, VAD-trimmed utterances with speech)
+            
+        Returns:
+            Transcribed text or None if transcription failed
+        """
+        if self.transcript_cache is None:
+            return self._transcribe_uncached(pcm)
+        
+        model = self.config['model_tiers'] if self.model_tiers is not None else self.config['model']
+        if self.config.get('model_quantization'):
+            # A requantized model may decode differently
+            model = f"{model}@{self.config['model_quantization']}"
+        language = self.config.get('language', 'de')
+        text = self.transcript_cache.lookup(pcm, self.config['sample_rate'], model, language, fuzzy=fuzzy)
+        if text is not None:
+            print(f"💾 Transcript cache hit: {text}")
+            self.tracer.event('cache_hit')
+            return text
+        
+        self.used_substitute = False
+        text = self._transcribe_uncached(pcm)
+        # Results of a stand-in model are not cached under the requested one
+        if text and not self.used_substitute:
+            self.transcript_cache.store(pcm, self.config['sample_rate'], model, language, text, fuzzy=fuzzy)
+        return text
+    
+    def _transcribe_uncached(self, pcm) -> Optional[str]:
+        """
+        Transcribe raw 16-bit PCM audio, choosing the model tier if configured.
+        
+        Args:
+            pcm: Audio data in the configured sample rate and channel count
+            
+        Returns:
+            Transcribed text or None if transcription failed
+        """
+        speech_seconds = self._pcm_seconds(len(pcm))
+        if self.model_tiers is None:
+            model = self.config['model']
+            larger = self.config.get('redecode_model') or None
+        else:
+            model = self.model_tiers.choose(speech_seconds)
+            print(f"🎚️  {speech_seconds:.1f}s of speech → model {model}")
+            larger = self.model_tiers.escalate(model)
+        
+        transcript = self._decode_transcript(pcm, model)
+        if larger:
+            transcript = self._refine(pcm, transcript, larger)
+        if transcript is None:
+            return None
+        return transcript.text or None
+    
+    def _refine(self, pcm, transcript: Optional[Transcript], larger: str) -> Optional[Transcript]:
+        """
+        Re-decode what whisper was unsure about with a larger model.
+        
+        With token probabilities only the uncertain words (plus some context)
+        are decoded again and spliced in if the larger model is more certain;
+        mostly uncertain utterances and results without token data or word
+        timestamps are decoded again as a whole. Single words without times
+        are never cut out.
+        
+        Args:
+            pcm: Audio data the transcript was decoded from
+            transcript: First result (None if decoding failed)
+            larger: Model to re-decode with
+            
+        Returns:
+            Improved transcript
+        """
+        speech_seconds = self._pcm_seconds(len(pcm))
+        if transcript is None or not transcript.words:
+            text = transcript.text if transcript is not None else None
+            if self.model_tiers is not None:
+                unreliable = self.model_tiers.needs_redecode(text, speech_seconds)
+            else:
+                unreliable = ModelTierPolicy.confidence(text, speech_seconds) < self.config.get('tier_min_confidence', 0.5)
+            if not unreliable:
+                return transcript
+            print(f"🔁 Low confidence result, re-decoding with {larger}")
+            return self._decode_transcript(pcm, larger) or transcript
+        
+        words = transcript.words
+        threshold = self.config.get('word_min_confidence', 0.4)
+        if not any(word.timed for word in words):
+            # Probabilities without time spans: nothing can be cut out, judge the utterance as a whole
+            if transcript.confidence >= threshold:
+                return transcript
+            print(f"🔁 Low confidence result without word timestamps, re-decoding with {larger}")
+            return self._decode_transcript(pcm, larger) or transcript
+        spans = transcript.low_confidence_spans(threshold)
+        if not spans:
+            return transcript
+        uncertain = sum(words[last].end - words[first].start for first, last in spans)
+        if uncertain > speech_seconds * REDECODE_FULL_SHARE:
+            print(f"🔁 {uncertain:.1f}s of {speech_seconds:.1f}s uncertain, re-decoding with {larger}")
+            return self._decode_transcript(pcm, larger) or transcript
+        
+        frame_bytes = 2 * self.config['channels']
+        # Last span first, so the word indexes of earlier spans stay valid
+        for first, last in reversed(spans):
+            start = max(0.0, words[first].start - REDECODE_CONTEXT_SECONDS)
+            end = min(speech_seconds, words[last].end + REDECODE_CONTEXT_SECONDS)
+            span_text = ''.join(word.text for word in words[first:last + 1]).strip()
+            print(f"🔁 Re-decoding '{span_text}' ({start:.1f}-{end:.1f}s) with {larger}")
+            clip = pcm[int(start * self.config['sample_rate']) * frame_bytes:
+                       int(end * self.config['sample_rate']) * frame_bytes]
+            redone = self._decode_transcript(clip, larger)
+            if redone is None or not any(word.timed for word in redone.words):
+                continue
+            # Words of the context belong to the neighbours, keep only the span's own
+            low, high = words[first].start, words[last].end
+            replacement = [word.shifted(start) for word in redone.words
+                           if word.timed and low <= start + (word.start + word.end) / 2 <= high]
+            old = sum(word.probability for word in words[first:last + 1]) / (last + 1 - first)
+            new = sum(word.probability for word in replacement) / len(replacement) if replacement else 0.0
+            if new > old:
+                print(f"   → '{''.join(word.text for word in replacement).strip()}' "
+                      f"(confidence {old:.2f} → {new:.2f})")
+                transcript = transcript.replace(first, last, replacement)
+                words = transcript.words
+        return transcript
+    
+    def _decode_transcript(self, pcm, model: str) -> Optional[Transcript]:
+        """
+        Transcribe raw 16-bit PCM audio with whisper.cpp without temporary audio files.
+        
+        The resident whisper-server receives the buffer in the request body;
+        whisper-cli reads it from an in-memory file (memfd). With
+        word_confidence, both report token timestamps and probabilities.
+        
+        Args:
+            pcm: Audio data in the configured sample rate and channel count
+            model: Model to decode with
+            
+        Returns:
+            Transcript or None if transcription failed
+        """
+        model = self._resolve_model(model)
+        if model is None:
+            return None
+        self.last_model = model
+        # Scale the timeout with the audio so long recordings are not killed mid-decode
+        timeout = max(60.0, self._pcm_seconds(len(pcm)) * self.config.get('decode_timeout_factor', 3.0))
+        server = self.whisper_servers.get(model)
+        if server is not None and server.is_running():
+            with self.tracer.span('decode', backend='whisper-server', model=model):
+                if not self.config.get('word_confidence', True):
+                    return Transcript.from_text(server.transcribe(
+                        pcm, self.config['sample_rate'], self.config['channels'], timeout=timeout))
+                payload = server.transcribe_verbose(pcm, self.config['sample_rate'], self.config['channels'],
+                                                    timeout=timeout)
+                return Transcript.from_server_json(payload) if payload is not None else None
+        
+        try:
+            save_start = time.perf_counter()
+            with WavHandoff(pcm, self.config['sample_rate'], self.config['channels']) as wav:
+                self.tracer.add_span('save', save_start, time.perf_counter() - save_start, bytes=len(pcm))
+                return self._transcribe_with_whisper(wav.path, pass_fds=wav.pass_fds, model=model,
+                                                     timeout=timeout)
+        except OSError as e:
+            print(f"❌ Could not hand audio to whisper.cpp: {e}")
+            return None
+    
+    def _transcribe_with_whisper(self, audio_file: str, pass_fds: tuple = (),
+                                 model: Optional[str] = None, timeout: float = 60.0) -> Optional[Transcript]:
         """
         Transcribe audio file using whisper.cpp.
         
         Args:
             audio_file: Path to the audio file
+            pass_fds: File descriptors the child must inherit (memfd handoff)
+            model: Model to use (default: the configured model)
+            timeout: Seconds before whisper-cli is killed
             
         Returns:
-            Transcribed text or None if transcription failed
+            Transcript (with words if whisper.cpp wrote its JSON output) or None if transcription failed
         """
         try:
-            whisper_path = self.config['whisper_cpp_path']
-            model_file = self._get_model_path()
-            language = self.config.get('language', 'de')
-            threads = max(1, os.cpu_count() or 1)
-
-            # Build command (use whisper-cli)
-            cmd = [
-                whisper_path,
-                '-m', model_file,
-                '-f', audio_file,
-                '--language', language,
-                '--threads', str(threads),
-                '--no-timestamps'
-            ]
-            print(f"🛠️  Running: {' '.join(cmd)}")
+            with tempfile.TemporaryDirectory(prefix='voice-dictation-', dir=os.environ.get('XDG_RUNTIME_DIR')) as tmp:
+                json_prefix = os.path.join(tmp, 'result') if self.config.get('word_confidence', True) else None
+                decoder = self._decoder_config(model or self.config['model'])
+                cmd = self._whisper_cli_command(audio_file, model, decoder['threads'], json_prefix)
+                print(f"🛠️  Running: {' '.join(cmd)}")
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+                run_start = time.perf_counter()
+                result = self._run_decoder(cmd, decoder, timeout, pass_fds)
+                self._trace_whisper_run(run_start, time.perf_counter() - run_start, result.stderr or '')
 
-            if result.returncode != 0:
-                print("❌ whisper.cpp error")
-                if result.stderr:
-                    print(result.stderr)
-                else:
-                    print(result.stdout)
-                return None
+                if result.returncode != 0:
+                    print("❌ whisper.cpp error")
+                    if result.stderr:
+                        print(result.stderr)
+                    else:
+                        print(result.stdout)
+                    return None
 
-            output = result.stdout.strip()
-            if not output:
-                print("ℹ️  whisper.cpp returned no output")
-                return None
+                output = result.stdout.strip()
+                if not output:
+                    print("ℹ️  whisper.cpp returned no output")
+                    return None
 
-            # Parse lines, ignoring logging prefixes
-            lines = [l.strip() for l in output.splitlines() if l.strip()]
-            text = ' '.join(lines)
-            print(f"🧾 whisper.cpp raw output: {text}")
-            return text if text else None
+                # Parse lines, ignoring segment timestamps (printed when word times are requested)
+                text = plain_text(output)
+                print(f"🧾 whisper.cpp raw output: {text}")
+                if json_prefix and os.path.exists(f"{json_prefix}.json"):
+                    transcript = Transcript.load_cli_json(Path(f"{json_prefix}.json"))
+                    if transcript is not None and transcript.text:
+                        return transcript
+                return Transcript.from_text(text)
         except subprocess.TimeoutExpired:
             print("❌ whisper.cpp timeout")
             return None
@@ -504,66 +1315,319 @@ class VoiceDictation:
             print(f"❌ Transcription error: {e}")
             return None
 
+    def _whisper_cli_command(self, audio_file: str, model: Optional[str], threads: int,
+                             json_prefix: Optional[str] = None) -> list:
+        """
+        Build the whisper-cli command line.
+        
+        Args:
+            audio_file: Path to the audio file
+            model: Model to use (default: the configured model)
+            threads: Decode threads
+            json_prefix: Also write segments with token timestamps and probabilities to <prefix>.json
+            
+        Returns:
+            Command line
+        """
+        cmd = [
+            self.config['whisper_cpp_path'],
+            '-m', self._get_model_path(model),
+            '-f', audio_file,
+            '--language', self.config.get('language', 'de'),
+            '--threads', str(threads),
+        ]
+        if json_prefix:
+            # Token offsets are only computed with timestamps enabled
+            cmd += ['--output-json-full', '--output-file', json_prefix]
+        else:
+            cmd.append('--no-timestamps')
+        return cmd
+    
+    def _decoder_config(self, model: str) -> dict:
+        """
+        Thread count and cores for decoding with a model.
+        
+        Args:
+            model: Model name
+            
+        Returns:
+            Dict with threads and cpus (None = unpinned)
+        """
+        decoder = dict(self.cpu_tuner.config_for(model))
+        if self.config.get('decoder_threads'):
+            decoder['threads'] = int(self.config['decoder_threads'])
+        return decoder
+    
+    def _run_decoder(self, cmd: list, decoder: dict, timeout: float,
+                     pass_fds: tuple = ()) -> subprocess.CompletedProcess:
+        """
+        Run whisper-cli pinned to the decoder cores with the decoder priorities.
+        
+        Args:
+            cmd: Command line
+            decoder: Configuration from _decoder_config
+            timeout: Seconds before the process is killed
+            pass_fds: File descriptors the child must inherit
+            
+        Returns:
+            Completed process with captured output
+            
+        Raises:
+            subprocess.TimeoutExpired: If the decode takes longer than timeout
+        """
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              pass_fds=pass_fds) as process:
+            apply_process_tuning(
+                process.pid,
+                decoder.get('cpus'),
+                nice=self.config.get('decoder_nice', 0),
+                ioprio=self.config.get('decoder_ioprio', 0),
+            )
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    
+    def start_cpu_tuning(self) -> None:
+        """
+        Tune the decoder in the background once the daemon is ready (daemon mode).
+        
+        Sessions decode with the untuned default meanwhile; resident servers
+        are restarted with the measured configuration between sessions.
+        """
+        if not self.config.get('cpu_tuning', True):
+            return
+        
+        def tune() -> None:
+            tuned = self.tune_cpu(background=True)
+            if tuned:
+                with self.reload_lock:
+                    self.retune_models.update(tuned)
+                self._apply_tuning()
+        
+        threading.Thread(target=tune, daemon=True, name='cpu-tuning').start()
+    
+    def _apply_tuning(self) -> None:
+        """Restart resident servers of freshly tuned models, unless a session is running."""
+        with self.reload_lock:
+            if self.active_sessions or not self.retune_models:
+                return
+            models, self.retune_models = self.retune_models, set()
+            restart = [model for model in models if model in self.whisper_servers]
+            if not restart:
+                return
+            print(f"⚙️  Restarting whisper-server with the tuned configuration: {', '.join(restart)}")
+            for model in restart:
+                self.whisper_servers.pop(model).stop()
+            self.start_resident_model()
+    
+    def tune_cpu(self, force: bool = False, background: bool = False) -> list:
+        """
+        Benchmark decoder thread counts and core sets for the configured models.
+        
+        Runs once per machine and model (results are stored); whisper's own
+        timings exclude the model load, so only the decode is compared.
+        
+        Args:
+            force: Measure again even if results exist
+            background: Daemon is serving; measurements pause while a session
+                is running, so neither disturbs the other
+            
+        Returns:
+            Models that were tuned
+        """
+        if not force and not self.config.get('cpu_tuning', True):
+            return []
+        models = self.model_tiers.models if self.model_tiers is not None else [self.config['model']]
+        models = [self._model_variant(model) for model in models]
+        import numpy as np  # Sample processing only
+        # Fixed clip: whisper.cpp's encoder always processes a 30 s window, content barely matters
+        rng = np.random.default_rng(0)
+        pcm = (rng.standard_normal(3 * self.config['sample_rate']) * 300).astype(np.int16).tobytes()
+        
+        tuned = []
+        for model in models:
+            if not force and self.cpu_tuner.is_tuned(model):
+                continue
+            if not self.models.is_installed(model):
+                print(f"⚠️  Model {model} not found, skipping CPU tuning")
+                continue
+            
+            def measure(decoder: dict, model: str = model) -> Optional[float]:
+                while background and self.active_sessions:
+                    time.sleep(0.2)
+                try:
+                    with WavHandoff(pcm, self.config['sample_rate'], 1) as wav:
+                        cmd = self._whisper_cli_command(wav.path, model, decoder['threads'])
+                        start = time.perf_counter()
+                        result = self._run_decoder(cmd, decoder, 120.0, wav.pass_fds)
+                        wall = time.perf_counter() - start
+                except (OSError, subprocess.TimeoutExpired):
+                    return None
+                if result.returncode != 0:
+                    return None
+                timings = {name: float(ms) for name, ms in WHISPER_TIMING_PATTERN.findall(result.stderr or '')}
+                if 'total' in timings and 'load' in timings:
+                    return (timings['total'] - timings['load']) / 1000
+                return wall
+            
+            if self.cpu_tuner.tune(model, measure) is not None:
+                tuned.append(model)
+        return tuned
+    
+    def _trace_whisper_run(self, start: float, wall: float, stderr: str) -> None:
+        """
+        Split a whisper-cli run into spawn, model load and decode spans.
+        
+        Args:
+            start: perf_counter timestamp the process was started
+            wall: Wall time of the run in seconds
+            stderr: whisper-cli stderr containing whisper_print_timings
+        """
+        self.last_whisper_timings = {
+            name: float(ms) for name, ms in WHISPER_TIMING_PATTERN.findall(stderr)
+        }
+        timings = self.last_whisper_timings
+        if 'load' not in timings or 'total' not in timings:
+            self.tracer.add_span('whisper', start, wall)
+            return
+        load = timings['load'] / 1000
+        total = timings['total'] / 1000
+        spawn = max(0.0, wall - total)
+        self.tracer.add_span('whisper_spawn', start, spawn)
+        self.tracer.add_span('model_load', start + spawn, load)
+        self.tracer.add_span('decode', start + spawn + load, total - load)
+    
+    def _postprocess(self, text: Optional[str]) -> Optional[str]:
+        """
+        Remove hallucinated segments and apply spoken punctuation and replacements.
+        
+        Args:
+            text: Raw transcript
+            
+        Returns:
+            Cleaned text, or None if nothing is left
+        """
+        with self.tracer.span('postprocess'):
+            cleaned, removed = self.postprocessor.process(text)
+        for segment in removed:
+            print(f"⚠️  Detected hallucination/noise pattern: '{segment}' - removed")
+        return cleaned
+    
+    def _type_segment(self, text: str) -> None:
+        """
+        Type one committed long-form segment while recording continues.
+        
+        Args:
+            text: Segment transcript
+        """
+        text = self._postprocess(text)
+        if not text:
+            return
+        if not self.segments_typed and self.session_queue is not None:
+            # Earlier queued sessions are typed first
+            self.session_queue.wait_idle()
+        self._type_text(text, separator=' ' if self.segments_typed else '')
+        self.segments_typed += 1
+    
+    def _finish_longform(self) -> None:
+        """Decode and type the last long-form segment."""
+        print(f"⏱️  Audio duration: {self._pcm_seconds(self.captured_bytes):.2f} seconds")
+        print("🔄 Finishing last segment...")
+        self.streamer.finish()
+        self.streamer = None
+        if not self.segments_typed:
+            print("ℹ️  No text recognized")
+    
     def _save_and_transcribe(self) -> None:
         """Save recorded audio frames, transcribe, and type the result."""
-        if not self.audio_frames:
-            print("⚠️  No audio captured. Try setting input_device to 'pulse' or lowering silence_threshold.")
+        if self.longform:
+            self._finish_longform()
             return
         
-        print(f"📊 Captured {len(self.audio_frames)} audio frames")
+        decode = self._take_recording()
+        if decode is not None:
+            self._deliver(decode())
+    
+    def _take_recording(self) -> Optional[Callable[[], Optional[str]]]:
+        """
+        Detach the ended recording from the session state.
         
-        # Calculate total duration
-        bytes_per_frame = 2 * self.config['channels']  # 16-bit = 2 bytes
-        samples_per_frame = 1024
-        total_samples = len(self.audio_frames) * samples_per_frame
-        duration = total_samples / self.config['sample_rate']
-        print(f"⏱️  Audio duration: {duration:.2f} seconds")
+        The audio (copied if sessions are queued, the next one reuses the
+        buffer) and the streaming or speculative decoder move into the
+        returned job, so it can run while the next session records.
         
-        # Save debug wav of last recording
-        try:
-            debug_wav = "/tmp/voice-dictation-last.wav"
-            with wave.open(debug_wav, 'wb') as wf:
-                wf.setnchannels(self.config['channels'])
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(self.config['sample_rate'])
-                wf.writeframes(b''.join(self.audio_frames))
-            print(f"🧪 Saved last recording to {debug_wav}")
-        except Exception as e:
-            print(f"⚠️  Could not save debug wav: {e}")
-
-        # Filter out whisper hallucinations
-        print("🔄 Transcribing with whisper.cpp...")
-
-        # Save audio to temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_audio:
-            temp_path = temp_audio.name
-            
-            # Convert to WAV format
-            with wave.open(temp_path, 'wb') as wf:
-                wf.setnchannels(self.config['channels'])
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(self.config['sample_rate'])
-                wf.writeframes(b''.join(self.audio_frames))
-
-        # Transcribe
-        text = self._transcribe_with_whisper(temp_path)
-
-        # Clean up
-        try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        except Exception:
-            pass
-
-        # Filter out common whisper hallucinations for short/silent audio
+        Returns:
+            Job returning the raw transcript, or None if no audio was captured
+        """
+        streamer, self.streamer = self.streamer, None
+        speculation, self.speculation = self.speculation, None
+        if not len(self.audio_buffer):
+            print("⚠️  No audio captured. Try setting input_device to 'pulse' or lowering silence_threshold.")
+            if streamer is not None:
+                streamer.finish()
+            return None
+        
+        print(f"📊 Captured {self.audio_buffer.chunks} audio frames")
+        print(f"⏱️  Audio duration: {self.audio_buffer.duration():.2f} seconds")
+        
+        # Optional debug wav of last recording, written off the hot path
+        if self.config.get('debug_wav', False):
+            save_wav_async(
+                "/tmp/voice-dictation-last.wav",
+                bytes(self.audio_buffer.view()),
+                self.config['sample_rate'],
+                self.config['channels'],
+            )
+        
+        pcm = self.audio_buffer.view()
+        # Similar-clip matching only for a trimmed utterance that holds speech
+        fuzzy = False
+        if self.config.get('trim_silence', True):
+            trimmed = self._trim_silence(pcm)
+            fuzzy = trimmed is not pcm
+            pcm = trimmed
+        if self.session_queue is not None:
+            pcm = bytes(pcm)
+        last_speech = self.last_speech_pos
+        
+        if streamer is not None:
+            def finish_streaming() -> Optional[str]:
+                # Most segments were decoded during recording, only the tail is left
+                print("🔄 Finishing streaming transcription...")
+                text = streamer.finish()
+                if streamer.lost_samples:
+                    # Segments were decoded without their start: the recording itself is complete
+                    print("🔄 Streaming fell behind, transcribing the whole recording...")
+                    return self._transcribe_pcm(pcm)
+                return text
+            return finish_streaming
+        
+        def transcribe() -> Optional[str]:
+            if speculation is not None:
+                # Pause became the end of the recording: reuse the speculative decode
+                hit, text = speculation.result(last_speech)
+                if hit:
+                    print("⚡ Using speculative transcript")
+                    return text
+            print("🔄 Transcribing with whisper.cpp...")
+            return self._transcribe_pcm(pcm, fuzzy=fuzzy)
+        return transcribe
+    
+    def _deliver(self, text: Optional[str]) -> None:
+        """
+        Post-process and type a session's transcript.
+        
+        Args:
+            text: Raw transcript, None if nothing was recognized
+        """
+        # Filter out whisper hallucinations for short/silent audio
         if text:
-            text_lower = text.lower()
-            hallucinations = ['[musik]', '[music]', '(musik)', '(music)', 
-                            'untertitel', 'subtitle', 'www.', 'amara.org']
-            is_hallucination = any(h in text_lower for h in hallucinations)
-            
-            if is_hallucination:
-                print(f"⚠️  Detected hallucination/noise pattern: '{text}' - ignoring")
+            text = self._postprocess(text)
+            if not text:
                 print("💡 Tip: Speak longer sentences for better recognition")
                 return
             
@@ -571,26 +1635,254 @@ class VoiceDictation:
         else:
             print("ℹ️  No text recognized")
     
+    def _session_attrs(self, mode: str) -> dict:
+        """Trace attributes of the current session."""
+        return {
+            'model': self.last_model,
+            'audio_seconds': round(self._pcm_seconds(self.captured_bytes), 2),
+            'trimmed_seconds': round(self.trimmed_seconds, 2),
+            'mode': mode,
+        }
+    
+    def _queue_transcription(self, mode: str) -> None:
+        """
+        Hand the ended recording to the session queue.
+        
+        Args:
+            mode: Session mode for the trace
+        """
+        decode = self._take_recording()
+        attrs = self._session_attrs(mode)
+        trace = self.tracer.session
+        queued_at = time.perf_counter()
+        
+        def job() -> Optional[str]:
+            with self.tracer.bind(trace):
+                self.tracer.add_span('queue_wait', queued_at, time.perf_counter() - queued_at)
+                text = decode() if decode is not None else None
+            attrs['model'] = self.last_model
+            return text
+        
+        def deliver(text: Optional[str]) -> None:
+            try:
+                with self.tracer.bind(trace):
+                    self._deliver(text)
+                    self.tracer.add_span('transcribe_and_type', queued_at, time.perf_counter() - queued_at)
+                    self.tracer.end_session(**attrs)
+                print("👋 Dictation session complete\n")
+            finally:
+                self._session_finished()
+        
+        ahead = self.session_queue.submit(job, deliver)
+        if ahead:
+            print(f"📥 Queued behind {ahead} session(s), the microphone is free again")
+    
+    def _session_finished(self) -> None:
+        """Count a session as done and apply settings changes that waited for it."""
+        with self.reload_lock:
+            self.active_sessions -= 1
+            idle = not self.active_sessions
+        if idle and self.reload_pending:
+            self.reload_settings()
+        if idle and self.retune_models:
+            self._apply_tuning()
+    
     def run(self) -> None:
-        """Run a single dictation session - record, transcribe, and type."""
+        """
+        Run a single dictation session - record, transcribe, and type.
+        
+        With the session queue running, this returns as soon as the
+        recording has ended and the queue types the transcript.
+        """
+        with self.reload_lock:
+            self.active_sessions += 1
+        queued = False
+        try:
+            queued = self._run_session()
+        finally:
+            if not queued:
+                self._session_finished()
+    
+    def _run_session(self) -> bool:
+        """
+        Session body of run (settings are not reloaded meanwhile).
+        
+        Returns:
+            True if the transcription was handed to the session queue
+        """
         print("\n🎤 Voice Dictation started")
         print("🔴 Recording... (speak now, auto-stops after 2 seconds of silence)")
         
-        # Start recording
+        self.tracer.begin_session()
+        if self.init_duration is not None:
+            # Cold start: process setup before the first session
+            self.tracer.add_span('init', *self.init_duration)
+            self.init_duration = None
+        
+        # Start recording (reset per-session state, the instance may be reused by the daemon)
         self.is_recording = True
-        self.audio_frames = []
+        self.audio_buffer.clear()
+        self.captured_bytes = 0
+        self.session_warm = False
+        self.preroll_chunks = []
+        if self.warm_capture is not None:
+            warm = self.warm_capture.acquire()
+            if warm is not None:
+                self.audio_stream, self.preroll_chunks = warm
+                self.session_warm = True
+                self.tracer.event('preroll', seconds=round(self._pcm_seconds(sum(map(len, self.preroll_chunks))), 2))
+        self.vad.reset()
+        if self.session_warm and self.vad.use_tracked_noise():
+            # Noise floor tracked while idle: no calibration window
+            print(f"🔊 Noise floor: {self.vad.noise_floor:.0f}, Threshold: {self.vad.threshold:.0f} (tracked)")
+        self.longform = self.config.get('longform', False)
+        self.segments_typed = 0
+        if self.config.get('streaming', False) or self.longform:
+            # Partials overlap and change every step: never cached
+            self.streamer = StreamingTranscriber(
+                self._transcribe_uncached,
+                self.config['sample_rate'] * self.config['channels'],
+                step=self.config.get('streaming_step', 1.0),
+                on_commit=self._type_segment if self.longform else None,
+            )
+            self.stream_last_voice = None
+            self.stream_pause_marked = False
+            self.streamer.start()
+        elif self.config.get('speculative', True):
+            self.speculation = SpeculativeDecode(self._transcribe_pcm)
+            self.last_speech_pos = 0
+            self.spec_last_voice = None
+            self.spec_pause_handled = False
         
         # Record audio until silence or stop
-        self._record_audio()
+        with self.tracer.span('record'):
+            self._record_audio()
 
+        mode = 'longform' if self.longform else 'streaming' if self.config.get('streaming', False) else 'batch'
+        # Long-form sessions type while recording and are never queued
+        if self.session_queue is not None and not self.longform:
+            self._queue_transcription(mode)
+            return True
+        
         # Save, transcribe and type the recorded audio
-        self._save_and_transcribe()
+        with self.tracer.span('transcribe_and_type'):
+            self._save_and_transcribe()
         
+        self.tracer.end_session(**self._session_attrs(mode))
         print("👋 Dictation session complete\n")
+        return False
 
 
-def main():
-    """Main entry point."""
+def manage_models(models: ModelManager, action: str, model: str, qtype: str) -> bool:
+    """
+    Run a ``voice-dictation models`` command.
+    
+    Args:
+        models: Model manager
+        action: list, fetch, verify, quantize or remove
+        model: Model the action applies to
+        qtype: Quantization type for quantize
+        
+    Returns:
+        True on success
+    """
+    if action == 'list':
+        print(f"📦 Models in {models.model_dir}:\n")
+        for row in models.list():
+            state = "✅ verified" if row['verified'] else "✅ installed" if row['installed'] else ""
+            size = f"{row['size_mb']} MB" if row['size_mb'] else ""
+            print(f"  {row['name']:<20} {size:>9}  {state}")
+        return True
+    if action == 'fetch':
+        if models.verify(model) is False:
+            print(f"⚠️  {model} does not match its checksum, downloading it again")
+            models.remove(model)
+        return models.install(model)
+    if action == 'verify':
+        ok = models.verify(model)
+        if ok is None:
+            print(f"ℹ️  No checksum recorded for {model}")
+        else:
+            print(f"✅ {model} matches its checksum" if ok else f"❌ {model} is corrupt - fetch it again")
+        return ok is not False
+    if action == 'quantize':
+        try:
+            models.quantize(model, qtype)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            print(f"❌ Quantization failed: {e}")
+            return False
+        print(f"💡 Use it with \"model_quantization\": \"{qtype}\"")
+        return True
+    if models.remove(model):
+        print(f"🗑️  Removed {model}")
+        return True
+    print(f"ℹ️  {model} is not installed")
+    return False
+
+
+def transcribe_files(dictation: VoiceDictation, args: argparse.Namespace) -> bool:
+    """
+    Run ``voice-dictation transcribe``: transcribe recordings on a pool of whisper workers.
+    
+    Args:
+        dictation: Initialized dictation system (configuration, models, post-processing)
+        args: Parsed command line
+        
+    Returns:
+        True if every file was transcribed
+    """
+    config = dictation.config
+    output = BatchOutput(args.format, args.output)
+    files = find_audio_files(args.paths)
+    pending = [(path, root) for path, root in files if args.force or not output.is_done(path, root)]
+    if len(pending) < len(files):
+        print(f"⏭️  Skipping {len(files) - len(pending)} files transcribed before (--force to redo)")
+    if not pending:
+        print("✅ Nothing to transcribe")
+        return True
+    
+    # A batch job may wait for its model, unlike a dictation session
+    model = dictation._model_variant(args.model or config['model'])
+    if not dictation.models.is_installed(model) and not dictation.models.install(model):
+        return False
+    
+    plan = plan_workers(model_memory_mb(config['model_path'], model), jobs=args.jobs, threads=args.threads)
+    server_path = config.get('whisper_server_path') or WhisperServer.find_executable(config['whisper_cpp_path'])
+    if not server_path:
+        print("⚠️  whisper-server not found, every segment loads the model in whisper-cli")
+    print(f"📚 {len(pending)} files, {plan['workers']} workers × {plan['threads']} threads, model {model}")
+    
+    transcriber = BatchTranscriber(
+        config['whisper_cpp_path'],
+        dictation._get_model_path(model),
+        plan,
+        language=config.get('language', 'de'),
+        server_path=server_path,
+        timeout_factor=config.get('decode_timeout_factor', 3.0),
+        nice=config.get('decoder_nice', 0),
+        ioprio=config.get('decoder_ioprio', 0),
+    )
+    if not transcriber.start():
+        print("❌ No whisper worker could be started")
+        return False
+    max_segment = args.max_segment or (10.0 if args.format == 'srt' else 30.0)
+    try:
+        done, failed = transcriber.run(pending, output, max_segment=max_segment,
+                                       postprocess=lambda text: dictation.postprocessor.process(text)[0],
+                                       extra={'model': model, 'language': config.get('language', 'de')})
+    finally:
+        transcriber.stop()
+    print(f"📚 {done} transcribed, {failed} failed")
+    return failed == 0
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Run a command line in this process (launcher.main has handled --stop and the thin client).
+    
+    Args:
+        args: Parsed command line
+    """
     # Check for config file
     config_file = "config.json"
     if not os.path.exists(config_file):
@@ -598,7 +1890,46 @@ def main():
     
     # Create and run dictation system
     dictation = VoiceDictation(config_path=config_file)
-    dictation.run()
+    
+    if args.tune:
+        dictation.tune_cpu(force=True)
+        dictation.close()
+        return
+    
+    if args.command == 'models':
+        ok = manage_models(dictation.models, args.action, args.model or dictation.config['model'], args.type)
+        dictation.close()
+        sys.exit(0 if ok else 1)
+    
+    if args.command == 'transcribe':
+        try:
+            ok = transcribe_files(dictation, args)
+        finally:
+            dictation.close()
+        sys.exit(0 if ok else 1)
+    
+    if args.daemon:
+        dictation.start_resident_model()
+        dictation.start_warm_capture()
+        dictation.start_session_queue()
+        dictation.watch_settings()
+        # First start on this machine: measure while the daemon already serves
+        dictation.start_cpu_tuning()
+        try:
+            DictationDaemon(dictation).serve_forever()
+        finally:
+            dictation.close()
+        return
+    
+    try:
+        dictation.run()
+    finally:
+        dictation.close()
+
+
+def main():
+    """Main entry point."""
+    launcher.main(run)
 
 
 if __name__ == "__main__":
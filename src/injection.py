@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Text injection backends for Voice Dictation
+Insert recognized text at the cursor with the fastest available method
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import List, Optional
+
+# xdotool errors raised before any key event was sent (no X display reachable)
+XDOTOOL_START_ERROR = re.compile(r"Can't open display|Failed creating new xdo instance")
+# wtype error of compositors without the virtual keyboard protocol (GNOME/mutter)
+WTYPE_UNSUPPORTED = re.compile(r"virtual keyboard protocol", re.IGNORECASE)
+
+
+class TextInjector:
+    """Base class for text injection backends."""
+
+    name = 'base'
+
+    def available(self) -> bool:
+        """Return True if the backend can be used in this session."""
+        return False
+
+    def inject(self, text: str) -> bool:
+        """
+        Insert text at the cursor position.
+
+        Args:
+            text: Text to insert
+
+        Returns:
+            True on success, False to fall back to the next backend (only
+            when no text can have been inserted, or it would be duplicated)
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _run(cmd: List[str], input_text: Optional[str] = None, timeout: float = 5.0) -> bool:
+        """Run a helper command and report success."""
+        try:
+            result = subprocess.run(cmd, input=input_text, capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️  {cmd[0]} failed: {e}")
+            return False
+        if result.returncode != 0:
+            print(f"⚠️  {cmd[0]} failed: {result.stderr.strip()}")
+            return False
+        return True
+
+
+def _is_wayland() -> bool:
+    """True inside a Wayland session."""
+    return bool(os.environ.get('WAYLAND_DISPLAY')) or os.environ.get('XDG_SESSION_TYPE') == 'wayland'
+
+
+def _is_x11() -> bool:
+    """True if an X server (or XWayland) is reachable."""
+    return bool(os.environ.get('DISPLAY'))
+
+
+class LazyKeyboardController:
+    """
+    pynput keyboard controller created on first use.
+
+    Importing pynput loads Xlib/evdev bindings and connects to the display,
+    which costs more than the rest of startup; most sessions insert text
+    with wtype or xdotool and never need it.
+    """
+
+    def __init__(self):
+        self.controller = None
+
+    def __getattr__(self, name):
+        if self.controller is None:
+            from pynput.keyboard import Controller
+            self.controller = Controller()
+        return getattr(self.controller, name)
+
+
+class WtypeInjector(TextInjector):
+    """
+    Wayland virtual-keyboard protocol via wtype (full Unicode, one process).
+
+    GNOME's mutter does not implement the protocol; the first rejection is
+    remembered for the process, so later sessions (and the clipboard
+    backend's paste) skip wtype instead of failing on every insertion.
+    """
+
+    name = 'wtype'
+    rejected = False  # The compositor refused the virtual keyboard
+
+    @classmethod
+    def usable(cls) -> bool:
+        """True if wtype is installed and not known to be refused by the compositor."""
+        return _is_wayland() and not cls.rejected and shutil.which('wtype') is not None
+
+    @classmethod
+    def run(cls, args: List[str]) -> bool:
+        """Run wtype with the given arguments, remembering a rejection by the compositor."""
+        if cls.rejected:
+            return False
+        try:
+            result = subprocess.run(['wtype'] + args, capture_output=True, text=True, timeout=5.0)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️  wtype failed: {e}")
+            return False
+        if result.returncode != 0:
+            print(f"⚠️  wtype failed: {result.stderr.strip()}")
+            if WTYPE_UNSUPPORTED.search(result.stderr):
+                print("ℹ️  Compositor has no virtual keyboard, not using wtype again")
+                cls.rejected = True
+            return False
+        return True
+
+    def available(self) -> bool:
+        return self.usable()
+
+    def inject(self, text: str) -> bool:
+        return self.run(['--', text])
+
+
+class XdotoolInjector(TextInjector):
+    """X11 XTest injection via xdotool, all characters in one batched call."""
+
+    name = 'xdotool'
+
+    def available(self) -> bool:
+        return _is_x11() and not _is_wayland() and shutil.which('xdotool') is not None
+
+    def inject(self, text: str) -> bool:
+        try:
+            result = subprocess.run(['xdotool', 'type', '--clearmodifiers', '--delay', '0', '--', text],
+                                    capture_output=True, text=True, timeout=5.0)
+        except OSError as e:
+            print(f"⚠️  xdotool failed: {e}")
+            return False
+        except subprocess.TimeoutExpired:
+            # Killed while typing: a fallback would insert the text a second time
+            print("⚠️  xdotool timed out while typing, text may be incomplete")
+            return True
+        if result.returncode != 0:
+            if XDOTOOL_START_ERROR.search(result.stderr):
+                print(f"⚠️  xdotool failed: {result.stderr.strip()}")
+                return False
+            # Exit code after typing began: part of the text is already in the window
+            print(f"⚠️  xdotool exited with {result.returncode} while typing, text may be incomplete: "
+                  f"{result.stderr.strip()}")
+        return True
+
+
+class YdotoolInjector(TextInjector):
+    """uinput injection via ydotool (works everywhere, needs ydotoold; keymap-based)."""
+
+    name = 'ydotool'
+
+    def available(self) -> bool:
+        return shutil.which('ydotool') is not None
+
+    def inject(self, text: str) -> bool:
+        # uinput sends keycodes, characters missing from the keymap would be mangled
+        if not text.isascii():
+            return False
+        return self._run(['ydotool', 'type', '--key-delay', '0', '--', text])
+
+
+class ClipboardInjector(TextInjector):
+    """Copy the text to the clipboard and paste it with Ctrl+V, then restore the clipboard."""
+
+    name = 'clipboard'
+
+    def __init__(self, settle_delay: float = 0.05, restore_delay: float = 0.3):
+        """
+        Initialize the backend.
+
+        Args:
+            settle_delay: Seconds between copying and pasting, so the clipboard owner is set up
+            restore_delay: Seconds before the previous clipboard content is restored
+        """
+        self.settle_delay = settle_delay
+        self.restore_delay = restore_delay
+
+    def _commands(self):
+        """Return (copy, paste-out) commands for the session type."""
+        if _is_wayland() and shutil.which('wl-copy') and shutil.which('wl-paste'):
+            return ['wl-copy'], ['wl-paste', '--no-newline']
+        if _is_x11() and shutil.which('xclip'):
+            return ['xclip', '-selection', 'clipboard'], ['xclip', '-selection', 'clipboard', '-o']
+        return None, None
+
+    @staticmethod
+    def _paste_command() -> Optional[List[str]]:
+        """
+        Ctrl+V through a tool whose key events reach the focused window.
+
+        Synthetic pynput events are dropped by Wayland compositors, so a
+        paste through them could not be told apart from a lost one.
+        """
+        if WtypeInjector.usable():
+            return ['wtype', '-M', 'ctrl', 'v', '-m', 'ctrl']
+        if _is_x11() and not _is_wayland() and shutil.which('xdotool'):
+            return ['xdotool', 'key', '--clearmodifiers', 'ctrl+v']
+        if shutil.which('ydotool'):
+            # Keycodes: 29 = left Ctrl, 47 = V
+            return ['ydotool', 'key', '29:1', '47:1', '47:0', '29:0']
+        return None
+
+    def available(self) -> bool:
+        return self._commands()[0] is not None and self._paste_command() is not None
+
+    def inject(self, text: str) -> bool:
+        copy_cmd, paste_cmd = self._commands()
+        try:
+            previous = subprocess.run(paste_cmd, capture_output=True, text=True, timeout=1.0)
+            previous_text = previous.stdout if previous.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired):
+            previous_text = None
+
+        if not self._run(copy_cmd, input_text=text):
+            return False
+        time.sleep(self.settle_delay)
+        paste = self._paste_command()
+        if paste[0] == 'wtype':
+            pasted = WtypeInjector.run(paste[1:])
+            if not pasted and WtypeInjector.rejected and self._paste_command() is not None:
+                # Refused before any key event: paste with the next tool instead
+                pasted = self._run(self._paste_command())
+        else:
+            pasted = self._run(paste)
+
+        if previous_text is not None:
+            # Restore after the target application has read the clipboard
+            def _restore() -> None:
+                time.sleep(self.restore_delay)
+                self._run(copy_cmd, input_text=previous_text)
+
+            threading.Thread(target=_restore, daemon=True).start()
+        return pasted
+
+
+class PynputInjector(TextInjector):
+    """Per-character key events via pynput (slow, last resort)."""
+
+    name = 'pynput'
+
+    def __init__(self, keyboard_controller):
+        """
+        Initialize the backend.
+
+        Args:
+            keyboard_controller: pynput keyboard controller
+        """
+        self.keyboard_controller = keyboard_controller
+
+    def available(self) -> bool:
+        return self.keyboard_controller is not None
+
+    def inject(self, text: str) -> bool:
+        try:
+            self.keyboard_controller.type(text)
+        except Exception as e:
+            print(f"⚠️  pynput failed: {e}")
+            return False
+        return True
+
+
+# Fallback order for 'auto': native batched injection first, clipboard, then pynput
+AUTO_ORDER = ['wtype', 'xdotool', 'ydotool', 'clipboard', 'pynput']
+
+
+def create_injectors(preference: str, keyboard_controller) -> List[TextInjector]:
+    """
+    Build the ordered list of usable injection backends.
+
+    Args:
+        preference: 'auto', one backend name, or a comma separated list of names
+        keyboard_controller: pynput keyboard controller (for the pynput fallback)
+
+    Returns:
+        Available backends in the order they should be tried
+    """
+    backends = {
+        'wtype': WtypeInjector(),
+        'xdotool': XdotoolInjector(),
+        'ydotool': YdotoolInjector(),
+        'clipboard': ClipboardInjector(),
+        'pynput': PynputInjector(keyboard_controller),
+    }
+    preference = (preference or 'auto').lower()
+    if preference == 'auto':
+        names = AUTO_ORDER
+    else:
+        names = [name.strip() for name in preference.split(',') if name.strip()]
+        # Always keep pynput as final fallback
+        if 'pynput' not in names:
+            names.append('pynput')
+
+    injectors = []
+    for name in names:
+        backend = backends.get(name)
+        if backend is None:
+            print(f"⚠️  Unknown injection backend '{name}'")
+        elif backend.available():
+            injectors.append(backend)
+    return injectors
+
+
+def inject_text(injectors: List[TextInjector], text: str) -> Optional[str]:
+    """
+    Insert text with the first backend that succeeds.
+
+    A backend reports failure only if it could not start typing; one that
+    failed halfway is not followed by another, which would repeat the text.
+
+    Args:
+        injectors: Backends in fallback order
+        text: Text to insert
+
+    Returns:
+        Name of the backend that inserted the text, or None if all failed
+    """
+    for injector in injectors:
+        if injector.inject(text):
+            return injector.name
+    return None
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Command line entry point for Voice Dictation
+Hands the hotkey to a running daemon before numpy, PyAudio or GObject are imported
+"""
+
+import argparse
+from typing import Callable, Optional
+
+from daemon import send_command
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the voice-dictation command line parser."""
+    parser = argparse.ArgumentParser(description="Voice dictation for Linux using whisper.cpp")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run as resident daemon with the whisper model pre-loaded")
+    parser.add_argument('--no-daemon', action='store_true',
+                        help="always run the session in this process, even if a daemon is running")
+    parser.add_argument('--stop', action='store_true',
+                        help="stop the running daemon")
+    parser.add_argument('--tune', action='store_true',
+                        help="benchmark decoder thread counts and core sets for this machine and exit")
+    subparsers = parser.add_subparsers(dest='command')
+    models_parser = subparsers.add_parser('models', help="list, fetch, verify, quantize or remove whisper models")
+    models_parser.add_argument('action', choices=['list', 'fetch', 'verify', 'quantize', 'remove'])
+    models_parser.add_argument('model', nargs='?', help="model name, e.g. base or base-q5_1")
+    models_parser.add_argument('--type', default='q5_1',
+                               help="quantization type for 'quantize' (default: q5_1)")
+    transcribe_parser = subparsers.add_parser('transcribe', help="transcribe audio files and directories of recordings")
+    transcribe_parser.add_argument('paths', nargs='+', help="audio files or directories (searched recursively)")
+    transcribe_parser.add_argument('-o', '--output', help="directory for the transcripts (default: next to the "
+                                   "recordings, transcripts.jsonl in the current directory)")
+    transcribe_parser.add_argument('-f', '--format', choices=['txt', 'jsonl', 'srt'], default='txt',
+                                   help="transcript format (default: txt)")
+    transcribe_parser.add_argument('-j', '--jobs', type=int,
+                                   help="whisper workers (default: as many as cores and memory allow)")
+    transcribe_parser.add_argument('--threads', type=int, help="decode threads per worker")
+    transcribe_parser.add_argument('--model', help="model to use (default: the configured model)")
+    transcribe_parser.add_argument('--max-segment', type=float, metavar='SECONDS',
+                                   help="longest segment (default: 30, 10 for srt)")
+    transcribe_parser.add_argument('--force', action='store_true',
+                                   help="transcribe files that already have a transcript again")
+    return parser
+
+
+def main(run: Optional[Callable[[argparse.Namespace], None]] = None) -> None:
+    """
+    Main entry point.
+
+    The thin-client path (daemon running) only needs the standard library;
+    everything else is handed to ``dictate.run``, imported on demand.
+
+    Args:
+        run: In-process runner (default: dictate.run)
+    """
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.command == 'models' and args.action == 'remove' and not args.model:
+        parser.error("models remove needs a model name")
+
+    if args.stop:
+        reply = send_command('quit')
+        print("👋 Daemon stopped" if reply else "ℹ️  No daemon running")
+        return
+
+    # Thin client: hand the session to a running daemon
+    if not args.daemon and not args.no_daemon and not args.tune and args.command is None:
+        reply = send_command('dictate')
+        if reply:
+            print(f"📨 Daemon: {reply}")
+            return
+
+    if run is None:
+        from dictate import run
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Model management for Voice Dictation
+Lists, fetches, verifies and quantizes ggml whisper models without blocking dictation
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_MODEL_SOURCE = 'https://huggingface.co/ggerganov/whisper.cpp/resolve/main'
+
+MANIFEST_NAME = 'voice-dictation-models.json'
+
+# Official models, smallest first (approximate download size in MB)
+KNOWN_MODELS = {
+    'tiny': 75,
+    'tiny.en': 75,
+    'base': 142,
+    'base.en': 142,
+    'small': 466,
+    'small.en': 466,
+    'medium': 1500,
+    'medium.en': 1500,
+    'large-v1': 2900,
+    'large-v2': 2900,
+    'large-v3': 2900,
+    'large-v3-turbo': 1500,
+}
+
+# ggml quantization types understood by whisper.cpp's quantize tool
+QUANTIZATION_TYPES = ('q4_0', 'q4_1', 'q5_0', 'q5_1', 'q8_0')
+
+QUANTIZED_PATTERN = re.compile(r'^(?P<base>.+)-(?P<qtype>q\d_\d)$')
+
+CHUNK_SIZE = 1024 * 1024
+
+RETRY_SECONDS = 300.0  # A failed automatic fetch is retried after this long
+
+
+def split_model_name(model: str) -> tuple:
+    """Split ``base-q5_1`` into (``base``, ``q5_1``); unquantized models give (model, None)."""
+    match = QUANTIZED_PATTERN.match(model)
+    return (match.group('base'), match.group('qtype')) if match else (model, None)
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelManager:
+    """
+    Installed ggml models in one directory, with a manifest of verified checksums.
+
+    Downloads and conversions run in background threads; sessions ask
+    ``resolve`` for a model and get an installed substitute (or None) while
+    the requested one is still being fetched.
+    """
+
+    def __init__(self, model_dir: str, source: str = DEFAULT_MODEL_SOURCE,
+                 whisper_cli_path: Optional[str] = None, auto_download: bool = True,
+                 allow_unverified: bool = False):
+        """
+        Initialize the manager.
+
+        Args:
+            model_dir: Directory holding the ggml-<model>.bin files
+            source: Base URL, file:// URL or local directory models are fetched from
+            whisper_cli_path: whisper-cli executable (the quantize tool is looked up next to it)
+            auto_download: Fetch missing models in the background when they are requested
+            allow_unverified: Accept downloads no checksum is published for
+                (neither in SHA256SUMS nor as X-Linked-Etag)
+        """
+        self.model_dir = Path(model_dir)
+        self.source = source or DEFAULT_MODEL_SOURCE
+        self.whisper_cli_path = whisper_cli_path
+        self.auto_download = auto_download
+        self.allow_unverified = allow_unverified
+        self.manifest_path = self.model_dir / MANIFEST_NAME
+        self.lock = threading.Lock()
+        self.jobs: Dict[str, threading.Thread] = {}
+        self.failed: Dict[str, float] = {}  # Model -> time of the last failed fetch (monotonic)
+        self.checksums = None  # SHA256SUMS of the source, loaded on first use
+
+    # Paths and state
+
+    def path(self, model: str) -> Path:
+        """File of a model (whether installed or not)."""
+        return self.model_dir / f"ggml-{model}.bin"
+
+    def is_installed(self, model: str) -> bool:
+        """True if the model file exists."""
+        return self.path(model).is_file()
+
+    def installed(self) -> List[str]:
+        """Names of all installed models."""
+        return sorted(path.name[len('ggml-'):-len('.bin')] for path in self.model_dir.glob('ggml-*.bin'))
+
+    def _load_manifest(self) -> dict:
+        """Read the manifest (empty if missing or corrupt)."""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, model: str, entry: Optional[dict]) -> None:
+        """
+        Add or replace a manifest entry (None removes it).
+
+        Called after the model file is in place, so a manifest that cannot
+        be written only costs the later ``verify``, not the install.
+        """
+        with self.lock:
+            manifest = self._load_manifest()
+            if entry is None:
+                manifest.pop(model, None)
+            else:
+                manifest[model] = entry
+            tmp_path = self.manifest_path.with_suffix('.tmp')
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, indent=2)
+                os.replace(tmp_path, self.manifest_path)
+            except OSError as e:
+                print(f"⚠️  Could not update model manifest {self.manifest_path}: {e}")
+
+    def list(self) -> List[dict]:
+        """
+        Describe known and installed models.
+
+        Returns:
+            Dicts with name, installed, size_mb, verified and fetching
+        """
+        manifest = self._load_manifest()
+        names = list(KNOWN_MODELS) + [name for name in self.installed() if name not in KNOWN_MODELS]
+        rows = []
+        for name in names:
+            installed = self.is_installed(name)
+            size = self.path(name).stat().st_size / (1024 * 1024) if installed else KNOWN_MODELS.get(name)
+            rows.append({
+                'name': name,
+                'installed': installed,
+                'size_mb': round(size) if size else None,
+                'verified': installed and manifest.get(name, {}).get('verified', False),
+                'fetching': self.is_fetching(name),
+            })
+        return rows
+
+    # Resolution for sessions
+
+    def resolve(self, model: str) -> Optional[str]:
+        """
+        Return the model to decode with right now, never waiting for a download.
+
+        If the model is missing it is fetched in the background and the
+        closest installed model is used meanwhile.
+
+        Args:
+            model: Requested model
+
+        Returns:
+            Installed model name, or None if no model is installed at all
+        """
+        if self.is_installed(model):
+            return model
+        failed = self.failed.get(model)
+        if self.auto_download and (failed is None or time.monotonic() - failed > RETRY_SECONDS):
+            self.fetch_async(model)
+        substitute = self.substitute(model)
+        if substitute:
+            print(f"⏳ Model {model} not installed yet, using {substitute} meanwhile")
+        return substitute
+
+    def substitute(self, model: str) -> Optional[str]:
+        """Installed model closest in size to the requested one (smaller preferred)."""
+        base, _ = split_model_name(model)
+        order = list(KNOWN_MODELS)
+        installed = self.installed()
+        # Same model in another quantization first
+        for name in installed:
+            if split_model_name(name)[0] == base:
+                return name
+        if base not in order:
+            return installed[0] if installed else None
+        position = order.index(base)
+        ranked = sorted(
+            (name for name in installed if split_model_name(name)[0] in order),
+            key=lambda name: (order.index(split_model_name(name)[0]) > position,
+                              abs(order.index(split_model_name(name)[0]) - position)),
+        )
+        return ranked[0] if ranked else None
+
+    def prefetch(self, model: str) -> None:
+        """Ask the kernel to read a model into the page cache ahead of the first load."""
+        try:
+            fd = os.open(self.path(model), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except (OSError, AttributeError):
+            pass
+        finally:
+            os.close(fd)
+
+    # Background fetching
+
+    def is_fetching(self, model: str) -> bool:
+        """True while a fetch or conversion of the model runs."""
+        job = self.jobs.get(model)
+        return job is not None and job.is_alive()
+
+    def fetch_async(self, model: str, on_done: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Fetch (or quantize) a model in a background thread, once.
+
+        Args:
+            model: Model to install
+            on_done: Called with the model name after a successful install
+        """
+        with self.lock:
+            if self.is_fetching(model):
+                return
+            job = threading.Thread(target=self._fetch_job, args=(model, on_done), daemon=True)
+            self.jobs[model] = job
+        print(f"📥 Fetching model {model} in the background...")
+        job.start()
+
+    def _fetch_job(self, model: str, on_done: Optional[Callable[[str], None]]) -> None:
+        """Worker thread of fetch_async."""
+        if self.install(model) and on_done is not None:
+            on_done(model)
+
+    def install(self, model: str) -> bool:
+        """
+        Install a model: quantize locally if possible, download otherwise.
+
+        Args:
+            model: Model name (e.g. ``base`` or ``base-q5_1``)
+
+        Returns:
+            True if the model is installed and verified or recorded
+        """
+        if self.is_installed(model):
+            return True
+        base, qtype = split_model_name(model)
+        try:
+            if qtype and self.is_installed(base) and self.quantizer():
+                self.quantize(base, qtype)
+            else:
+                self.download(model)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            self.failed[model] = time.monotonic()
+            print(f"❌ Could not install model {model}: {e}")
+            return False
+        self.failed.pop(model, None)
+        return True
+
+    def _expected_checksum(self, model: str) -> Optional[str]:
+        """SHA-256 of the model listed in the source's SHA256SUMS, if there is one."""
+        if self.checksums is None:
+            self.checksums = {}
+            try:
+                with self._open_source('SHA256SUMS') as response:
+                    for line in response.read().decode('utf-8').splitlines():
+                        parts = line.split()
+                        if len(parts) == 2:
+                            self.checksums[parts[1].lstrip('*')] = parts[0].lower()
+            except OSError:  # URLError included
+                pass
+        return self.checksums.get(self.path(model).name)
+
+    def _source_location(self, name: str) -> str:
+        """URL or path of a file in the source."""
+        return self.source.rstrip('/') + '/' + name
+
+    def _open_source(self, name: str, redirect_headers: Optional[dict] = None):
+        """
+        Open a file of the source (local directory, file:// or HTTP(S) URL).
+
+        Args:
+            name: File name
+            redirect_headers: Receives Hugging Face's X-Linked-Etag (the file's
+                SHA-256), which is only sent with the redirect to the CDN
+        """
+        location = self._source_location(name)
+        if '://' not in location:
+            return open(location, 'rb')
+        import urllib.request  # Only needed for downloads, not imported at startup
+
+        class RedirectHandler(urllib.request.HTTPRedirectHandler):
+            def redirect_request(self, req, fp, code, msg, headers, newurl):
+                if redirect_headers is not None and headers.get('X-Linked-Etag'):
+                    redirect_headers.setdefault('X-Linked-Etag', headers['X-Linked-Etag'])
+                return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+        opener = urllib.request.build_opener(RedirectHandler())
+        request = urllib.request.Request(location, headers={'User-Agent': 'voice-dictation'})
+        return opener.open(request, timeout=30)
+
+    def download(self, model: str) -> Path:
+        """
+        Download a model into place, verifying size and checksum.
+
+        The file is written to ``.part`` (preallocated, so it is stored
+        contiguously for fast loading), fsynced and renamed atomically.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Path of the installed model
+
+        Raises:
+            ValueError: If the download is truncated, the checksum does not
+                match or none is published and unverified models are not allowed
+        """
+        name = self.path(model).name
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        target = self.path(model)
+        part = target.with_name(name + '.part')
+        redirect_headers = {}
+        digest = hashlib.sha256()
+        received = 0
+        start = time.monotonic()
+
+        try:
+            with self._open_source(name, redirect_headers) as response, open(part, 'wb') as out:
+                headers = getattr(response, 'headers', None)
+                length = int(headers.get('Content-Length') or 0) if headers else os.fstat(response.fileno()).st_size
+                if headers and 'X-Linked-Etag' in headers:
+                    redirect_headers.setdefault('X-Linked-Etag', headers['X-Linked-Etag'])
+                if length:
+                    try:
+                        os.posix_fallocate(out.fileno(), 0, length)
+                    except (OSError, AttributeError):
+                        pass
+                for block in iter(lambda: response.read(CHUNK_SIZE), b''):
+                    out.write(block)
+                    digest.update(block)
+                    received += len(block)
+                out.truncate(received)
+                out.flush()
+                os.fsync(out.fileno())
+
+            if length and received != length:
+                raise ValueError(f"download truncated ({received} of {length} bytes)")
+            checksum = digest.hexdigest()
+            expected = self._expected_checksum(model)
+            if expected is None and 'X-Linked-Etag' in redirect_headers:
+                etag = redirect_headers['X-Linked-Etag'].strip('"').lower()
+                expected = etag if re.fullmatch(r'[0-9a-f]{64}', etag) else None
+            if expected is not None and checksum != expected:
+                raise ValueError(f"checksum mismatch (expected {expected[:12]}…, got {checksum[:12]}…)")
+            if expected is None and not self.allow_unverified:
+                raise ValueError(f"no checksum published for {name} (add SHA256SUMS to the source "
+                                 f"or set model_allow_unverified)")
+        except (OSError, ValueError):
+            part.unlink(missing_ok=True)
+            raise
+
+        os.replace(part, target)
+        self._record(model, {
+            'sha256': checksum,
+            'size': received,
+            'source': self._source_location(name),
+            'verified': expected is not None,
+            'installed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        })
+        if expected is None:
+            print(f"⚠️  Model {model} installed UNVERIFIED: {self._source_location(name)} publishes no "
+                  f"checksum, its integrity is unknown (model_allow_unverified is set)")
+        print(f"✅ Model {model} installed ({received / (1024 * 1024):.0f} MB in "
+              f"{time.monotonic() - start:.0f}s, {'verified' if expected is not None else 'unverified'})")
+        return target
+
+    def verify(self, model: str) -> Optional[bool]:
+        """
+        Check an installed model against the checksum recorded at install time.
+
+        Returns:
+            True if it matches, False if it is corrupt, None if nothing was recorded
+        """
+        entry = self._load_manifest().get(model)
+        if not self.is_installed(model) or not entry or 'sha256' not in entry:
+            return None
+        return file_sha256(self.path(model)) == entry['sha256']
+
+    def remove(self, model: str) -> bool:
+        """Delete an installed model and its manifest entry."""
+        try:
+            self.path(model).unlink()
+        except OSError:
+            return False
+        self._record(model, None)
+        return True
+
+    # Quantization
+
+    def quantizer(self) -> Optional[str]:
+        """Locate whisper.cpp's quantize tool."""
+        directories = [os.path.dirname(self.whisper_cli_path)] if self.whisper_cli_path else []
+        directories += [os.path.expanduser('~/.local/bin'), '/usr/bin', '/usr/local/bin']
+        for directory in directories:
+            for name in ('whisper-quantize', 'quantize'):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path) and os.access(path, os.X_OK):
+                    return path
+        return None
+
+    def quantize(self, model: str, qtype: str) -> Path:
+        """
+        Convert an installed model to a quantized ggml variant (``<model>-<qtype>``).
+
+        Args:
+            model: Installed unquantized model
+            qtype: Quantization type (q4_0, q4_1, q5_0, q5_1, q8_0)
+
+        Returns:
+            Path of the quantized model
+
+        Raises:
+            ValueError: If the type is unknown or the tool is missing
+            subprocess.CalledProcessError: If the conversion fails
+        """
+        if qtype not in QUANTIZATION_TYPES:
+            raise ValueError(f"unknown quantization '{qtype}' (use {', '.join(QUANTIZATION_TYPES)})")
+        tool = self.quantizer()
+        if tool is None:
+            raise ValueError("whisper.cpp quantize tool not found")
+        quantized = f"{model}-{qtype}"
+        target = self.path(quantized)
+        part = target.with_name(target.name + '.part')
+        print(f"🗜️  Quantizing {model} → {quantized}...")
+        try:
+            subprocess.run([tool, str(self.path(model)), str(part), qtype],
+                           check=True, capture_output=True, text=True)
+            os.replace(part, target)
+        finally:
+            part.unlink(missing_ok=True)
+        self._record(quantized, {
+            'sha256': file_sha256(target),
+            'size': target.stat().st_size,
+            'source': f'quantized from {model}',
+            'verified': True,
+            'installed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        })
+        print(f"✅ Model {quantized} installed ({target.stat().st_size / (1024 * 1024):.0f} MB)")
+        return target
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Model tiering for Voice Dictation
+Routes each utterance to a fast or an accurate whisper model
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Rough resident memory of whisper.cpp per model (MB), used when the file is missing
+MODEL_MEMORY_MB = {
+    'tiny': 125,
+    'base': 210,
+    'small': 600,
+    'medium': 1700,
+    'large': 3300,
+}
+
+# Size of a quantized model relative to the f16 file, by quantization bits
+QUANTIZED_SIZE_FACTOR = {'4': 0.33, '5': 0.4, '8': 0.55}
+
+
+def parse_tiers(spec: str) -> List[Tuple[str, Optional[float]]]:
+    """
+    Parse a tier specification like ``"tiny:4,base:12,small"``.
+
+    Each entry is a model name with the longest speech duration (seconds) it
+    handles; the last entry may omit the limit and takes everything longer.
+
+    Args:
+        spec: Comma separated ``model[:max_seconds]`` entries
+
+    Returns:
+        List of (model, max_seconds) sorted by max_seconds, None meaning unlimited
+    """
+    tiers = []
+    for entry in (spec or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, _, limit = entry.partition(':')
+        try:
+            max_seconds = float(limit) if limit.strip() else None
+        except ValueError:
+            print(f"⚠️  Invalid model tier '{entry}', ignoring")
+            continue
+        tiers.append((model.strip(), max_seconds))
+    tiers.sort(key=lambda tier: float('inf') if tier[1] is None else tier[1])
+    return tiers
+
+
+def model_memory_mb(model_dir: str, model: str) -> float:
+    """Estimate the memory a loaded model needs from its ggml file size."""
+    return model_file_memory_mb(Path(model_dir) / f"ggml-{model}.bin", model)
+
+
+def model_file_memory_mb(model_file: Path, model: str) -> float:
+    """
+    Estimate the memory a loaded model file needs.
+
+    Args:
+        model_file: ggml file that will be loaded
+        model: Its model name (``base``, ``base-q5_1``), for the estimate of files not on disk yet
+
+    Returns:
+        Memory in MB
+    """
+    try:
+        return Path(model_file).stat().st_size / (1024 * 1024)
+    except OSError:
+        pass
+    size = MODEL_MEMORY_MB.get(model.split('.')[0].split('-')[0], 500)
+    quantized = re.search(r'-q(\d)_\d$', model)
+    if quantized:
+        size *= QUANTIZED_SIZE_FACTOR.get(quantized.group(1), 1.0)
+    return size
+
+
+def cpu_load() -> float:
+    """One-minute load average per core (1.0 = all cores busy)."""
+    try:
+        return os.getloadavg()[0] / max(1, os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+
+class ModelTierPolicy:
+    """Pick a model by speech duration and CPU load, escalate low-confidence results."""
+
+    def __init__(self, tiers: List[Tuple[str, Optional[float]]], max_load: float = 0.8,
+                 min_confidence: float = 0.5, redecode: bool = True):
+        """
+        Initialize the policy.
+
+        Args:
+            tiers: (model, max_seconds) pairs from parse_tiers, smallest model first
+            max_load: Per-core load above which the next smaller tier is used
+            min_confidence: Results below this confidence are re-decoded
+            redecode: Re-decode low-confidence results with the next larger tier
+        """
+        self.tiers = tiers
+        self.models = [model for model, _ in tiers]
+        self.max_load = max_load
+        self.min_confidence = min_confidence
+        self.redecode = redecode
+
+    def choose(self, speech_seconds: float) -> str:
+        """
+        Select the model for an utterance.
+
+        Args:
+            speech_seconds: Duration of the (trimmed) speech
+
+        Returns:
+            Model name
+        """
+        index = len(self.tiers) - 1
+        for i, (_, max_seconds) in enumerate(self.tiers):
+            if max_seconds is None or speech_seconds <= max_seconds:
+                index = i
+                break
+        # Busy CPU: a larger model would be slower than the user is willing to wait
+        if index > 0 and cpu_load() > self.max_load:
+            index -= 1
+        return self.models[index]
+
+    def escalate(self, model: str) -> Optional[str]:
+        """Return the next larger tier after model, or None."""
+        if not self.redecode or model not in self.models:
+            return None
+        index = self.models.index(model)
+        return self.models[index + 1] if index + 1 < len(self.models) else None
+
+    @staticmethod
+    def confidence(text: Optional[str], speech_seconds: float) -> float:
+        """
+        Estimate how trustworthy a transcript is from its text alone.
+
+        Used when whisper.cpp reported no token probabilities; the estimate
+        uses symptoms of failed decodes: no text, an implausible speaking
+        rate and repetition loops.
+
+        Args:
+            text: Transcript (None if decoding failed)
+            speech_seconds: Duration of the decoded speech
+
+        Returns:
+            Confidence between 0.0 and 1.0
+        """
+        if not text or not text.strip():
+            return 0.0
+        words = re.findall(r'\w+', text.lower())
+        if not words:
+            return 0.0
+        score = 1.0
+
+        # Normal speech is roughly 1.5-4 words per second
+        rate = len(words) / max(speech_seconds, 0.5)
+        if rate < 0.5 or rate > 6.0:
+            score -= 0.4
+
+        # Repetition loops ("danke danke danke ...") keep few distinct words
+        if len(words) >= 6 and len(set(words)) / len(words) < 0.4:
+            score -= 0.6
+
+        # Bracketed annotations such as [Musik] instead of words
+        if re.fullmatch(r'\s*[\[(].*[\])]\s*', text):
+            score -= 0.5
+        return max(0.0, score)
+
+    def needs_redecode(self, text: Optional[str], speech_seconds: float) -> bool:
+        """True if the result is below the confidence threshold."""
+        return self.confidence(text, speech_seconds) < self.min_confidence
+
+    def warm_models(self, model_dir: str, budget_mb: float,
+                    resolve: Optional[Callable[[str], Tuple[str, Path]]] = None) -> List[str]:
+        """
+        Select the models to keep resident within a memory budget.
+
+        Smaller tiers are preferred since they serve the most utterances.
+
+        Args:
+            model_dir: Directory containing the ggml model files
+            budget_mb: Memory available for resident models
+            resolve: Maps a tier to the (model, file) that is really loaded,
+                e.g. its quantized variant (default: ggml-<tier>.bin in model_dir)
+
+        Returns:
+            Models that fit into the budget, smallest first
+        """
+        warm = []
+        used = 0.0
+        for model in self.models:
+            if resolve is not None:
+                variant, model_file = resolve(model)
+                size = model_file_memory_mb(model_file, variant)
+            else:
+                size = model_memory_mb(model_dir, model)
+            if used + size > budget_mb:
+                continue
+            warm.append(model)
+            used += size
+        return warm
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Parallel multi-microphone capture for Voice Dictation
+Records several input devices at once and feeds the one with the best SNR to the recognizer
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_devices import PROBE_RATES
+from capture import CallbackCapture
+from resample import PolyphaseResampler
+
+
+class MicSource:
+    """One input device: callback capture, resampler and level statistics."""
+
+    def __init__(self, device: dict, channels: int, out_rate: int, window_chunks: int):
+        """
+        Initialize the source (the stream is opened by ``open``).
+
+        Args:
+            device: Device entry (index, name, native_rate)
+            channels: Number of channels to record
+            out_rate: Rate the audio is converted to
+            window_chunks: Number of chunk levels the SNR is computed from
+        """
+        self.device = device
+        self.name = device['name']
+        self.channels = channels
+        self.out_rate = out_rate
+        self.capture = None
+        self.rate = None  # Capture rate the device was opened with
+        self.resampler = None
+        self.capture_frames = 0  # Frames read per chunk at the capture rate
+        self.pending = bytearray()
+        self.levels = deque(maxlen=window_chunks)
+
+    def open(self, pa, frames_per_buffer: int, buffer_seconds: float, cpus: Optional[List[int]] = None) -> int:
+        """
+        Open the device at its native rate, falling back to the probe rates.
+
+        Args:
+            pa: Initialized PyAudio instance
+            frames_per_buffer: Frames per chunk at the output rate
+            buffer_seconds: Ring buffer length of the callback capture
+            cpus: CPUs reserved for capture
+
+        Returns:
+            Capture rate in Hz
+
+        Raises:
+            OSError: If the device cannot be opened at any rate
+        """
+        import pyaudio  # Only when multi-mic capture opens its devices
+        rates = [self.device.get('native_rate')] + PROBE_RATES
+        last_error = None
+        for rate in dict.fromkeys(rate for rate in rates if rate):
+            capture_frames = -(-frames_per_buffer * rate // self.out_rate)
+            try:
+                self.capture = CallbackCapture(self.channels, rate, seconds=buffer_seconds, cpus=cpus).open(
+                    pa,
+                    format=pyaudio.paInt16,
+                    channels=self.channels,
+                    rate=rate,
+                    input=True,
+                    input_device_index=self.device['index'],
+                    frames_per_buffer=capture_frames,
+                )
+            except Exception as e:
+                last_error = e
+                continue
+            self.rate = rate
+            self.resampler = PolyphaseResampler(rate, self.out_rate, self.channels)
+            self.capture_frames = capture_frames
+            return rate
+        raise OSError(f"cannot open {self.name}: {last_error}")
+
+    def read(self, chunk_bytes: int) -> bytes:
+        """Read one chunk at the output rate and record its level."""
+        while len(self.pending) < chunk_bytes:
+            data = self.capture.read(self.capture_frames)
+            self.pending += self.resampler.process(data)
+        chunk = bytes(self.pending[:chunk_bytes])
+        del self.pending[:chunk_bytes]
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        self.levels.append(float(np.sqrt(np.dot(samples, samples) / max(1, len(samples)))))
+        return chunk
+
+    @property
+    def noise_floor(self) -> float:
+        """Quiet level of the recent audio (10th percentile of chunk RMS)."""
+        return max(1.0, float(np.percentile(self.levels, 10))) if self.levels else 1.0
+
+    @property
+    def snr_db(self) -> float:
+        """
+        Signal-to-noise ratio of the recent audio in dB.
+
+        Speech level (90th percentile of chunk RMS) over the noise floor, so
+        the microphone closest to the speaker scores highest.
+        """
+        if not self.levels:
+            return 0.0
+        signal = max(1.0, float(np.percentile(self.levels, 90)))
+        return 20.0 * np.log10(signal / self.noise_floor)
+
+    def close(self) -> None:
+        """Close the stream."""
+        if self.capture is not None:
+            try:
+                self.capture.close()
+            except OSError:
+                pass
+            self.capture = None
+
+
+class MultiCapture:
+    """
+    Several microphones recorded in parallel behind the interface of one stream.
+
+    Every device runs in PortAudio callback mode at its native rate and is
+    converted to the output rate, so all sources advance chunk by chunk. The
+    source with the best SNR over the last seconds is passed on; another
+    device takes over only when it is better by ``switch_margin_db``, and its
+    level is matched to the noise floor of the first source so the VAD
+    threshold stays valid. Devices with independent clocks cannot be
+    beamformed sample-accurately, hence selection instead of mixing.
+    """
+
+    def __init__(self, devices: List[dict], channels: int, out_rate: int = 16000,
+                 window_seconds: float = 3.0, switch_margin_db: float = 3.0,
+                 buffer_seconds: float = 5.0, chunk_frames: int = 1024,
+                 cpus: Optional[List[int]] = None):
+        """
+        Initialize the capture (the streams are opened by ``open``).
+
+        Args:
+            devices: Device entries from select_multi_devices
+            channels: Number of channels to record per device
+            out_rate: Output sample rate
+            window_seconds: Audio the SNR of each source is computed from
+            switch_margin_db: SNR advantage another source needs to be selected
+            buffer_seconds: Ring buffer length per device
+            chunk_frames: Frames per chunk at the output rate
+            cpus: CPUs reserved for capture (audio threads pin themselves there)
+        """
+        window_chunks = max(4, int(window_seconds * out_rate / chunk_frames))
+        self.sources = [MicSource(device, channels, out_rate, window_chunks) for device in devices]
+        self.channels = channels
+        self.out_rate = out_rate
+        self.switch_margin_db = switch_margin_db
+        self.buffer_seconds = buffer_seconds
+        self.chunk_frames = chunk_frames
+        self.cpus = cpus
+        self.selected: Optional[MicSource] = None
+        self.reference: Optional[MicSource] = None  # Its noise floor sets the output level
+        self.switches = 0
+
+    def open(self, pa) -> 'MultiCapture':
+        """
+        Open all devices; devices that fail are left out.
+
+        Args:
+            pa: Initialized PyAudio instance
+
+        Returns:
+            self
+
+        Raises:
+            OSError: If no device could be opened
+        """
+        opened = []
+        for source in self.sources:
+            try:
+                rate = source.open(pa, self.chunk_frames, self.buffer_seconds, self.cpus)
+            except OSError as e:
+                print(f"⚠️  {e}")
+                continue
+            print(f"🎙️  [{source.device['index']}] {source.name} at {rate} Hz")
+            opened.append(source)
+        if not opened:
+            raise OSError("no microphone could be opened")
+        self.sources = opened
+        self.selected = self.reference = opened[0]
+        return self
+
+    def _select(self) -> None:
+        """Switch to the source with the best SNR (with hysteresis)."""
+        best = max(self.sources, key=lambda source: source.snr_db)
+        if best is not self.selected and best.snr_db > self.selected.snr_db + self.switch_margin_db:
+            print(f"🎙️  Switching to {best.name} (SNR {best.snr_db:.1f} dB vs {self.selected.snr_db:.1f} dB)")
+            self.selected = best
+            self.switches += 1
+
+    def read_sources(self, frames: int) -> Dict[MicSource, bytes]:
+        """
+        Read one chunk from every device, dropping devices that stopped.
+
+        Args:
+            frames: Number of frames at the output rate
+
+        Returns:
+            Raw 16-bit PCM bytes per source
+
+        Raises:
+            OSError: If every device stopped delivering audio
+        """
+        chunk_bytes = frames * self.channels * 2
+        chunks = {}
+        for source in list(self.sources):
+            try:
+                chunks[source] = source.read(chunk_bytes)
+            except OSError as e:
+                if len(self.sources) == 1:
+                    raise
+                print(f"⚠️  {source.name} stopped delivering audio ({e}), dropping it")
+                source.close()
+                self.sources.remove(source)
+        return chunks
+
+    def read(self, frames: int, exception_on_overflow: bool = False) -> bytes:
+        """
+        Read one chunk from every device and return the selected one.
+
+        Args:
+            frames: Number of frames at the output rate
+            exception_on_overflow: Accepted for compatibility; losses are counted instead
+
+        Returns:
+            Raw 16-bit PCM bytes of the best source
+
+        Raises:
+            OSError: If every device stopped delivering audio
+        """
+        chunks = self.read_sources(frames)
+        if self.selected not in self.sources:
+            self.selected = self.sources[0]
+        if self.reference not in self.sources:
+            self.reference = self.selected
+        self._select()
+
+        chunk = chunks[self.selected]
+        if self.selected is not self.reference:
+            # Same noise floor as the reference source keeps the VAD threshold valid
+            gain = min(4.0, max(0.25, self.reference.noise_floor / self.selected.noise_floor))
+            samples = np.frombuffer(chunk, dtype=np.int16) * gain
+            chunk = np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+        return chunk
+
+    def scores(self) -> List[dict]:
+        """Current level statistics per source, best SNR first."""
+        return sorted(({
+            'index': source.device['index'],
+            'name': source.name,
+            'rate': source.rate,
+            'snr_db': round(source.snr_db, 1),
+            'noise_floor': round(source.noise_floor, 1),
+            'dropped_frames': source.capture.dropped_frames if source.capture else 0,
+        } for source in self.sources), key=lambda score: -score['snr_db'])
+
+    @property
+    def dropped_frames(self) -> int:
+        """Frames discarded on all devices because the consumer fell behind."""
+        return sum(source.capture.dropped_frames for source in self.sources if source.capture)
+
+    @property
+    def overflows(self) -> int:
+        """Input overflows PortAudio reported on all devices."""
+        return sum(source.capture.overflows for source in self.sources if source.capture)
+
+    def stop_stream(self) -> None:
+        """Stop all streams."""
+        for source in self.sources:
+            if source.capture is not None:
+                source.capture.stop_stream()
+
+    def close(self) -> None:
+        """Close all streams."""
+        for source in self.sources:
+            source.close()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Transcript post-processing for Voice Dictation
+Removes hallucinated segments and applies spoken punctuation and replacements
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_RULES_PATH = Path.home() / '.config/voice-dictation/postprocess.json'
+
+# Built-in rule sets; '*' applies to every language
+BUILTIN_RULES = {
+    '*': {
+        'hallucinations': [
+            'amara.org', 'www.', 'subtitles by', 'subtitle',
+        ],
+        'annotations': [
+            'blank_audio', 'music', 'applause', 'laughter', 'laughs', 'silence', 'noise', 'inaudible',
+        ],
+    },
+    'de': {
+        'hallucinations': [
+            'untertitel', 'vielen dank fürs zuschauen', 'vielen dank für ihre aufmerksamkeit',
+            'das war\'s für heute', 'bis zum nächsten mal', 'copyright wdr', 'swr 20',
+        ],
+        'annotations': [
+            'musik', 'applaus', 'lachen', 'lacht', 'gelächter', 'stille', 'geräusch', 'geräusche',
+            'husten', 'hustet', 'räuspern', 'seufzt', 'unverständlich',
+        ],
+        'punctuation': {
+            'komma': ',',
+            'punkt': '.',
+            'fragezeichen': '?',
+            'ausrufezeichen': '!',
+            'doppelpunkt': ':',
+            'semikolon': ';',
+            'bindestrich': '-',
+            'neue zeile': '\n',
+            'neuer absatz': '\n\n',
+        },
+    },
+    'en': {
+        'hallucinations': [
+            'thanks for watching', 'thank you for watching', 'please subscribe',
+            'like and subscribe',
+        ],
+        'annotations': [
+            'coughs', 'sighs', 'clears throat', 'cheering',
+        ],
+        'punctuation': {
+            'comma': ',',
+            'period': '.',
+            'full stop': '.',
+            'question mark': '?',
+            'exclamation mark': '!',
+            'colon': ':',
+            'semicolon': ';',
+            'new line': '\n',
+            'new paragraph': '\n\n',
+        },
+    },
+}
+
+# Bracketed text that may be a non-speech annotation: [Musik], (Applaus), *lacht*, ♪ ... ♪
+ANNOTATION_PATTERN = re.compile(r'\[[^\]]*\]|\([^)]*\)|\*[^*\s][^*]*(?<=\S)\*|♪[^♪]*♪?')
+
+# A segment made of annotations only ("(Klopfen)."), whatever they say
+ANNOTATION_SEGMENT_PATTERN = re.compile(r'\s*(?:(?:' + ANNOTATION_PATTERN.pattern + r')\s*)+[.!?]*\s*')
+
+# Sentence-like segments (annotations are split off first); dots inside words
+# such as URLs or numbers do not end a segment
+SEGMENT_PATTERN = re.compile(r'(?:[^.!?\n]|[.!?](?=\S))+[.!?]*|\n+')
+
+# Words after which a punctuation name is a noun ("der Punkt"), not a command
+NOUN_MARKERS = {
+    'de': {'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einen', 'einem', 'einer', 'kein', 'keinen',
+           'jeder', 'jeden', 'diesen', 'diesem', 'dieser'},
+    'en': {'the', 'a', 'an', 'this', 'that', 'every', 'each', 'no'},
+}
+
+# Adjectives between a noun marker and the punctuation name ("ein wichtiger Punkt")
+ADJECTIVE_PATTERNS = {
+    'de': re.compile(r'^[a-zäöüß]+(?:e|er|en|em|es)$'),
+    'en': re.compile(r'^[a-z]+(?:al|ful|ous|ive|ic|less|able|ible|ant|ent|est|st|ed|ing)$'),
+}
+
+# Numbers on both sides make a punctuation name part of the number ("null Komma fünf")
+NUMBER_WORDS = {
+    'de': {'null', 'eins', 'zwei', 'drei', 'vier', 'fünf', 'sechs', 'sieben', 'acht', 'neun', 'zehn'},
+    'en': {'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten'},
+}
+
+# Punctuation whisper writes where the speaker paused
+PAUSE_MARKS = set(',;.!?')
+
+
+def _normalize(phrase: str) -> str:
+    """Lowercase and collapse whitespace for rule lookup."""
+    return ' '.join(phrase.lower().split())
+
+
+def trie_pattern(phrases: List[str]) -> str:
+    """
+    Build one regex alternation from literal phrases, factored as a trie.
+
+    Shared prefixes are matched once, so the cost of a match attempt depends
+    on the length of the text rather than the number of phrases.
+
+    Args:
+        phrases: Literal phrases (whitespace matches any run of whitespace)
+
+    Returns:
+        Regex source matching any of the phrases (longest first)
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in _normalize(phrase):
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = []
+        for char in sorted(key for key in node if key):
+            token = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(token + build(node[char]))
+        if not branches:
+            return ''
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if optional else '')
+
+    return build(trie)
+
+
+class PostProcessor:
+    """
+    Compiled post-processing for one language.
+
+    All hallucination phrases form one regex and all spoken punctuation and
+    replacement phrases another, so each transcript is scanned once per
+    stage regardless of the number of rules.
+    """
+
+    def __init__(self, language: str, rules_path: Optional[Path] = None,
+                 spoken_punctuation: bool = False):
+        """
+        Compile the rule sets.
+
+        Args:
+            language: Recognition language (selects the rule set)
+            rules_path: JSON file with user rules (default: ~/.config/voice-dictation/postprocess.json)
+            spoken_punctuation: Replace spoken punctuation words ("Komma") with symbols
+        """
+        self.language = language
+        self.noun_markers = NOUN_MARKERS.get(language, set())
+        self.adjective_pattern = ADJECTIVE_PATTERNS.get(language)
+        self.number_words = NUMBER_WORDS.get(language, set())
+        rule_sets = [BUILTIN_RULES.get('*', {}), BUILTIN_RULES.get(language, {})]
+        user_rules = self._load_user_rules(Path(rules_path) if rules_path else DEFAULT_RULES_PATH)
+        rule_sets += [user_rules.get('*', {}), user_rules.get(language, {})]
+
+        hallucinations = []
+        annotations = []
+        self.punctuation: Dict[str, str] = {}
+        self.replacements: Dict[str, str] = {}
+        for rules in rule_sets:
+            hallucinations += rules.get('hallucinations', [])
+            annotations += rules.get('annotations', [])
+            if spoken_punctuation:
+                self.punctuation.update({_normalize(k): v for k, v in rules.get('punctuation', {}).items()})
+            self.replacements.update({_normalize(k): v for k, v in rules.get('replacements', {}).items()})
+
+        # Hallucinations match at a word start, like the former substring check
+        self.hallucination_regex = re.compile(
+            r'(?<!\w)(?:' + trie_pattern(hallucinations) + ')', re.IGNORECASE
+        ) if hallucinations else None
+        self.annotation_regex = re.compile(
+            r'(?<!\w)(?:' + trie_pattern(annotations) + r')(?!\w)', re.IGNORECASE
+        ) if annotations else None
+
+        phrases = list(self.punctuation) + list(self.replacements)
+        self.phrase_regex = re.compile(
+            r'(?P<pre>[\s,;.:!?]*)(?<!\w)(?P<phrase>' + trie_pattern(phrases) + r')(?!\w)'
+            r'(?P<post>[.,;:!?]*)(?P<trail>[ \t]*)',
+            re.IGNORECASE,
+        ) if phrases else None
+        self.rule_count = len(hallucinations) + len(annotations) + len(phrases)
+
+    @staticmethod
+    def _load_user_rules(path: Path) -> dict:
+        """Read user rules; a missing file means no extra rules."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load post-processing rules {path}: {e}")
+            return {}
+
+    def _is_annotation(self, bracketed: str) -> bool:
+        """True for music and known non-speech annotations, not for ordinary parentheses."""
+        if bracketed.startswith('♪'):
+            return True
+        return self.annotation_regex is not None and self.annotation_regex.search(bracketed) is not None
+
+    def _remove_annotations(self, text: str) -> Tuple[str, List[str]]:
+        """Drop known non-speech annotations and segments made of annotations only."""
+        removed = []
+
+        def strip(match: re.Match) -> str:
+            if not self._is_annotation(match.group(0)):
+                return match.group(0)
+            removed.append(match.group(0))
+            return ' '
+
+        text = ANNOTATION_PATTERN.sub(strip, text)
+        if not ANNOTATION_PATTERN.search(text):
+            return text, removed
+        kept = []
+        for match in SEGMENT_PATTERN.finditer(text):
+            segment = match.group(0)
+            if ANNOTATION_SEGMENT_PATTERN.fullmatch(segment):
+                removed.append(segment.strip())
+            else:
+                kept.append(segment)
+        return ''.join(kept), removed
+
+    def _remove_hallucinations(self, text: str) -> Tuple[str, List[str]]:
+        """Drop annotations and sentences containing hallucination phrases."""
+        text, removed = self._remove_annotations(text)
+        if self.hallucination_regex is None or not self.hallucination_regex.search(text):
+            return text, removed
+
+        kept = []
+        for match in SEGMENT_PATTERN.finditer(text):
+            segment = match.group(0)
+            if self.hallucination_regex.search(segment):
+                removed.append(segment.strip())
+            else:
+                kept.append(segment)
+        return ''.join(kept), removed
+
+    def _is_number(self, word: Optional[str]) -> bool:
+        """True for digits and number words."""
+        return word is not None and (word.isdigit() or word.lower() in self.number_words)
+
+    def _is_command(self, match: re.Match) -> bool:
+        """
+        Decide whether a punctuation name was dictated as punctuation.
+
+        The word has to stand alone: at the end of a clause or after a pause
+        whisper marked with punctuation. Between numbers ("null Komma fünf"),
+        after a noun marker or its adjectives ("ein wichtiger Punkt") and
+        after a colon ("Er sagte: Punkt.") it is an ordinary word.
+
+        Args:
+            match: Match of phrase_regex on a punctuation name
+
+        Returns:
+            True if the word should become its symbol
+        """
+        text = match.string
+        pre = match.group('pre')
+        if ':' in pre:
+            return False
+        before = text[max(0, match.start() - 80):match.start()]
+        after = text[match.end():]
+        previous = re.findall(r'\w+', before)
+        following = re.match(r'\w+', after)
+        if self._is_number(previous[-1] if previous else None) and self._is_number(following and following.group(0)):
+            return False
+
+        if PAUSE_MARKS & set(pre):
+            return True
+        # Walk back over the adjectives of the clause to a possible noun marker
+        clause = re.findall(r'\w+', re.split(r'[.!?:;,\n]', before)[-1])
+        for word in reversed(clause[-3:]):
+            if word.lower() in self.noun_markers:
+                return False
+            if self.adjective_pattern is None or not self.adjective_pattern.match(word):
+                break
+        return bool(match.group('post')) or not after or after.startswith('\n')
+
+    def _replace_phrase(self, match: re.Match) -> str:
+        """Substitute one spoken punctuation or replacement phrase."""
+        phrase = _normalize(match.group('phrase'))
+        if phrase in self.replacements:
+            # Plain text substitution keeps the surrounding punctuation
+            return match.group('pre') + self.replacements[phrase] + match.group('post') + match.group('trail')
+        if not self._is_command(match):
+            return match.group(0)
+        symbol = self.punctuation[phrase]
+        if symbol.startswith('\n'):
+            return symbol
+        # Attach to the previous word and drop whisper's own punctuation around the word
+        return symbol + (' ' if match.group('trail') else '')
+
+    def process(self, text: Optional[str]) -> Tuple[Optional[str], List[str]]:
+        """
+        Clean one transcript.
+
+        Args:
+            text: Raw transcript
+
+        Returns:
+            Tuple (cleaned text or None if nothing is left, removed segments)
+        """
+        if not text:
+            return None, []
+        if self.phrase_regex is not None:
+            # Spoken punctuation first: it creates the sentence boundaries
+            # hallucinated segments are cut at
+            text = self.phrase_regex.sub(self._replace_phrase, text)
+            # Sentence start after spoken sentence punctuation or line break
+            text = re.sub(r'([.!?]\s+|\n[ \t]*)([a-zäöüß])', lambda m: m.group(1) + m.group(2).upper(), text)
+        text, removed = self._remove_hallucinations(text)
+        text = re.sub(r'[ \t]+\n', '\n', re.sub(r'[ \t]{2,}', ' ', text)).strip(' \t')
+        if removed:
+            # Line breaks only led into the removed segment
+            text = text.rstrip()
+        text = re.sub(r'^[\s,;:.]+', '', text)
+        return (text if text.strip() else None), removed
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Structured recognizer output for Voice Dictation
+Words with timestamps and token probabilities parsed from whisper.cpp's JSON output
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Control tokens in whisper-cli's full JSON output ("[_BEG_]", "[_TT_150]", "<|endoftext|>")
+SPECIAL_TOKEN_PATTERN = re.compile(r'^\s*(\[_[A-Z]+_?\d*\]|<\|[^|]*\|>)\s*$')
+
+# Segment time range whisper.cpp prints before each line when timestamps are on
+TIMESTAMP_PREFIX_PATTERN = re.compile(r'^\s*\[\d+:\d+(?::\d+)?[.,]\d+\s*-->\s*\d+:\d+(?::\d+)?[.,]\d+\]\s*')
+
+
+def plain_text(output: str) -> str:
+    """Join whisper.cpp's output lines into one string, without segment timestamps."""
+    lines = (TIMESTAMP_PREFIX_PATTERN.sub('', line).strip() for line in output.splitlines())
+    return ' '.join(line for line in lines if line)
+
+
+class Word:
+    """One recognized word: text (with whisper's leading space), time span and probability."""
+
+    __slots__ = ('text', 'start', 'end', 'probability')
+
+    def __init__(self, text: str, start: Optional[float], end: Optional[float], probability: float):
+        """
+        Initialize the word.
+
+        Args:
+            text: Word text as whisper emits it (leading space before new words)
+            start: Start in seconds from the beginning of the decoded audio (None = unknown)
+            end: End in seconds (None = unknown)
+            probability: Probability of the least certain token of the word
+        """
+        self.text = text
+        self.start = start
+        self.end = end
+        self.probability = probability
+
+    @property
+    def timed(self) -> bool:
+        """True if whisper reported the word's time span."""
+        return self.start is not None and self.end is not None
+
+    def shifted(self, offset: float) -> 'Word':
+        """Copy of the word with its time span moved by offset seconds."""
+        return Word(self.text, self.start + offset, self.end + offset, self.probability)
+
+    def __repr__(self) -> str:
+        span = f"{self.start:.2f}-{self.end:.2f}" if self.start is not None and self.end is not None else "?"
+        return f"Word({self.text!r}, {span}, p={self.probability:.2f})"
+
+
+def words_from_tokens(tokens: List[Tuple[str, Optional[float], Optional[float], float]]) -> List[Word]:
+    """
+    Join whisper's sub-word tokens into words.
+
+    A token starting with a space begins a new word; other tokens
+    (word pieces, punctuation) continue the previous one.
+
+    Args:
+        tokens: (text, start, end, probability) per token, control tokens included;
+            start and end are None if whisper reported no timestamps
+
+    Returns:
+        Words in order
+    """
+    words = []
+    for text, start, end, probability in tokens:
+        if not text or SPECIAL_TOKEN_PATTERN.match(text):
+            continue
+        if words and not text[0].isspace():
+            word = words[-1]
+            word.text += text
+            word.end = end if word.end is None or end is None else max(word.end, end)
+            word.probability = min(word.probability, probability)
+        else:
+            words.append(Word(text, start, end, probability))
+    return words
+
+
+class Transcript:
+    """Recognizer output of one decode: the words, or only the text if whisper reported no tokens."""
+
+    def __init__(self, words: Optional[List[Word]] = None, text: Optional[str] = None):
+        """
+        Initialize the transcript.
+
+        Args:
+            words: Words with timestamps and probabilities
+            text: Plain text, used when no words are available
+        """
+        self.words = words or []
+        self.plain_text = text
+
+    @property
+    def text(self) -> str:
+        """The transcript as one string."""
+        if self.words:
+            return ''.join(word.text for word in self.words).strip()
+        return (self.plain_text or '').strip()
+
+    @property
+    def has_timestamps(self) -> bool:
+        """True if every word has a known time span (needed to cut spans from the audio)."""
+        return bool(self.words) and all(word.timed for word in self.words)
+
+    @property
+    def confidence(self) -> Optional[float]:
+        """Mean word probability, None without token data."""
+        if not self.words:
+            return None
+        return sum(word.probability for word in self.words) / len(self.words)
+
+    @classmethod
+    def from_text(cls, text: Optional[str]) -> Optional['Transcript']:
+        """Transcript without token data (plain whisper-cli output), None for empty text."""
+        return cls(text=text) if text and text.strip() else None
+
+    @classmethod
+    def from_cli_json(cls, data: dict) -> 'Transcript':
+        """
+        Parse whisper-cli's full JSON output (``--output-json-full``).
+
+        Args:
+            data: Parsed JSON with a ``transcription`` list of segments and their tokens
+
+        Returns:
+            Transcript (text only if the segments carry no tokens)
+        """
+        tokens = []
+        texts = []
+        for segment in data.get('transcription', []):
+            texts.append(segment.get('text', ''))
+            for token in segment.get('tokens', []):
+                # Tokens without offsets have no known time (not t=0)
+                offsets = token.get('offsets') or {}
+                start, end = offsets.get('from'), offsets.get('to')
+                tokens.append((token.get('text', ''), start / 1000 if start is not None else None,
+                               end / 1000 if end is not None else None, float(token.get('p', 1.0))))
+        return cls(words_from_tokens(tokens), text=''.join(texts))
+
+    @classmethod
+    def from_server_json(cls, payload: dict) -> 'Transcript':
+        """
+        Parse whisper-server's ``verbose_json`` response.
+
+        Timestamps are only present if the request enabled them; without
+        them the words keep their probabilities but no time span.
+
+        Args:
+            payload: Response with ``segments`` holding per-token ``words``
+
+        Returns:
+            Transcript (text only if the response carries no words)
+        """
+        tokens = []
+        for segment in payload.get('segments', []):
+            for word in segment.get('words', []):
+                start = word.get('start', segment.get('start'))
+                end = word.get('end', segment.get('end'))
+                tokens.append((word.get('word', ''), float(start) if start is not None else None,
+                               float(end) if end is not None else None, float(word.get('probability', 1.0))))
+        return cls(words_from_tokens(tokens), text=plain_text(payload.get('text', '')))
+
+    @classmethod
+    def load_cli_json(cls, path: Path) -> Optional['Transcript']:
+        """Read whisper-cli's JSON output file, None if it is missing or unreadable."""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls.from_cli_json(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read whisper.cpp JSON output: {e}")
+            return None
+
+    def low_confidence_spans(self, threshold: float, bridge: int = 1) -> List[Tuple[int, int]]:
+        """
+        Find runs of words whisper was unsure about.
+
+        Args:
+            threshold: Words below this probability are low confidence
+            bridge: Confident words between two uncertain ones that still join them into one span
+
+        Words without a known time span are never part of a span (they could
+        not be cut from the audio) and separate the spans around them.
+
+        Returns:
+            List of (first, last) word indexes, inclusive
+        """
+        spans = []
+        untimed = -1  # Index of the last word without times
+        for index, word in enumerate(self.words):
+            if not word.timed:
+                untimed = index
+                continue
+            if word.probability >= threshold:
+                continue
+            if spans and spans[-1][1] > untimed and index - spans[-1][1] - 1 <= bridge:
+                spans[-1] = (spans[-1][0], index)
+            else:
+                spans.append((index, index))
+        return spans
+
+    def replace(self, first: int, last: int, words: List[Word]) -> 'Transcript':
+        """Transcript with the words first..last (inclusive) replaced."""
+        return Transcript(self.words[:first] + words + self.words[last + 1:])
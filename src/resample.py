@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Sample rate conversion for Voice Dictation
+Streaming polyphase resampler from the device's native rate to whisper's 16 kHz
+"""
+
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class PolyphaseResampler:
+    """
+    Rational L/M resampler with a Kaiser-windowed sinc low-pass filter.
+
+    The filter is split into L polyphase branches once; every output sample
+    is the dot product of one branch with the latest input samples, computed
+    for a whole chunk in a single vectorized call. Filter history is carried
+    between chunks, so the stream can be converted while it is recorded.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int = 16000, channels: int = 1,
+                 half_width: int = 10, beta: float = 5.0):
+        """
+        Initialize the resampler.
+
+        Args:
+            in_rate: Capture sample rate
+            out_rate: Target sample rate
+            channels: Number of interleaved channels (kept as is)
+            half_width: Filter half length in zero crossings of the slower rate
+            beta: Kaiser window shape (higher = more stopband attenuation)
+        """
+        divisor = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = channels
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+
+        # Low-pass at the lower Nyquist frequency, designed at the upsampled rate
+        factor = max(self.up, self.down)
+        num_taps = 2 * half_width * factor + 1
+        t = np.arange(num_taps) - (num_taps - 1) / 2
+        taps = np.sinc(t / factor) * np.kaiser(num_taps, beta)
+        taps *= self.up / taps.sum()
+
+        # Polyphase matrix: branch p holds taps p, p+L, p+2L, ... (reversed for
+        # a dot product with the input window in chronological order)
+        self.branch_len = -(-num_taps // self.up)
+        padded = np.zeros(self.branch_len * self.up)
+        padded[:num_taps] = taps
+        self.branches = padded.reshape(self.branch_len, self.up).T[:, ::-1].astype(np.float32)
+
+        self.history = np.zeros((self.branch_len - 1, channels), dtype=np.float32)
+        self.consumed = 0  # Input frames seen so far
+        self.produced = 0  # Output frames emitted so far
+
+    @property
+    def passthrough(self) -> bool:
+        """True if the rates match and no conversion is needed."""
+        return self.up == self.down
+
+    def reset(self) -> None:
+        """Drop the filter history (start of a new recording)."""
+        self.history[:] = 0.0
+        self.consumed = 0
+        self.produced = 0
+
+    def process(self, data: bytes) -> bytes:
+        """
+        Convert a chunk of 16-bit PCM audio.
+
+        Args:
+            data: Interleaved 16-bit PCM at the capture rate
+
+        Returns:
+            Interleaved 16-bit PCM at the target rate (length varies per chunk)
+        """
+        if self.passthrough:
+            return data
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        if not len(frames):
+            return b''
+        window = np.concatenate((self.history, frames.astype(np.float32)))
+        total = self.consumed + len(frames)
+
+        # Output n depends on inputs up to floor(n * M / L); emit all that are complete
+        end = (total * self.up - 1) // self.down + 1
+        positions = np.arange(self.produced, end, dtype=np.int64) * self.down
+        newest = positions // self.up
+        phases = positions - newest * self.up
+
+        # Index of each output's newest input inside the window (history included)
+        local = newest - (self.consumed - (self.branch_len - 1))
+        windows = sliding_window_view(window, self.branch_len, axis=0)[local - (self.branch_len - 1)]
+        output = np.einsum('nct,nt->nc', windows, self.branches[phases])
+
+        self.history = window[len(window) - (self.branch_len - 1):]
+        self.consumed = total
+        self.produced = end
+        return np.clip(np.rint(output), -32768, 32767).astype(np.int16).tobytes()
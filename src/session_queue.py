@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Session queue for Voice Dictation
+Decodes finished recordings on a bounded worker pool and types the results in recording order
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+
+class SessionQueue:
+    """
+    Scheduler for daemon sessions whose recording has ended.
+
+    Every recording gets a ticket in the order it ended. Decodes run on up
+    to ``workers`` threads at once, so the microphone is free for the next
+    session immediately; results are held back until all earlier tickets
+    are delivered, so text is never typed out of order.
+    """
+
+    def __init__(self, workers: int = 2):
+        """
+        Initialize the queue.
+
+        Args:
+            workers: Decodes running at the same time
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='session-decode')
+        self.lock = threading.Condition()
+        self.deliver_lock = threading.Lock()  # Only one delivery (typing) at a time
+        self.next_ticket = 0
+        self.next_delivery = 0
+        self.finished: Dict[int, Tuple[Optional[str], Callable[[Optional[str]], None]]] = {}
+
+    def pending(self) -> int:
+        """Number of sessions decoded or waiting to be typed."""
+        with self.lock:
+            return self.next_ticket - self.next_delivery
+
+    def submit(self, decode: Callable[[], Optional[str]], deliver: Callable[[Optional[str]], None]) -> int:
+        """
+        Queue a finished recording.
+
+        Args:
+            decode: Runs on a worker, returns the transcript (None if nothing was recognized)
+            deliver: Receives the transcript once every earlier session is delivered
+
+        Returns:
+            Number of earlier sessions still ahead of this one
+        """
+        with self.lock:
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            ahead = ticket - self.next_delivery
+        self.executor.submit(self._run, ticket, decode, deliver)
+        return ahead
+
+    def _run(self, ticket: int, decode: Callable[[], Optional[str]],
+             deliver: Callable[[Optional[str]], None]) -> None:
+        """Decode one session on a worker, then deliver whatever is next in order."""
+        try:
+            text = decode()
+        except Exception as e:
+            print(f"❌ Queued transcription failed: {e}")
+            text = None
+        with self.lock:
+            self.finished[ticket] = (text, deliver)
+        self._flush()
+
+    def _flush(self) -> None:
+        """Deliver finished sessions as long as the next one in order is ready."""
+        with self.deliver_lock:
+            while True:
+                with self.lock:
+                    entry = self.finished.pop(self.next_delivery, None)
+                if entry is None:
+                    return
+                text, deliver = entry
+                try:
+                    deliver(text)
+                except Exception as e:
+                    print(f"❌ Could not deliver transcript: {e}")
+                with self.lock:
+                    self.next_delivery += 1
+                    self.lock.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued session is delivered.
+
+        Args:
+            timeout: Seconds to wait at most (None = no limit)
+
+        Returns:
+            True if the queue is empty
+        """
+        with self.lock:
+            return self.lock.wait_for(lambda: self.next_delivery == self.next_ticket, timeout)
+
+    def close(self) -> None:
+        """Finish the queued sessions and stop the workers."""
+        self.executor.shutdown(wait=True)
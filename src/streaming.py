@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Streaming transcription for Voice Dictation
+Decodes audio incrementally while the user is still speaking
+"""
+
+import re
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Preallocated int16 ring buffer addressed by absolute sample position."""
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Number of samples kept before the oldest are overwritten
+        """
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+        self.total_written = 0  # Absolute position of the next sample
+        self.lock = threading.Lock()
+
+    def write(self, data: bytes) -> None:
+        """Append raw 16-bit PCM data."""
+        samples = np.frombuffer(data, dtype=np.int16)
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+        with self.lock:
+            # Positions advance by the full chunk even if only its end fits
+            start = (self.total_written + count - len(samples)) % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self.buffer[start:start + first] = samples[:first]
+            self.buffer[:len(samples) - first] = samples[first:]
+            self.total_written += count
+
+    def oldest(self) -> int:
+        """Absolute position of the oldest sample still in the buffer."""
+        return max(0, self.total_written - self.capacity)
+
+    def read(self, start: int, end: int) -> Tuple[np.ndarray, int]:
+        """
+        Copy samples between two absolute positions.
+
+        A consumer that fell behind by more than the capacity asks for samples
+        that were already overwritten; only the part still kept is returned
+        and the number of missing samples tells the caller what was lost.
+
+        Args:
+            start: First absolute sample position
+            end: Absolute position after the last sample
+
+        Returns:
+            Tuple (int16 array with the kept samples, number of overwritten
+            samples missing from the start of the range)
+        """
+        with self.lock:
+            end = min(end, self.total_written)
+            lost = max(0, min(end, self.oldest()) - start)
+            start += lost
+            if end <= start:
+                return np.zeros(0, dtype=np.int16), lost
+            begin = start % self.capacity
+            length = end - start
+            if begin + length <= self.capacity:
+                return self.buffer[begin:begin + length].copy(), lost
+            return np.concatenate((self.buffer[begin:], self.buffer[:length - (self.capacity - begin)])), lost
+
+
+def _normalize_word(word: str) -> str:
+    """Normalize a word for hypothesis comparison."""
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def stable_prefix(previous: List[str], current: List[str]) -> List[str]:
+    """Return the words of ``current`` that agree with ``previous`` from the start."""
+    count = 0
+    for old, new in zip(previous, current):
+        if _normalize_word(old) != _normalize_word(new):
+            break
+        count += 1
+    return current[:count]
+
+
+class StreamingTranscriber:
+    """
+    Consumer thread that transcribes overlapping windows during recording.
+
+    The recording loop (producer) pushes audio and marks speech and pauses.
+    At every pause the audio since the last committed position is decoded and
+    committed as a finished segment. Between pauses the open segment is
+    re-decoded every ``step`` seconds; words that agree between two decodes
+    form the stable prefix. When recording stops only the uncommitted tail
+    needs decoding.
+
+    If decoding falls so far behind that the open segment's start was
+    overwritten in the ring buffer, the lost audio is counted in
+    ``lost_samples`` and the segment's index is listed in ``incomplete``.
+    """
+
+    def __init__(self, transcribe_fn: Callable[[memoryview], Optional[str]], sample_rate: int,
+                 step: float = 1.0, max_segment: float = 15.0, min_segment: float = 0.5,
+                 on_commit: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the streaming transcriber.
+
+        Args:
+            transcribe_fn: Function that transcribes a buffer of 16-bit PCM data
+            sample_rate: Sample rate of the pushed audio
+            step: Seconds between incremental decodes of the open segment
+            max_segment: Force-commit the open segment after this many seconds
+            min_segment: Ignore pauses that would close shorter segments
+            on_commit: Called with each committed segment text, in order (e.g. to type it)
+        """
+        self.transcribe_fn = transcribe_fn
+        self.on_commit = on_commit
+        self.sample_rate = sample_rate
+        self.step = step
+        self.max_segment = int(max_segment * sample_rate)
+        self.min_segment = int(min_segment * sample_rate)
+        self.ring = AudioRingBuffer(int((max_segment + 5.0) * sample_rate))
+
+        self.segments: List[str] = []  # Committed segment texts
+        self.committed_pos = 0  # Absolute sample position of the open segment start
+        self.pending_pause = None  # Sample position of the latest unprocessed pause
+        self.last_speech_pos = 0
+        self.hypothesis: List[str] = []
+        self.stable: List[str] = []
+        self.decoded_until = 0
+        self.lost_samples = 0  # Audio overwritten before it was decoded
+        self.lost_until = 0  # Absolute position up to which losses are counted
+        self.segment_lost = False  # The open segment misses audio
+        self.incomplete: List[int] = []  # Indexes of committed segments that miss audio
+
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.state_lock = threading.Lock()
+        self.thread = None
+
+    # Producer side -------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the consumer thread."""
+        self.thread = threading.Thread(target=self._consume, daemon=True)
+        self.thread.start()
+
+    def push(self, data: bytes) -> None:
+        """Append a chunk of recorded audio."""
+        self.ring.write(data)
+
+    def mark_speech(self) -> None:
+        """Record that the latest pushed chunk contained speech."""
+        with self.state_lock:
+            self.last_speech_pos = self.ring.total_written
+
+    def mark_pause(self) -> None:
+        """Record that speech paused at the end of the latest pushed chunk."""
+        with self.state_lock:
+            self.pending_pause = self.ring.total_written
+        self.wakeup.set()
+
+    # Consumer side -------------------------------------------------------
+
+    def _decode(self, start: int, end: int) -> Optional[str]:
+        """Transcribe the audio between two absolute positions."""
+        samples, lost = self.ring.read(start, end)
+        if lost:
+            # Re-decodes of the open segment ask for the same lost range again
+            new = start + lost - max(start, self.lost_until)
+            if new > 0:
+                self.lost_samples += new
+                self.lost_until = start + lost
+                print(f"⚠️  Streaming fell behind: {new / self.sample_rate:.1f}s of audio "
+                      f"overwritten before decoding")
+            self.segment_lost = True
+        if len(samples) == 0:
+            return None
+        return self.transcribe_fn(memoryview(samples).cast('B'))
+
+    def _commit(self, end: int, text: Optional[str]) -> None:
+        """Close the open segment at ``end`` with the given text."""
+        if text and text.strip():
+            if self.segment_lost:
+                self.incomplete.append(len(self.segments))
+            self.segments.append(text.strip())
+            print(f"📝 Committed: {text.strip()}")
+            if self.on_commit is not None:
+                self.on_commit(text.strip())
+        self.committed_pos = end
+        self.segment_lost = False
+        self.hypothesis = []
+        self.stable = []
+
+    def _consume(self) -> None:
+        """Consumer loop: decode at pauses and incrementally in between."""
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.step)
+            self.wakeup.clear()
+            if self.stopped.is_set():
+                break
+
+            with self.state_lock:
+                pause = self.pending_pause
+                self.pending_pause = None
+                last_speech = self.last_speech_pos
+            now = self.ring.total_written
+
+            # Pause after speech: the segment up to the pause is complete
+            if pause is not None and last_speech > self.committed_pos and \
+                    pause - self.committed_pos >= self.min_segment:
+                self._commit(pause, self._decode(self.committed_pos, pause))
+                continue
+
+            if last_speech <= self.committed_pos or now - self.decoded_until < self.step * self.sample_rate:
+                continue
+
+            # Incremental decode of the open segment
+            text = self._decode(self.committed_pos, now)
+            self.decoded_until = now
+            words = text.split() if text else []
+            self.stable = stable_prefix(self.hypothesis, words)
+            self.hypothesis = words
+            if self.stable:
+                print(f"📝 Stable: {' '.join(self.stable)}")
+
+            # Bound the open segment so decodes stay short
+            if now - self.committed_pos >= self.max_segment:
+                self._commit(now, text)
+
+    def finish(self) -> Optional[str]:
+        """
+        Stop the consumer and decode the uncommitted tail.
+
+        Returns:
+            Full transcript of the session, or None if nothing was recognized
+        """
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+
+        end = self.ring.total_written
+        if self.last_speech_pos > self.committed_pos:
+            tail = self.pending_pause if self.pending_pause and self.pending_pause > self.last_speech_pos else end
+            self._commit(tail, self._decode(self.committed_pos, tail))
+
+        text = ' '.join(s for s in self.segments if s)
+        return text if text else None
+
+
+class SpeculativeDecode:
+    """
+    Background decode started at a short pause, before the silence timeout.
+
+    If the pause turns into the end of the recording the finished transcript
+    is used right away; if speech resumes the result is rolled back. Every
+    launch gets a new generation, so a decode that outlives its rollback
+    cannot overwrite the result of a later one.
+    """
+
+    def __init__(self, transcribe_fn: Callable[[bytes], Optional[str]]):
+        """
+        Initialize the speculative decoder.
+
+        Args:
+            transcribe_fn: Function that transcribes a snapshot of 16-bit PCM data
+        """
+        self.transcribe_fn = transcribe_fn
+        self.thread = None
+        self.end = None  # Buffer position the running/finished snapshot ends at
+        self.text = None
+        self.valid = False
+        self.generation = 0
+        self.lock = threading.Lock()  # Orders a late result against rollback and relaunch
+        self.launched = 0
+        self.rolled_back = 0
+
+    def running(self) -> bool:
+        """True while a speculative decode is in flight."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def launch(self, pcm: bytes, end: int) -> bool:
+        """
+        Start decoding a snapshot in the background.
+
+        Args:
+            pcm: Snapshot of the audio recorded so far
+            end: Buffer position the snapshot covers
+
+        Returns:
+            False if a previous speculative decode is still running
+        """
+        if self.running():
+            return False
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            self.text = None
+        self.end = end
+        self.valid = True
+        self.launched += 1
+
+        def _decode() -> None:
+            text = self.transcribe_fn(pcm)
+            with self.lock:
+                if generation == self.generation:
+                    self.text = text
+
+        self.thread = threading.Thread(target=_decode, daemon=True)
+        self.thread.start()
+        return True
+
+    def rollback(self) -> None:
+        """Discard the speculative result because speech resumed; a running decode is abandoned."""
+        if self.valid:
+            self.valid = False
+            self.rolled_back += 1
+            # Its result is ignored, so the next pause may launch right away
+            with self.lock:
+                self.generation += 1
+            self.thread = None
+
+    def result(self, last_speech: int, timeout: Optional[float] = None):
+        """
+        Return the speculative transcript if it covers all recorded speech.
+
+        Args:
+            last_speech: Buffer position of the last speech chunk
+            timeout: Seconds to wait for a decode that is still running
+
+        Returns:
+            Tuple (hit, text); hit is False if the audio must be decoded again,
+            including when the speculative decode failed or recognized nothing
+        """
+        if not self.valid or self.end is None or self.end < last_speech:
+            return False, None
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return False, None
+        if self.text is None:
+            return False, None
+        return True, self.text
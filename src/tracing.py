@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Latency tracing for Voice Dictation
+Records timed spans per dictation session as JSON lines and optional metrics
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_TRACE_LOG = Path(os.environ.get('XDG_STATE_HOME') or Path.home() / '.local/state') / \
+    'voice-dictation/trace.jsonl'
+
+
+class TraceSession:
+    """Spans, events and counters of one dictation session."""
+
+    def __init__(self):
+        self.session_id = uuid.uuid4().hex[:12]
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.events = []
+        self.counts = {}
+
+    def offset_ms(self, timestamp: float) -> float:
+        """Milliseconds between the session start and a perf_counter timestamp."""
+        return round((timestamp - self.origin) * 1000, 2)
+
+
+class Tracer:
+    """Collects spans and events of the current session and writes one JSON line per session."""
+
+    def __init__(self, log_path: Optional[str] = None, max_log_bytes: int = 5 * 1024 * 1024,
+                 metrics_port: Optional[int] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            log_path: JSONL output file (None disables the log)
+            max_log_bytes: Rotate the log to <name>.1 when it grows beyond this size
+            metrics_port: Serve Prometheus metrics on 127.0.0.1:<port> (None disables)
+        """
+        self.log_path = Path(log_path) if log_path else None
+        self.max_log_bytes = max_log_bytes
+        self.lock = threading.Lock()
+        self.session = TraceSession()
+        self.local = threading.local()  # Session bound to a thread (queued decodes)
+
+        # Aggregates for the metrics endpoint
+        self.sessions_total = 0
+        self.stage_sum = {}
+        self.stage_count = {}
+        self.counters = {}
+        self.last_session = {}
+        self.metrics_server = None
+        if metrics_port:
+            self._start_metrics_server(metrics_port)
+
+    def _current(self) -> TraceSession:
+        """Session spans of this thread belong to."""
+        return getattr(self.local, 'session', None) or self.session
+
+    def begin_session(self) -> str:
+        """Start a new session; spans recorded afterwards belong to it."""
+        with self.lock:
+            self.session = TraceSession()
+        return self.session.session_id
+
+    @contextmanager
+    def bind(self, session: TraceSession):
+        """
+        Record the enclosed block's spans into an earlier session.
+
+        A queued session is still decoded while the next one records; its
+        worker thread binds the session it belongs to.
+        """
+        previous = getattr(self.local, 'session', None)
+        self.local.session = session
+        try:
+            yield
+        finally:
+            self.local.session = previous
+
+    def add_span(self, name: str, start: float, duration: float, **attrs) -> None:
+        """
+        Record a span with known timing.
+
+        Args:
+            name: Stage name
+            start: perf_counter timestamp of the span start
+            duration: Duration in seconds
+            **attrs: Extra attributes stored with the span
+        """
+        session = self._current()
+        span = {
+            'name': name,
+            'start_ms': session.offset_ms(start),
+            'duration_ms': round(duration * 1000, 2),
+            'thread': threading.current_thread().name,
+        }
+        if attrs:
+            span['attrs'] = attrs
+        with self.lock:
+            session.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the enclosed block as a span."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start, **attrs)
+
+    def event(self, name: str, **attrs) -> None:
+        """Record an instant (e.g. first audio, endpoint)."""
+        session = self._current()
+        event = {'name': name, 'at_ms': session.offset_ms(time.perf_counter())}
+        if attrs:
+            event['attrs'] = attrs
+        with self.lock:
+            session.events.append(event)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add to a per-session counter (e.g. dropped audio frames)."""
+        session = self._current()
+        with self.lock:
+            session.counts[name] = session.counts.get(name, 0) + value
+
+    def end_session(self, **attrs) -> dict:
+        """
+        Finish the session, write it to the log and update the metrics.
+
+        Args:
+            **attrs: Session attributes (model, audio duration, ...)
+
+        Returns:
+            The session record
+        """
+        session = self._current()
+        with self.lock:
+            record = {
+                'session': session.session_id,
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'total_ms': session.offset_ms(time.perf_counter()),
+                'spans': session.spans,
+                'events': session.events,
+            }
+            if session.counts:
+                record['counts'] = session.counts
+            for name, value in session.counts.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            if attrs:
+                record['attrs'] = attrs
+            self.sessions_total += 1
+            for span in session.spans:
+                name = span['name']
+                self.stage_sum[name] = self.stage_sum.get(name, 0.0) + span['duration_ms'] / 1000
+                self.stage_count[name] = self.stage_count.get(name, 0) + 1
+            self.last_session = record
+        self._write(record)
+        return record
+
+    def _write(self, record: dict) -> None:
+        """Append a record to the JSONL log, rotating it when too large."""
+        if self.log_path is None:
+            return
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.log_path.exists() and self.log_path.stat().st_size > self.max_log_bytes:
+                os.replace(self.log_path, self.log_path.with_name(self.log_path.name + '.1'))
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️  Could not write trace log: {e}")
+
+    def metrics_text(self) -> str:
+        """Render the aggregates in Prometheus text exposition format."""
+        with self.lock:
+            lines = [
+                '# TYPE voice_dictation_sessions_total counter',
+                f'voice_dictation_sessions_total {self.sessions_total}',
+                '# TYPE voice_dictation_stage_seconds summary',
+            ]
+            for name in sorted(self.stage_sum):
+                lines.append(f'voice_dictation_stage_seconds_sum{{stage="{name}"}} {self.stage_sum[name]:.6f}')
+                lines.append(f'voice_dictation_stage_seconds_count{{stage="{name}"}} {self.stage_count[name]}')
+            for name in sorted(self.counters):
+                lines.append(f'# TYPE voice_dictation_{name}_total counter')
+                lines.append(f'voice_dictation_{name}_total {self.counters[name]}')
+            lines.append('# TYPE voice_dictation_last_session_seconds gauge')
+            for span in self.last_session.get('spans', []):
+                lines.append(f'voice_dictation_last_session_seconds{{stage="{span["name"]}"}} '
+                             f'{span["duration_ms"] / 1000:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def _start_metrics_server(self, port: int) -> None:
+        """Serve /metrics from a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = tracer.metrics_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.metrics_server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+        except OSError as e:
+            print(f"⚠️  Could not start metrics endpoint on port {port}: {e}")
+            return
+        threading.Thread(target=self.metrics_server.serve_forever, daemon=True).start()
+        print(f"📈 Metrics on http://127.0.0.1:{port}/metrics")
+
+    def close(self) -> None:
+        """Stop the metrics endpoint."""
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Transcript cache for Voice Dictation
+Reuses transcripts of identical or near-identical audio instead of decoding again
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache/voice-dictation/transcripts.json'
+
+# Spectral signature layout: frames over the clip x log-spaced speech bands
+SIGNATURE_FRAMES = 24
+SIGNATURE_BANDS = np.geomspace(200.0, 4000.0, 13)
+# Stored with each signature; entries of an older layout never match fuzzily
+SIGNATURE_VERSION = 2
+# Smallest spread of the band envelopes (log10 energy) that counts as speech;
+# stationary noise and silence stay far below, so they get no signature
+MIN_MODULATION = 0.4
+
+
+def audio_signature(samples: np.ndarray, sample_rate: int) -> Optional[str]:
+    """
+    Compute a compact spectral signature that survives small differences.
+
+    The clip is divided into a fixed number of frames and the log energy of
+    each speech band is taken per frame. Every band's mean is removed, so
+    only how the spectrum changes over time remains (not the level or the
+    spectral tilt of microphone and background noise); the matrix is then
+    scaled and quantized to int8. Repeating the same short phrase gives a
+    similar matrix even though the samples differ (noise, level, slightly
+    different timing).
+
+    Args:
+        samples: Mono int16 samples
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Hex string of the quantized signature, or None if the clip is too
+        short or too stationary to be speech
+    """
+    frame_len = len(samples) // SIGNATURE_FRAMES
+    if frame_len < 256:
+        return None
+    frames = samples[:frame_len * SIGNATURE_FRAMES].reshape(SIGNATURE_FRAMES, frame_len).astype(np.float32)
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame_len), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame_len, 1.0 / sample_rate)
+    edges = np.searchsorted(freqs, SIGNATURE_BANDS)
+    energies = np.add.reduceat(spectrum, edges[:-1], axis=1)[:, :len(edges) - 1]
+    features = np.log10(energies + 1e3)
+    features -= features.mean(axis=0)
+    if float(features.std()) < MIN_MODULATION:
+        return None
+    features /= np.abs(features).max() + 1e-9
+    return np.rint(features * 127).astype(np.int8).tobytes().hex()
+
+
+def signature_distance(a: str, b: str) -> float:
+    """Cosine distance between two signatures (0.0 = identical, ~1.0 = unrelated)."""
+    vec_a = np.frombuffer(bytes.fromhex(a), dtype=np.int8).astype(np.float32)
+    vec_b = np.frombuffer(bytes.fromhex(b), dtype=np.int8).astype(np.float32)
+    if len(vec_a) != len(vec_b):
+        return 1.0
+    norm = float(np.linalg.norm(vec_a) * np.linalg.norm(vec_b))
+    if norm == 0.0:
+        return 1.0
+    return 1.0 - float(np.dot(vec_a, vec_b)) / norm
+
+
+class TranscriptCache:
+    """
+    LRU cache from audio (plus model and language) to transcript, persisted on disk.
+
+    Exact repeats (retries, benchmark replays) are found by a hash of the
+    PCM data. Short final utterances with speech are also matched by
+    spectral signature so a repeated voice command returns without decoding;
+    callers only ask for that on VAD-trimmed clips of a finished recording.
+    """
+
+    def __init__(self, path: Optional[Path] = None, capacity: int = 500,
+                 fuzzy_max_seconds: float = 3.0, max_distance: float = 0.15):
+        """
+        Initialize the cache and load the on-disk store.
+
+        Args:
+            path: Cache file (default: ~/.cache/voice-dictation/transcripts.json)
+            capacity: Maximum number of entries before the least recently used is evicted
+            fuzzy_max_seconds: Only clips up to this length are matched by signature (0 disables)
+            max_distance: Largest signature distance that counts as the same phrase
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.capacity = capacity
+        self.fuzzy_max_seconds = fuzzy_max_seconds
+        self.max_distance = max_distance
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # Serializes background writes
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Read the on-disk store (missing or corrupt files start empty)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in stored.get('entries', [])[-self.capacity:]:
+            self.entries[entry['key']] = entry
+
+    def _save(self) -> None:
+        """Write the store atomically."""
+        with self.lock:
+            data = {'entries': list(self.entries.values())}
+        with self.save_lock:
+            self._write(data)
+
+    def _write(self, data: dict) -> None:
+        """Replace the cache file with data."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not write transcript cache: {e}")
+
+    @staticmethod
+    def _key(pcm, model: str, language: str) -> str:
+        """Content address of the audio for one model and language."""
+        digest = hashlib.sha1(pcm)
+        digest.update(f'|{model}|{language}'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _describe(self, pcm, sample_rate: int, model: str, language: str, fuzzy: bool) -> dict:
+        """Build the lookup record (key, duration, signature) of a clip."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        seconds = len(samples) / sample_rate
+        signature = None
+        if fuzzy and seconds <= self.fuzzy_max_seconds:
+            signature = audio_signature(samples, sample_rate)
+        return {
+            'key': self._key(pcm, model, language),
+            'model': model,
+            'language': language,
+            'seconds': round(seconds, 3),
+            'signature': signature,
+            'signature_version': SIGNATURE_VERSION if signature else None,
+        }
+
+    def lookup(self, pcm, sample_rate: int, model: str, language: str, fuzzy: bool = False) -> Optional[str]:
+        """
+        Return the cached transcript for the clip, if any.
+
+        Args:
+            pcm: Mono 16-bit PCM data
+            sample_rate: Sample rate in Hz
+            model: Model (or tier specification, with quantization) that would decode the clip
+            language: Recognition language
+            fuzzy: Also match similar clips (final, trimmed utterances with speech only)
+
+        Returns:
+            Cached transcript or None on a miss
+        """
+        probe = self._describe(pcm, sample_rate, model, language, fuzzy)
+        with self.lock:
+            entry = self.entries.get(probe['key'])
+            if entry is None and probe['signature'] is not None:
+                entry = self._closest(probe)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(entry['key'])
+            self.hits += 1
+            return entry['text']
+
+    def _closest(self, probe: dict) -> Optional[dict]:
+        """Most similar short clip of the same model and language within max_distance."""
+        best, best_distance = None, self.max_distance
+        for entry in self.entries.values():
+            if entry.get('signature') is None or entry.get('signature_version') != SIGNATURE_VERSION or \
+                    entry['model'] != probe['model'] or entry['language'] != probe['language']:
+                continue
+            # Repeats of a phrase have a similar length
+            if abs(entry['seconds'] - probe['seconds']) > 0.2 * max(entry['seconds'], probe['seconds']):
+                continue
+            distance = signature_distance(entry['signature'], probe['signature'])
+            if distance <= best_distance:
+                best, best_distance = entry, distance
+        return best
+
+    def store(self, pcm, sample_rate: int, model: str, language: str, text: str, fuzzy: bool = False) -> None:
+        """
+        Remember a transcript and persist the cache in the background.
+
+        Args:
+            pcm: Mono 16-bit PCM data that was decoded
+            sample_rate: Sample rate in Hz
+            model: Model (or tier specification, with quantization) that decoded the clip
+            language: Recognition language
+            text: Transcript
+            fuzzy: Store a signature so similar clips match later (as for lookup)
+        """
+        entry = self._describe(pcm, sample_rate, model, language, fuzzy)
+        entry['text'] = text
+        with self.lock:
+            self.entries[entry['key']] = entry
+            self.entries.move_to_end(entry['key'])
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        threading.Thread(target=self._save, daemon=True).start()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Voice activity detection for Voice Dictation
+Pluggable detectors that decide per audio chunk whether speech is present
+"""
+
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+try:
+    import webrtcvad
+    HAS_WEBRTCVAD = True
+except ImportError:
+    HAS_WEBRTCVAD = False
+
+
+class EnergyVad:
+    """
+    Energy detector with adaptive threshold and hangover smoothing.
+
+    Each chunk is viewed as a matrix of short sub-frames; the energies of all
+    sub-frames are computed in one vectorized call into preallocated buffers,
+    so processing a chunk allocates no arrays.
+    """
+
+    def __init__(self, sample_rate: int, chunk_size: int = 1024, threshold: float = 500.0,
+                 threshold_factor: float = 3.0, max_threshold: float = 15000.0,
+                 hangover: float = 0.3, onset_frames: int = 2, subframes: int = 4,
+                 noise_window: float = 5.0):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate: Sample rate of the audio
+            chunk_size: Samples per processed chunk
+            threshold: Configured silence threshold (RMS), used as lower bound
+            threshold_factor: Adaptive threshold as multiple of the noise floor
+            max_threshold: Upper bound of the adaptive threshold
+            hangover: Seconds speech state is held after the last speech chunk
+            onset_frames: Consecutive speech sub-frames required to trigger speech
+            subframes: Number of sub-frames each chunk is split into
+            noise_window: Seconds of idle audio the tracked noise floor is taken from
+        """
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.base_threshold = float(threshold)
+        self.threshold = float(threshold)
+        self.threshold_factor = threshold_factor
+        self.max_threshold = max(float(max_threshold), self.base_threshold)
+        self.hangover_chunks = max(0, int(round(hangover * sample_rate / chunk_size)))
+        self.onset_frames = onset_frames
+        self.subframes = subframes
+        self.subframe_size = chunk_size // subframes
+
+        self.work = np.zeros((subframes, self.subframe_size), dtype=np.float32)
+        self.energies = np.zeros(subframes, dtype=np.float32)
+        self.noise_levels = []
+        self.noise_floor: Optional[float] = None
+        # Levels of idle audio between sessions (warm capture), survives reset()
+        self.noise_history = deque(maxlen=max(1, int(noise_window * sample_rate / chunk_size)))
+        self.level = 0.0  # RMS of the last chunk
+        self.hangover_left = 0
+
+    def reset(self) -> None:
+        """Reset per-session state (calibration and smoothing)."""
+        self.threshold = self.base_threshold
+        self.noise_levels = []
+        self.noise_floor = None
+        self.level = 0.0
+        self.hangover_left = 0
+
+    def _load(self, data: bytes) -> bool:
+        """Copy a chunk into the work matrix and compute sub-frame energies."""
+        samples = np.frombuffer(data, dtype=np.int16)
+        usable = self.subframes * self.subframe_size
+        if len(samples) < usable:
+            return False
+        np.copyto(self.work, samples[:usable].reshape(self.work.shape), casting='unsafe')
+        np.einsum('ij,ij->i', self.work, self.work, out=self.energies)
+        self.energies /= self.subframe_size
+        self.level = float(np.sqrt(self.energies.mean()))
+        return True
+
+    def calibrate(self, data: bytes) -> None:
+        """Feed a chunk of background noise for noise floor estimation."""
+        if self._load(data):
+            self.noise_levels.append(self.level)
+
+    def finish_calibration(self) -> None:
+        """Derive the adaptive threshold from the collected noise levels."""
+        if not self.noise_levels:
+            return
+        # Median ignores outliers such as clicks during calibration
+        self._set_noise_floor(float(np.median(self.noise_levels)))
+
+    def _set_noise_floor(self, noise_floor: float) -> None:
+        """Set the noise floor and the adaptive threshold derived from it."""
+        self.noise_floor = noise_floor
+        adaptive = self.noise_floor * self.threshold_factor
+        self.threshold = min(max(self.base_threshold, adaptive), self.max_threshold)
+
+    def track_noise(self, data: bytes) -> None:
+        """Feed a chunk of idle audio to the continuously tracked noise floor."""
+        if self._load(data):
+            self.noise_history.append(self.level)
+
+    def use_tracked_noise(self) -> bool:
+        """
+        Take the noise floor from the tracked idle audio instead of calibrating.
+
+        A low percentile is used, so speech or typing noise between sessions
+        does not raise the floor.
+
+        Returns:
+            True if enough idle audio was tracked (the VAD is calibrated)
+        """
+        if len(self.noise_history) < max(1, self.noise_history.maxlen // 4):
+            return False
+        self._set_noise_floor(float(np.percentile(self.noise_history, 20)))
+        return True
+
+    @property
+    def calibrated(self) -> bool:
+        """True once the noise floor has been measured."""
+        return self.noise_floor is not None
+
+    def _frame_decisions(self) -> np.ndarray:
+        """Per sub-frame speech decision of the loaded chunk."""
+        return self.energies > self.threshold * self.threshold
+
+    def _raw_decision(self) -> bool:
+        """Speech decision of the loaded chunk before smoothing."""
+        voiced = self._frame_decisions()
+        if self.onset_frames <= 1:
+            return bool(voiced.any())
+        # Require onset_frames consecutive voiced sub-frames (rejects single clicks)
+        run = 0
+        for value in voiced:
+            run = run + 1 if value else 0
+            if run >= self.onset_frames:
+                return True
+        return False
+
+    def process(self, data: bytes) -> bool:
+        """
+        Classify one chunk.
+
+        Args:
+            data: Chunk of 16-bit PCM audio
+
+        Returns:
+            True if the chunk counts as speech (including hangover)
+        """
+        if not self._load(data):
+            return self.hangover_left > 0
+        if self._raw_decision():
+            self.hangover_left = self.hangover_chunks
+            return True
+        if self.hangover_left > 0:
+            self.hangover_left -= 1
+            return True
+        return False
+
+
+class SpectralVad(EnergyVad):
+    """
+    Energy detector gated by the share of energy in the speech band (80-4000 Hz).
+
+    Broadband noise (fans, keyboard clicks) and mains hum rarely concentrate
+    their energy in the speech band, so loud non-speech chunks are rejected. The band energy
+    is computed with a precomputed windowed DFT matrix, again without
+    allocating per chunk.
+    """
+
+    def __init__(self, sample_rate: int, chunk_size: int = 1024, min_band_ratio: float = 0.6,
+                 band: tuple = (80.0, 4000.0), **kwargs):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate: Sample rate of the audio
+            chunk_size: Samples per processed chunk
+            min_band_ratio: Minimum share of energy in the speech band
+            band: Speech band edges in Hz
+            **kwargs: Passed to EnergyVad
+        """
+        super().__init__(sample_rate, chunk_size, **kwargs)
+        self.min_band_ratio = min_band_ratio
+
+        n = self.chunk_size
+        freqs = np.arange(n // 2 + 1) * sample_rate / n
+        bins = np.nonzero((freqs >= band[0]) & (freqs <= min(band[1], sample_rate / 2)))[0]
+        window = np.hanning(n).astype(np.float32)
+        phase = 2.0 * np.pi * np.outer(bins, np.arange(n)) / n
+        self.dft_cos = (np.cos(phase) * window).astype(np.float32)
+        self.dft_sin = (np.sin(phase) * window).astype(np.float32)
+        self.window_power = np.zeros(n, dtype=np.float32)
+        self.window = window
+        self.band_re = np.zeros(len(bins), dtype=np.float32)
+        self.band_im = np.zeros(len(bins), dtype=np.float32)
+        self.band_ratio = 0.0
+
+    def _raw_decision(self) -> bool:
+        """Energy decision confirmed by the speech band energy ratio."""
+        if not super()._raw_decision():
+            return False
+        chunk = self.work.reshape(-1)
+        np.matmul(self.dft_cos, chunk, out=self.band_re)
+        np.matmul(self.dft_sin, chunk, out=self.band_im)
+        np.multiply(chunk, self.window, out=self.window_power)
+        total = float(np.dot(self.window_power, self.window_power)) * len(chunk)
+        if total <= 0.0:
+            return False
+        band = 2.0 * (float(np.dot(self.band_re, self.band_re)) + float(np.dot(self.band_im, self.band_im)))
+        self.band_ratio = band / total
+        return self.band_ratio >= self.min_band_ratio
+
+
+class WebRtcVad(EnergyVad):
+    """Energy detector gated by the WebRTC GMM voice detector (optional dependency)."""
+
+    FRAME_MS = 30
+
+    def __init__(self, sample_rate: int, chunk_size: int = 1024, aggressiveness: int = 2, **kwargs):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate: Sample rate (8000, 16000, 32000 or 48000)
+            chunk_size: Samples per processed chunk
+            aggressiveness: WebRTC mode 0 (permissive) to 3 (aggressive)
+            **kwargs: Passed to EnergyVad
+        """
+        if not HAS_WEBRTCVAD:
+            raise ValueError("webrtcvad is not installed")
+        if sample_rate not in (8000, 16000, 32000, 48000):
+            raise ValueError(f"webrtcvad does not support {sample_rate} Hz")
+        super().__init__(sample_rate, chunk_size, **kwargs)
+        self.detector = webrtcvad.Vad(aggressiveness)
+        self.frame_bytes = sample_rate * self.FRAME_MS // 1000 * 2
+        self.pending = bytearray()
+        self.webrtc_voiced = False
+
+    def reset(self) -> None:
+        """Reset per-session state."""
+        super().reset()
+        self.pending.clear()
+
+    def process(self, data: bytes) -> bool:
+        """Feed the chunk to webrtcvad before the energy decision."""
+        self.pending += data
+        self.webrtc_voiced = False
+        offset = 0
+        while offset + self.frame_bytes <= len(self.pending):
+            frame = bytes(self.pending[offset:offset + self.frame_bytes])
+            self.webrtc_voiced = self.webrtc_voiced or self.detector.is_speech(frame, self.sample_rate)
+            offset += self.frame_bytes
+        del self.pending[:offset]
+        return super().process(data)
+
+    def _raw_decision(self) -> bool:
+        """Energy decision confirmed by webrtcvad."""
+        return super()._raw_decision() and self.webrtc_voiced
+
+
+VAD_ENGINES = {
+    'energy': EnergyVad,
+    'spectral': SpectralVad,
+    'webrtc': WebRtcVad,
+}
+
+
+def create_vad(name: str, sample_rate: int, chunk_size: int = 1024, **kwargs) -> EnergyVad:
+    """
+    Create a voice activity detector by name.
+
+    Falls back to the spectral detector if the requested engine is unknown
+    or unavailable.
+
+    Args:
+        name: Engine name ('energy', 'spectral' or 'webrtc')
+        sample_rate: Sample rate of the audio
+        chunk_size: Samples per processed chunk
+        **kwargs: Engine options (threshold, hangover, ...)
+
+    Returns:
+        Detector instance
+    """
+    engine = VAD_ENGINES.get(name)
+    if engine is None:
+        print(f"⚠️  Unknown VAD engine '{name}', using spectral")
+        engine = SpectralVad
+    try:
+        return engine(sample_rate, chunk_size, **kwargs)
+    except ValueError as e:
+        print(f"⚠️  VAD engine '{name}' unavailable ({e}), using spectral")
+        return SpectralVad(sample_rate, chunk_size, **kwargs)
+
+
+def find_speech_bounds(samples: np.ndarray, threshold: float, frame_size: int,
+                       skip: int = 0) -> Optional[tuple]:
+    """
+    Locate the first and last frame above the threshold in one vectorized pass.
+
+    Args:
+        samples: int16 audio samples
+        threshold: RMS level that counts as speech
+        frame_size: Samples per analysis frame
+        skip: Leading samples to ignore (e.g. the stream initialization spike)
+
+    Returns:
+        Tuple (start, end) of sample positions, or None if no frame is above the threshold
+    """
+    usable = (len(samples) - skip) // frame_size
+    if usable <= 0:
+        return None
+    frames = samples[skip:skip + usable * frame_size].reshape(usable, frame_size).astype(np.float32)
+    energies = np.einsum('ij,ij->i', frames, frames) / frame_size
+    voiced = np.flatnonzero(energies > threshold * threshold)
+    if len(voiced) == 0:
+        return None
+    return skip + int(voiced[0]) * frame_size, skip + (int(voiced[-1]) + 1) * frame_size
@@ -112,6 +112,13 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         lang_row.connect('notify::selected', self._on_language_changed, languages)
         lang_group.add(lang_row)
         
+        # Spoken punctuation
+        punctuation_row = Adw.SwitchRow()
+        punctuation_row.set_title('Spoken punctuation')
+        punctuation_row.set_subtitle('Say "Komma", "Punkt" or "neue Zeile" to insert punctuation')
+        self.settings.bind('spoken-punctuation', punctuation_row, 'active', Gio.SettingsBindFlags.DEFAULT)
+        lang_group.add(punctuation_row)
+        
         page.add(lang_group)
         
         # Model Group
@@ -146,6 +153,32 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         model_row.connect('notify::selected', self._on_model_changed, models)
         model_group.add(model_row)
         
+        # Quantization ComboRow
+        quant_row = Adw.ComboRow()
+        quant_row.set_title('Quantization')
+        quant_row.set_subtitle('Smaller, faster model files; converted or downloaded in the background')
+        
+        quant_model = Gtk.StringList()
+        quantizations = [
+            ('Off (original model)', ''),
+            ('Q8_0 (near original quality)', 'q8_0'),
+            ('Q5_1 (about a third of the size)', 'q5_1'),
+            ('Q5_0 (smaller)', 'q5_0'),
+        ]
+        
+        current_quant = self.settings.get_string('model-quantization')
+        selected_index = 0
+        
+        for i, (name, code) in enumerate(quantizations):
+            quant_model.append(name)
+            if code == current_quant:
+                selected_index = i
+        
+        quant_row.set_model(quant_model)
+        quant_row.set_selected(selected_index)
+        quant_row.connect('notify::selected', self._on_quantization_changed, quantizations)
+        model_group.add(quant_row)
+        
         page.add(model_group)
         
         self.add(page)
@@ -164,7 +197,7 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         # Silence Threshold
         threshold_row = Adw.SpinRow.new_with_range(100, 2000, 50)
         threshold_row.set_title('Silence Threshold')
-        threshold_row.set_subtitle('RMS value below which silence is detected')
+        threshold_row.set_subtitle('Minimum RMS level that counts as speech')
         self.settings.bind('silence-threshold', threshold_row, 'value', Gio.SettingsBindFlags.DEFAULT)
         silence_group.add(threshold_row)
         
@@ -176,6 +209,31 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         self.settings.bind('silence-duration', duration_row, 'value', Gio.SettingsBindFlags.DEFAULT)
         silence_group.add(duration_row)
         
+        # Voice activity detector
+        vad_row = Adw.ComboRow()
+        vad_row.set_title('Speech Detector')
+        vad_row.set_subtitle('How speech is told apart from background noise')
+        
+        vad_model = Gtk.StringList()
+        vad_engines = [
+            ('Energy (fastest)', 'energy'),
+            ('Energy + Spectrum (recommended)', 'spectral'),
+            ('WebRTC VAD', 'webrtc'),
+        ]
+        
+        current_vad = self.settings.get_string('vad-engine')
+        selected_index = 1  # default to spectral
+        
+        for i, (name, code) in enumerate(vad_engines):
+            vad_model.append(name)
+            if code == current_vad:
+                selected_index = i
+        
+        vad_row.set_model(vad_model)
+        vad_row.set_selected(selected_index)
+        vad_row.connect('notify::selected', self._on_vad_changed, vad_engines)
+        silence_group.add(vad_row)
+        
         page.add(silence_group)
         
         # Sample Rate Group
@@ -185,10 +243,11 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         # Sample Rate
         sample_row = Adw.ComboRow()
         sample_row.set_title('Sample-Rate')
-        sample_row.set_subtitle('Audio sample rate (Whisper requires 16000 Hz)')
+        sample_row.set_subtitle('Capture rate, converted to the 16 kHz Whisper requires')
         
         sample_model = Gtk.StringList()
         sample_rates = [
+            ('Device native rate (recommended)', 0),
             ('16 kHz (Whisper Standard)', 16000),
             ('44.1 kHz (CD Qualität)', 44100),
             ('48 kHz (Studio Qualität)', 48000),
@@ -207,6 +266,20 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         sample_row.connect('notify::selected', self._on_sample_rate_changed, sample_rates)
         sample_group.add(sample_row)
         
+        # Input device
+        device_row = Adw.EntryRow()
+        device_row.set_title('Microphone (auto, index or part of the device name)')
+        device_row.set_text(self.settings.get_string('input-device'))
+        device_row.connect('changed', self._on_input_device_changed)
+        sample_group.add(device_row)
+        
+        # Parallel microphones
+        multi_row = Adw.SwitchRow()
+        multi_row.set_title('Use all microphones')
+        multi_row.set_subtitle('Record laptop, headset and USB microphones at once, use the clearest')
+        self.settings.bind('multi-mic', multi_row, 'active', Gio.SettingsBindFlags.DEFAULT)
+        sample_group.add(multi_row)
+        
         page.add(sample_group)
         
         self.add(page)
@@ -238,6 +311,76 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         
         page.add(paths_group)
         
+        # Performance Group
+        performance_group = Adw.PreferencesGroup()
+        performance_group.set_title('Performance')
+        performance_group.set_description('Reduce the delay until text appears')
+        
+        # Streaming transcription
+        streaming_row = Adw.SwitchRow()
+        streaming_row.set_title('Streaming transcription')
+        streaming_row.set_subtitle('Transcribe while you are still speaking')
+        self.settings.bind('streaming', streaming_row, 'active', Gio.SettingsBindFlags.DEFAULT)
+        performance_group.add(streaming_row)
+        
+        # Long-form dictation
+        longform_row = Adw.SwitchRow()
+        longform_row.set_title('Long-form dictation')
+        longform_row.set_subtitle('Type each sentence at pauses, no time limit')
+        self.settings.bind('long-form', longform_row, 'active', Gio.SettingsBindFlags.DEFAULT)
+        performance_group.add(longform_row)
+        
+        # Speculative endpointing
+        speculative_row = Adw.SwitchRow()
+        speculative_row.set_title('Speculative endpointing')
+        speculative_row.set_subtitle('Start transcribing at short pauses, before the silence timeout')
+        self.settings.bind('speculative-endpointing', speculative_row, 'active', Gio.SettingsBindFlags.DEFAULT)
+        performance_group.add(speculative_row)
+        
+        # Warm capture
+        warm_row = Adw.SwitchRow()
+        warm_row.set_title('Keep microphone open')
+        warm_row.set_subtitle('Daemon mode: never miss the first word, no calibration delay')
+        self.settings.bind('warm-capture', warm_row, 'active', Gio.SettingsBindFlags.DEFAULT)
+        performance_group.add(warm_row)
+        
+        # Model tiers
+        tiers_row = Adw.EntryRow()
+        tiers_row.set_title('Model tiers (e.g. tiny:4,base:12,small)')
+        tiers_row.set_text(self.settings.get_string('model-tiers'))
+        tiers_row.connect('changed', self._on_model_tiers_changed)
+        performance_group.add(tiers_row)
+        
+        # Text insertion method
+        injection_row = Adw.ComboRow()
+        injection_row.set_title('Text insertion')
+        injection_row.set_subtitle('Method used to insert the recognized text')
+        
+        injection_model = Gtk.StringList()
+        injection_backends = [
+            ('Automatic', 'auto'),
+            ('wtype (Wayland)', 'wtype'),
+            ('xdotool (X11)', 'xdotool'),
+            ('ydotool (uinput)', 'ydotool'),
+            ('Clipboard paste', 'clipboard'),
+            ('Key events (pynput, slow)', 'pynput'),
+        ]
+        
+        current_backend = self.settings.get_string('injection-backend')
+        selected_index = 0
+        
+        for i, (name, code) in enumerate(injection_backends):
+            injection_model.append(name)
+            if code == current_backend:
+                selected_index = i
+        
+        injection_row.set_model(injection_model)
+        injection_row.set_selected(selected_index)
+        injection_row.connect('notify::selected', self._on_injection_changed, injection_backends)
+        performance_group.add(injection_row)
+        
+        page.add(performance_group)
+        
         # Info Group
         info_group = Adw.PreferencesGroup()
         info_group.set_title('Information')
@@ -279,6 +422,27 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
             _, model_code = models[selected]
             self.settings.set_string('model', model_code)
     
+    def _on_quantization_changed(self, combo, _pspec, quantizations):
+        """Handle model quantization change."""
+        selected = combo.get_selected()
+        if selected != Gtk.INVALID_LIST_POSITION:
+            _, qtype = quantizations[selected]
+            self.settings.set_string('model-quantization', qtype)
+    
+    def _on_vad_changed(self, combo, _pspec, engines):
+        """Handle speech detector change."""
+        selected = combo.get_selected()
+        if selected != Gtk.INVALID_LIST_POSITION:
+            _, engine = engines[selected]
+            self.settings.set_string('vad-engine', engine)
+    
+    def _on_injection_changed(self, combo, _pspec, backends):
+        """Handle text insertion method change."""
+        selected = combo.get_selected()
+        if selected != Gtk.INVALID_LIST_POSITION:
+            _, backend = backends[selected]
+            self.settings.set_string('injection-backend', backend)
+    
     def _on_sample_rate_changed(self, combo, _pspec, rates):
         """Handle sample rate change."""
         selected = combo.get_selected()
@@ -286,6 +450,10 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
             _, rate = rates[selected]
             self.settings.set_int('sample-rate', rate)
     
+    def _on_input_device_changed(self, entry):
+        """Handle input device change (empty selects automatically)."""
+        self.settings.set_string('input-device', entry.get_text().strip() or 'auto')
+    
     def _on_whisper_path_changed(self, entry):
         """Handle whisper path change."""
         text = entry.get_text()
@@ -298,6 +466,10 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         if text:
             self.settings.set_string('model-path', text)
     
+    def _on_model_tiers_changed(self, entry):
+        """Handle model tiers change (empty disables tiering)."""
+        self.settings.set_string('model-tiers', entry.get_text().strip())
+    
     def _on_autostart_changed(self, switch, _pspec):
         """Handle autostart toggle."""
         autostart_dir = os.path.expanduser('~/.config/autostart')
@@ -306,8 +478,8 @@ class VoiceDictationSettings(Adw.PreferencesWindow):
         if switch.get_active():
             # Enable autostart
             os.makedirs(autostart_dir, exist_ok=True)
-            # Copy desktop file
-            source = '/usr/share/applications/voice-dictation.desktop'
+            # Copy the daemon entry: the model stays loaded from login on
+            source = '/usr/share/voice-dictation/voice-dictation-daemon.desktop'
             if os.path.exists(source):
                 import shutil
                 shutil.copy(source, desktop_file)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Warm microphone capture for Voice Dictation
+Keeps the input stream open between daemon sessions with a rolling pre-roll buffer
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from audio_devices import topology_fingerprint
+
+
+class WarmCapture:
+    """
+    Always-open input stream that is handed to a session on the hotkey.
+
+    While idle, a monitor thread reads the stream, keeps the last
+    ``preroll_seconds`` of audio and feeds the VAD's noise tracker. A session
+    takes over the stream with ``acquire`` (getting the pre-roll) and hands it
+    back with ``release``; the monitor checks the handover flag under a lock,
+    so the stream never has two readers.
+    """
+
+    def __init__(self, open_stream: Callable[[], object], read_chunk: Callable[[object], bytes],
+                 vad, chunk_seconds: float, preroll_seconds: float = 0.3,
+                 topology_interval: float = 5.0, retry_interval: float = 2.0):
+        """
+        Initialize the capture (the stream is opened by ``start``).
+
+        Args:
+            open_stream: Opens the input stream on the selected device
+            read_chunk: Reads one chunk at the target rate from a stream
+            vad: Voice activity detector whose noise floor is tracked
+            chunk_seconds: Duration of one chunk
+            preroll_seconds: Audio before the hotkey that is kept for the session
+            topology_interval: Seconds between checks for hot-plugged devices
+            retry_interval: Seconds to wait before reopening a failed stream
+        """
+        self.open_stream = open_stream
+        self.read_chunk = read_chunk
+        self.vad = vad
+        self.preroll = deque(maxlen=max(1, int(round(preroll_seconds / chunk_seconds))))
+        self.topology_interval = topology_interval
+        self.retry_interval = retry_interval
+        self.stream = None
+        self.fingerprint = None
+        self.next_check = 0.0  # Next topology check (monotonic time)
+        self.lock = threading.Lock()  # Held by the monitor while it reads
+        self.listening = threading.Event()  # Set while the monitor owns the stream
+        self.running = False
+        self.thread = None
+
+    def start(self) -> None:
+        """Start the monitor thread, which opens the stream."""
+        self.running = True
+        self.listening.set()
+        self.thread = threading.Thread(target=self._monitor, daemon=True)
+        self.thread.start()
+
+    def _open(self) -> bool:
+        """Open the stream, returns False on failure."""
+        try:
+            self.fingerprint = topology_fingerprint()
+            self.stream = self.open_stream()
+            self.preroll.clear()
+            self.next_check = time.monotonic() + self.topology_interval
+            return True
+        except Exception as e:
+            print(f"⚠️  Warm capture could not open the microphone: {e}")
+            self.stream = None
+            return False
+
+    def _close(self) -> None:
+        """Close the stream."""
+        if self.stream is not None:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except OSError:
+                pass
+            self.stream = None
+
+    def _monitor(self) -> None:
+        """Idle loop: keep the pre-roll and the noise floor current."""
+        while self.running:
+            if not self.listening.wait(0.5):
+                continue
+            with self.lock:
+                opened = self._read_idle()
+            if not opened:
+                time.sleep(self.retry_interval)
+
+    def _read_idle(self) -> bool:
+        """
+        Read one chunk while no session owns the stream (called with the lock held).
+
+        Returns:
+            False if the stream could not be opened
+        """
+        if not self.listening.is_set() or not self.running:
+            return True
+        if self.stream is None and not self._open():
+            return False
+        if time.monotonic() >= self.next_check:
+            self.next_check = time.monotonic() + self.topology_interval
+            if topology_fingerprint() != self.fingerprint:
+                # Hot-plugged device: re-select on the new topology
+                print("🔌 Audio devices changed - reopening warm capture")
+                self._close()
+                return True
+        try:
+            data = self.read_chunk(self.stream)
+        except Exception as e:
+            print(f"⚠️  Warm capture failed: {e}")
+            self._close()
+            return True
+        self.preroll.append(data)
+        self.vad.track_noise(data)
+        return True
+
+    def acquire(self) -> Optional[Tuple[object, List[bytes]]]:
+        """
+        Take over the stream for a session.
+
+        Returns:
+            (stream, pre-roll chunks oldest first), or None if no stream is open
+        """
+        self.listening.clear()
+        with self.lock:
+            if self.stream is None:
+                self.listening.set()
+                return None
+            chunks = list(self.preroll)
+            self.preroll.clear()
+            return self.stream, chunks
+
+    def release(self, failed: bool = False) -> None:
+        """
+        Hand the stream back to the monitor after recording.
+
+        Args:
+            failed: The session could not read from the stream, reopen it
+        """
+        if failed:
+            with self.lock:
+                self._close()
+        self.listening.set()
+
+    def reopen(self) -> None:
+        """Close the idle stream so the monitor reopens it with the current settings."""
+        with self.lock:
+            self._close()
+
+    def stop(self) -> None:
+        """Stop the monitor and close the stream."""
+        self.running = False
+        self.listening.set()
+        if self.thread is not None:
+            self.thread.join(timeout=3)
+            self.thread = None
+        with self.lock:
+            self._close()
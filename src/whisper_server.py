@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Resident whisper.cpp server for Voice Dictation
+Keeps the ggml model loaded between dictation sessions
+"""
+
+import json
+import os
+import socket
+import subprocess
+import time
+import uuid
+from typing import List, Optional
+
+from audio_buffer import wav_header
+from cpu_tuning import apply_process_tuning
+from recognition import plain_text
+
+
+class WhisperServer:
+    """Manage a long-lived ``whisper-server`` process with the model pre-loaded."""
+
+    def __init__(self, server_path: str, model_file: str, language: str = 'de',
+                 threads: Optional[int] = None, host: str = '127.0.0.1',
+                 cpus: Optional[List[int]] = None, nice: int = 0, ioprio: Optional[int] = None,
+                 timestamps: bool = False):
+        """
+        Initialize the server wrapper (the process is started by ``start``).
+
+        Args:
+            server_path: Path to the whisper-server executable
+            model_file: Path to the ggml model file to keep loaded
+            language: Recognition language passed to the server
+            threads: Number of decode threads (default: all cores)
+            host: Interface the HTTP server binds to
+            cpus: CPUs the server's decode threads may use (None = unpinned)
+            nice: Nice value of the server process
+            ioprio: Best-effort I/O priority level 0-7 (None = unchanged)
+            timestamps: Compute timestamps (needed for word times in verbose_json);
+                plain json requests still ask for text without them
+        """
+        self.server_path = server_path
+        self.model_file = model_file
+        self.language = language
+        self.threads = threads or max(1, os.cpu_count() or 1)
+        self.host = host
+        self.cpus = cpus
+        self.nice = nice
+        self.ioprio = ioprio
+        self.timestamps = timestamps
+        self.port = None
+        self.process = None
+
+    @staticmethod
+    def find_executable(whisper_cli_path: str) -> Optional[str]:
+        """Locate whisper-server next to whisper-cli or in common locations."""
+        possible_paths = [
+            os.path.join(os.path.dirname(whisper_cli_path), 'whisper-server'),
+            os.path.expanduser('~/.local/bin/whisper-server'),
+            '/usr/bin/whisper-server',
+            '/usr/local/bin/whisper-server',
+        ]
+        for path in possible_paths:
+            if os.path.exists(path) and os.access(path, os.X_OK):
+                return path
+        return None
+
+    @staticmethod
+    def _free_port() -> int:
+        """Ask the kernel for an unused local TCP port."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def _build_command(self) -> List[str]:
+        """Build the whisper-server command line."""
+        cmd = [
+            self.server_path,
+            '-m', self.model_file,
+            '--language', self.language,
+            '--threads', str(self.threads),
+            '--host', self.host,
+            '--port', str(self.port),
+        ]
+        if not self.timestamps:
+            cmd.append('--no-timestamps')
+        return cmd
+
+    def is_running(self) -> bool:
+        """Return True if the server process is alive."""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout: float = 120.0) -> bool:
+        """
+        Start the server and wait until the model is loaded.
+
+        Args:
+            timeout: Seconds to wait for the server to accept requests
+
+        Returns:
+            True if the server is ready, False otherwise
+        """
+        if self.is_running():
+            return True
+
+        self.port = self._free_port()
+        cmd = self._build_command()
+        print(f"🛠️  Starting: {' '.join(cmd)}")
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            apply_process_tuning(self.process.pid, self.cpus, nice=self.nice, ioprio=self.ioprio)
+        except OSError as e:
+            print(f"❌ Could not start whisper-server: {e}")
+            self.process = None
+            return False
+
+        import urllib.request  # Daemon mode only, not imported at startup
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.is_running():
+                print("❌ whisper-server exited during startup")
+                self.process = None
+                return False
+            try:
+                with urllib.request.urlopen(f"http://{self.host}:{self.port}/", timeout=1.0):
+                    print(f"✅ whisper-server ready on port {self.port} (model loaded)")
+                    return True
+            except OSError:  # URLError included
+                time.sleep(0.1)
+
+        print("❌ whisper-server did not become ready in time")
+        self.stop()
+        return False
+
+    def stop(self) -> None:
+        """Terminate the server process."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    @staticmethod
+    def _encode_multipart(fields: dict, file_name: str, file_parts: List[bytes]):
+        """
+        Encode form fields and one file as multipart/form-data.
+
+        The file is given as a list of buffers that are streamed as-is,
+        so the audio is never joined into an intermediate copy.
+
+        Returns:
+            Tuple of (body parts, content length, content type)
+        """
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'.encode('utf-8')
+            )
+        parts.append(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+            f'Content-Type: audio/wav\r\n\r\n'.encode('utf-8')
+        )
+        parts.extend(file_parts)
+        parts.append(f'\r\n--{boundary}--\r\n'.encode('utf-8'))
+        length = sum(len(part) for part in parts)
+        return parts, length, f'multipart/form-data; boundary={boundary}'
+
+    def _request(self, pcm, sample_rate: int, channels: int, timeout: float,
+                 response_format: str) -> Optional[dict]:
+        """
+        Send PCM audio to the /inference endpoint.
+
+        Args:
+            pcm: 16-bit PCM data (bytes, bytearray or memoryview)
+            sample_rate: Sample rate of the audio
+            channels: Number of interleaved channels
+            timeout: Request timeout in seconds
+            response_format: json (text only) or verbose_json (segments and tokens)
+
+        Returns:
+            Parsed response or None if the request failed
+        """
+        if not self.is_running():
+            return None
+
+        # Per request as well: plain text stays clean, verbose_json needs them per word
+        no_timestamps = 'false' if response_format == 'verbose_json' else 'true'
+        parts, length, content_type = self._encode_multipart(
+            {'response_format': response_format, 'language': self.language, 'temperature': '0.0',
+             'no_timestamps': no_timestamps},
+            'audio.wav',
+            [wav_header(len(pcm), sample_rate, channels), pcm],
+        )
+        import urllib.request
+
+        request = urllib.request.Request(
+            f"http://{self.host}:{self.port}/inference",
+            data=parts,
+            headers={'Content-Type': content_type, 'Content-Length': str(length)},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"❌ whisper-server request failed: {e}")
+            return None
+
+        if 'error' in payload:
+            print(f"❌ whisper-server error: {payload['error']}")
+            return None
+        return payload
+
+    def transcribe(self, pcm, sample_rate: int, channels: int = 1,
+                   timeout: float = 60.0) -> Optional[str]:
+        """
+        Transcribe in-memory PCM audio with the resident model.
+
+        Args:
+            pcm: 16-bit PCM data (bytes, bytearray or memoryview)
+            sample_rate: Sample rate of the audio
+            channels: Number of interleaved channels
+            timeout: Request timeout in seconds
+
+        Returns:
+            Transcribed text ('' if the audio holds no words), None if the request failed
+        """
+        payload = self._request(pcm, sample_rate, channels, timeout, 'json')
+        if payload is None:
+            return None
+        text = plain_text(payload.get('text', ''))
+        print(f"🧾 whisper-server raw output: {text}")
+        return text
+
+    def transcribe_verbose(self, pcm, sample_rate: int, channels: int = 1,
+                           timeout: float = 60.0) -> Optional[dict]:
+        """
+        Transcribe in-memory PCM audio with segments, token timestamps and probabilities.
+
+        Args:
+            pcm: 16-bit PCM data (bytes, bytearray or memoryview)
+            sample_rate: Sample rate of the audio
+            channels: Number of interleaved channels
+            timeout: Request timeout in seconds
+
+        Returns:
+            The ``verbose_json`` response or None if transcription failed
+        """
+        payload = self._request(pcm, sample_rate, channels, timeout, 'verbose_json')
+        if payload is not None:
+            print(f"🧾 whisper-server raw output: {payload.get('text', '').strip()}")
+        return payload
@@ -1,138 +1,130 @@
 #!/usr/bin/env python3
 """
 Test all available microphone devices
-Tries to record 2 seconds from each device and shows which ones work
+Records from all devices in parallel and ranks the working ones by signal-to-noise ratio
 """
 
-import pyaudio
-import wave
-import tempfile
+import argparse
 import os
+import sys
+import time
+import wave
+
 import numpy as np
+import pyaudio
+
+# Same capture engine as voice-dictation (repository checkout or installed package)
+for module_dir in (os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'), '/usr/share/voice-dictation'):
+    if os.path.isfile(os.path.join(module_dir, 'multi_capture.py')):
+        sys.path.insert(0, module_dir)
+        break
+
+from audio_devices import list_input_devices
+from multi_capture import MultiCapture
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+
+def record_all(capture, seconds):
+    """Record all opened devices at once, showing live levels."""
+    recordings = {source: [] for source in capture.sources}
+    for i in range(int(seconds * SAMPLE_RATE / CHUNK)):
+        for source, chunk in capture.read_sources(CHUNK).items():
+            recordings[source].append(chunk)
+        if i % 4 == 0:
+            levels = "  ".join(f"[{source.device['index']}] {source.levels[-1]:6.0f}"
+                               for source in capture.sources if source.levels)
+            print(f"  📊 RMS {levels}", end='\r', flush=True)
+    print()
+    # Devices that stopped during the test are reported as failed
+    return {source: b''.join(chunks) for source, chunks in recordings.items() if source in capture.sources}
+
+
+def save_recording(device_index, audio_data):
+    """Save a test recording as 16 kHz WAV."""
+    test_file = f"/tmp/mic-test-{device_index}.wav"
+    with wave.open(test_file, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(audio_data)
+    return test_file
 
-def test_device(p, device_index, device_name, sample_rate=16000):
-    """Test if a device can record audio."""
-    print(f"\n{'='*60}")
-    print(f"Testing device [{device_index}]: {device_name}")
-    print(f"{'='*60}")
-    
-    try:
-        # Try to open stream
-        print(f"  Opening stream at {sample_rate}Hz...")
-        stream = p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=sample_rate,
-            input=True,
-            input_device_index=device_index,
-            frames_per_buffer=1024
-        )
-        
-        print("  ✅ Stream opened successfully!")
-        print("  Recording 2 seconds...")
-        
-        frames = []
-        for i in range(0, int(sample_rate / 1024 * 2)):  # 2 seconds
-            try:
-                data = stream.read(1024, exception_on_overflow=False)
-                frames.append(data)
-            except Exception as e:
-                print(f"  ❌ Error reading: {e}")
-                stream.stop_stream()
-                stream.close()
-                return False
-        
-        stream.stop_stream()
-        stream.close()
-        
-        # Calculate RMS to check if we got actual audio
-        audio_data = b''.join(frames)
-        audio_array = np.frombuffer(audio_data, dtype=np.int16)
-        rms = np.sqrt(np.mean(audio_array.astype(np.float32) ** 2))
-        
-        print(f"  ✅ Recording successful!")
-        print(f"  📊 Average RMS: {rms:.1f}")
-        
-        if rms < 10:
-            print(f"  ⚠️  WARNING: Very low signal - might be wrong device or muted")
-        
-        # Save test file
-        test_file = f"/tmp/mic-test-{device_index}.wav"
-        with wave.open(test_file, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(sample_rate)
-            wf.writeframes(audio_data)
-        print(f"  💾 Saved test recording to: {test_file}")
-        print(f"  🎧 Play it: aplay {test_file}")
-        
-        return True
-        
-    except Exception as e:
-        print(f"  ❌ Failed: {e}")
-        return False
 
 def main():
+    parser = argparse.ArgumentParser(description="Test all microphones in parallel")
+    parser.add_argument('--seconds', type=float, default=3.0, help="recording length (default: 3)")
+    args = parser.parse_args()
+
     print("🎤 Microphone Device Tester")
     print("=" * 60)
-    
+
     p = pyaudio.PyAudio()
-    
+
     # List all input devices
     print("\n📋 Available input devices:\n")
-    input_devices = []
-    
-    for i in range(p.get_device_count()):
-        try:
-            dev = p.get_device_info_by_index(i)
-            max_input = int(dev.get('maxInputChannels', 0))
-            if max_input > 0:
-                name = dev.get('name', 'Unknown')
-                input_devices.append((i, name, dev))
-                print(f"  [{i}] {name} (inputs: {max_input})")
-        except Exception:
-            continue
-    
-    # Test each device
-    print(f"\n\n🧪 Testing {len(input_devices)} devices...\n")
+    input_devices = list_input_devices(p)
+    for dev in input_devices:
+        print(f"  [{dev['index']}] {dev['name']} (inputs: {dev['channels']}, native rate: {dev['native_rate']}Hz)")
+
+    # Open every device at once (native rate, then 16/44.1/48 kHz)
+    print(f"\n\n🧪 Opening {len(input_devices)} devices in parallel...\n")
+    capture = MultiCapture(input_devices, channels=1, out_rate=SAMPLE_RATE,
+                           window_seconds=args.seconds, chunk_frames=CHUNK)
     working_devices = []
-    
-    for device_index, device_name, dev_info in input_devices:
-        # Try multiple sample rates
-        for rate in [16000, 44100, 48000]:
-            print(f"\nTrying sample rate: {rate}Hz")
-            if test_device(p, device_index, device_name, sample_rate=rate):
-                working_devices.append((device_index, device_name, rate))
-                print(f"  ✅ WORKS with {rate}Hz")
-                break  # Found working rate, move to next device
-            else:
-                print(f"  ❌ Doesn't work with {rate}Hz")
-    
+    try:
+        capture.open(p)
+        print(f"\n🗣️  Speak now - recording {args.seconds:.0f} seconds from all devices...\n")
+        time.sleep(0.1)
+        recordings = record_all(capture, args.seconds)
+        scores = {score['index']: score for score in capture.scores()}
+        for source, audio_data in recordings.items():
+            audio_array = np.frombuffer(audio_data, dtype=np.int16)
+            rms = np.sqrt(np.mean(audio_array.astype(np.float32) ** 2))
+            score = scores[source.device['index']]
+            working_devices.append((source.device['index'], source.name, source.rate, rms,
+                                    score['snr_db'], score['dropped_frames'], save_recording(source.device['index'], audio_data)))
+    except OSError as e:
+        print(f"  ❌ Failed: {e}")
+    finally:
+        capture.stop_stream()
+        capture.close()
+
     p.terminate()
-    
+
     # Summary
     print("\n" + "=" * 60)
     print("📊 SUMMARY")
     print("=" * 60)
-    
+
     if working_devices:
-        print(f"\n✅ {len(working_devices)} working device(s) found:\n")
-        for idx, name, rate in working_devices:
+        working_devices.sort(key=lambda device: -device[4])
+        print(f"\n✅ {len(working_devices)} working device(s) found (best SNR first):\n")
+        for idx, name, rate, rms, snr, dropped, test_file in working_devices:
             print(f"  [{idx}] {name}")
             print(f"      Sample rate: {rate}Hz")
-            print(f"      Test file: /tmp/mic-test-{idx}.wav")
+            print(f"      Average RMS: {rms:.1f}, SNR: {snr:.1f} dB")
+            if rms < 10:
+                print("      ⚠️  WARNING: Very low signal - might be wrong device or muted")
+            if dropped:
+                print(f"      ⚠️  {dropped} frames dropped")
+            print(f"      Test file: {test_file} (🎧 aplay {test_file})")
             print()
-        
+
+        working = {idx for idx, *_ in working_devices}
+        failed = [dev for dev in input_devices if dev['index'] not in working]
+        if failed:
+            print("❌ Not working (busy, unsupported or no audio):")
+            for dev in failed:
+                print(f"  [{dev['index']}] {dev['name']}")
+            print()
+
+        idx, name, rate, rms, snr, *_ = working_devices[0]
         print("💡 Recommended for voice-dictation:")
-        # Prefer pipewire/pulse
-        for idx, name, rate in working_devices:
-            if 'pipewire' in name.lower() or 'pulse' in name.lower():
-                print(f"   Device [{idx}]: {name} (sample rate: {rate}Hz)")
-                break
-        else:
-            # Otherwise first working device
-            idx, name, rate = working_devices[0]
-            print(f"   Device [{idx}]: {name} (sample rate: {rate}Hz)")
+        print(f"   Device [{idx}]: {name} (sample rate: {rate}Hz, SNR {snr:.1f} dB)")
+        if len(working_devices) > 1:
+            print("   Or record all microphones in parallel: \"multi_mic\": true")
     else:
         print("\n❌ No working devices found!")
         print("\nTroubleshooting:")
@@ -0,0 +1,143 @@
+"""Tests for batch transcription."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from batch import SAMPLE_RATE, BatchTranscriber, plan_workers, split_segments  # noqa: E402
+
+
+class FakeServer:
+    """Resident server answering with fixed results, in order."""
+
+    def __init__(self, results):
+        self.results = list(results)
+
+    def transcribe(self, pcm, sample_rate, timeout=60.0):
+        return self.results.pop(0)
+
+    def is_running(self):
+        return True
+
+
+@pytest.fixture
+def transcriber():
+    transcriber = BatchTranscriber('whisper-cli', 'ggml-base.bin', {'workers': 1, 'threads': 1, 'cpus': [None]})
+    transcriber.decoders = ThreadPoolExecutor(max_workers=1)
+    yield transcriber
+    transcriber.decoders.shutdown()
+
+
+def use_server(transcriber, results):
+    transcriber.idle.put({'server': FakeServer(results), 'cpus': None})
+
+
+def test_failed_request_is_not_an_empty_segment(transcriber):
+    use_server(transcriber, [None, ''])
+
+    # Timeout or bad response while the server process is still alive
+    assert transcriber._decode(b'\0' * 3200) is None
+    assert transcriber._decode(b'\0' * 3200) == ''
+
+
+def test_failed_segment_counts_as_failed(transcriber, monkeypatch):
+    samples = np.zeros(SAMPLE_RATE * 4, dtype=np.int16)
+    monkeypatch.setattr('batch.load_audio', lambda path: samples)
+    monkeypatch.setattr('batch.split_segments', lambda samples, max_seconds: [(0, SAMPLE_RATE * 2),
+                                                                              (SAMPLE_RATE * 2, SAMPLE_RATE * 4)])
+    use_server(transcriber, ['hallo welt', None])
+
+    record = transcriber.transcribe_file(Path('aufnahme.wav'))
+
+    assert record['failed'] == 1
+    assert record['text'] == 'hallo welt'
+
+
+def recording(*parts):
+    """Concatenate (seconds, amplitude) parts of a 440 Hz tone; amplitude 0 is silence."""
+    chunks = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+        chunks.append(amplitude * np.sin(2 * np.pi * 440 * t))
+    return np.concatenate(chunks).astype(np.int16)
+
+
+def test_split_segments_cuts_at_pauses():
+    samples = recording((1, 0), (2, 3000), (1, 0), (2, 3000), (1, 0))
+
+    first, second = split_segments(samples, max_seconds=3.0)
+
+    assert first[0] <= SAMPLE_RATE and first[1] >= 3 * SAMPLE_RATE
+    assert second[0] <= 4 * SAMPLE_RATE and second[1] >= 6 * SAMPLE_RATE
+    # Padding stops at the neighbour, so no audio is decoded twice
+    assert first[1] <= second[0]
+
+
+def test_split_segments_joins_parts_that_fit():
+    samples = recording((1, 0), (2, 3000), (1, 0), (2, 3000), (1, 0))
+
+    (start, end), = split_segments(samples, max_seconds=30.0)
+
+    assert start <= SAMPLE_RATE and end >= 6 * SAMPLE_RATE
+
+
+def test_split_segments_cuts_speech_without_pause():
+    samples = recording((70, 3000))
+
+    segments = split_segments(samples, max_seconds=30.0)
+
+    assert len(segments) >= 3
+    assert all(end - start <= 30 * SAMPLE_RATE for start, end in segments)
+    # Contiguous: nothing lost between the cuts (up to the last partial frame)
+    assert segments[0][0] == 0 and len(samples) - segments[-1][1] < 0.03 * SAMPLE_RATE
+    assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+
+
+def test_split_segments_drops_silence():
+    assert split_segments(recording((5, 0))) == []
+    assert split_segments(recording((5, 30))) == []
+
+
+def topology(cores, smt=True, efficiency=0):
+    """cpu_topology of a machine whose last ``efficiency`` cores are E-cores (Linux SMT numbering)."""
+    entries = []
+    for cpu in range(cores * (2 if smt else 1)):
+        core = cpu % cores
+        entries.append({'cpu': cpu, 'core': ('0', str(core)),
+                        'siblings': {core, core + cores} if smt else {core},
+                        'performance': core < cores - efficiency})
+    return entries
+
+
+def test_plan_workers_uses_physical_cores(monkeypatch):
+    monkeypatch.setattr('batch.available_memory_mb', lambda: 64000.0)
+
+    plan = plan_workers(500, topology=topology(8))
+
+    assert plan == {'workers': 2, 'threads': 4, 'cpus': [[0, 1, 2, 3], [4, 5, 6, 7]]}
+
+
+def test_plan_workers_is_limited_by_memory(monkeypatch):
+    monkeypatch.setattr('batch.available_memory_mb', lambda: 1000.0)
+
+    # 80 % of 1000 MB holds one 500 MB model plus worker overhead
+    assert plan_workers(500, topology=topology(8))['workers'] == 1
+
+
+def test_plan_workers_pins_performance_cores_first(monkeypatch):
+    monkeypatch.setattr('batch.available_memory_mb', lambda: None)
+
+    plan = plan_workers(500, jobs=1, threads=2, topology=topology(6, efficiency=4))
+
+    assert plan['cpus'] == [[0, 1]]
+
+
+def test_plan_workers_unpinned_when_oversubscribed():
+    plan = plan_workers(500, jobs=4, threads=4, topology=topology(8))
+
+    assert plan == {'workers': 4, 'threads': 4, 'cpus': [None] * 4}
@@ -0,0 +1,65 @@
+"""Tests for CPU topology parsing and tuning candidates."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from cpu_tuning import candidate_configs, parse_cpu_list, reserved_capture_cpus  # noqa: E402
+
+
+def topology(cores, smt=True, efficiency=0):
+    """cpu_topology of a machine whose last ``efficiency`` cores are E-cores (Linux SMT numbering)."""
+    entries = []
+    for cpu in range(cores * (2 if smt else 1)):
+        core = cpu % cores
+        entries.append({'cpu': cpu, 'core': ('0', str(core)),
+                        'siblings': {core, core + cores} if smt else {core},
+                        'performance': core < cores - efficiency})
+    return entries
+
+
+@pytest.mark.parametrize('text, cpus', [
+    ('0-3,8,10-11\n', {0, 1, 2, 3, 8, 10, 11}),
+    ('5', {5}),
+    ('0,2,', {0, 2}),
+    ('', set()),
+])
+def test_parse_cpu_list(text, cpus):
+    assert parse_cpu_list(text) == cpus
+
+
+def test_capture_core_is_reserved_with_its_siblings():
+    assert reserved_capture_cpus(topology(4)) == {3, 7}
+    assert reserved_capture_cpus(topology(6, efficiency=2)) == {5, 11}
+    assert reserved_capture_cpus(topology(1)) == set()
+
+
+def test_candidates_skip_the_reserved_core():
+    configs = candidate_configs(topology(4), {3, 7})
+
+    assert configs[0] == {'label': 'one thread per core', 'threads': 3, 'cpus': [0, 1, 2]}
+    by_label = {config['label']: config for config in configs}
+    assert by_label['all logical CPUs']['cpus'] == [0, 1, 2, 4, 5, 6]
+    assert by_label['half of the cores']['cpus'] == [0]
+    # The untuned behaviour is always measured as reference, last
+    assert configs[-1]['label'] == 'unpinned' and configs[-1]['cpus'] is None
+    assert all(3 not in (config['cpus'] or []) for config in configs)
+
+
+def test_candidates_prefer_performance_cores():
+    configs = candidate_configs(topology(6, smt=False, efficiency=4), set())
+    by_label = {config['label']: config for config in configs}
+
+    assert by_label['performance cores'] == {'label': 'performance cores', 'threads': 2, 'cpus': [0, 1]}
+    # Halving keeps the fast cores
+    assert by_label['half of the cores']['cpus'] == [0, 1, 2]
+
+
+def test_candidates_are_unique():
+    configs = candidate_configs(topology(1, smt=False), set())
+
+    keys = [(config['threads'], config['cpus']) for config in configs]
+    assert len(keys) == len(set((threads, tuple(cpus or ())) for threads, cpus in keys))
@@ -0,0 +1,77 @@
+"""Tests for text injection fallbacks."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from injection import ClipboardInjector, TextInjector, WtypeInjector, XdotoolInjector, inject_text  # noqa: E402
+
+
+class RecordingInjector(TextInjector):
+    """Fallback backend that remembers what it typed."""
+
+    name = 'recording'
+
+    def __init__(self):
+        self.typed = []
+
+    def inject(self, text):
+        self.typed.append(text)
+        return True
+
+
+def fake_xdotool(monkeypatch, returncode=0, stderr='', error=None):
+    def run(cmd, **kwargs):
+        if error is not None:
+            raise error
+        return subprocess.CompletedProcess(cmd, returncode, '', stderr)
+
+    monkeypatch.setattr('injection.subprocess.run', run)
+
+
+@pytest.mark.parametrize('returncode, stderr, error', [
+    (1, "Error: Can't open display: (null)\nFailed creating new xdo instance", None),
+    (None, '', FileNotFoundError(2, 'No such file or directory', 'xdotool')),
+])
+def test_xdotool_that_cannot_start_falls_back(monkeypatch, returncode, stderr, error):
+    fake_xdotool(monkeypatch, returncode, stderr, error)
+    fallback = RecordingInjector()
+
+    assert inject_text([XdotoolInjector(), fallback], 'hallo welt') == 'recording'
+    assert fallback.typed == ['hallo welt']
+
+
+@pytest.mark.parametrize('returncode, error', [
+    (1, None),
+    (None, subprocess.TimeoutExpired('xdotool', 5.0)),
+])
+def test_xdotool_failing_while_typing_is_not_repeated(monkeypatch, returncode, error):
+    fake_xdotool(monkeypatch, returncode, 'XGetWindowProperty failed', error)
+    fallback = RecordingInjector()
+
+    assert inject_text([XdotoolInjector(), fallback], 'hallo welt') == 'xdotool'
+    assert fallback.typed == []
+
+
+def test_wtype_rejected_by_compositor_is_skipped_afterwards(monkeypatch):
+    monkeypatch.setenv('WAYLAND_DISPLAY', 'wayland-0')
+    monkeypatch.setattr('injection.shutil.which', lambda name: f'/usr/bin/{name}')
+    monkeypatch.setattr(WtypeInjector, 'rejected', False)
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd[0])
+        return subprocess.CompletedProcess(cmd, 1, '', 'Compositor does not support the virtual keyboard protocol')
+
+    monkeypatch.setattr('injection.subprocess.run', run)
+    wtype, fallback = WtypeInjector(), RecordingInjector()
+
+    assert inject_text([wtype, fallback], 'hallo') == 'recording'
+    assert inject_text([wtype, fallback], 'welt') == 'recording'
+    assert calls == ['wtype']
+    assert not wtype.available()
+    assert ClipboardInjector._paste_command()[0] != 'wtype'
@@ -0,0 +1,65 @@
+"""Tests for model downloads and the checksum manifest."""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from model_manager import ModelManager  # noqa: E402
+
+MODEL = b'ggml' + bytes(1000)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    source = tmp_path / 'mirror'
+    source.mkdir()
+    (source / 'ggml-base.bin').write_bytes(MODEL)
+    return source
+
+
+def test_download_without_checksum_is_refused(mirror, tmp_path):
+    manager = ModelManager(str(tmp_path / 'models'), source=str(mirror))
+
+    assert not manager.install('base')
+    assert not manager.is_installed('base')
+    assert not (tmp_path / 'models' / 'ggml-base.bin.part').exists()
+
+
+def test_opted_in_download_is_recorded_unverified(mirror, tmp_path):
+    manager = ModelManager(str(tmp_path / 'models'), source=str(mirror), allow_unverified=True)
+
+    assert manager.install('base')
+    assert manager._load_manifest()['base']['verified'] is False
+    assert manager.verify('base') is True
+
+
+def test_published_checksum_is_verified(mirror, tmp_path):
+    (mirror / 'SHA256SUMS').write_text(f"{hashlib.sha256(MODEL).hexdigest()}  ggml-base.bin\n")
+    manager = ModelManager(str(tmp_path / 'models'), source=str(mirror))
+
+    assert manager.install('base')
+    assert manager.verify('base') is True
+
+
+def test_manifest_write_failure_keeps_the_model(mirror, tmp_path, monkeypatch):
+    (mirror / 'SHA256SUMS').write_text(f"{hashlib.sha256(MODEL).hexdigest()}  ggml-base.bin\n")
+    manager = ModelManager(str(tmp_path / 'models'), source=str(mirror))
+
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if Path(dst) == manager.manifest_path:
+            raise OSError(28, 'No space left on device')
+        return real_replace(src, dst)
+
+    monkeypatch.setattr('model_manager.os.replace', replace)
+
+    assert manager.install('base')
+    assert manager.is_installed('base')
+    # Nothing recorded, so nothing to check against
+    assert manager.verify('base') is None
@@ -0,0 +1,71 @@
+"""Tests for transcript post-processing."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from postprocess import PostProcessor  # noqa: E402
+
+
+@pytest.fixture
+def no_user_rules(tmp_path):
+    """Rules file that does not exist, so only the built-in rules apply."""
+    return tmp_path / 'postprocess-rules.json'
+
+
+@pytest.fixture
+def german(no_user_rules):
+    return PostProcessor('de', rules_path=no_user_rules, spoken_punctuation=True)
+
+
+@pytest.mark.parametrize('content', [None, ''])
+def test_spoken_punctuation_is_opt_in(no_user_rules, content):
+    if content is not None:
+        no_user_rules.write_text(content)
+    text, _ = PostProcessor('de', rules_path=no_user_rules).process('Hallo Komma wie geht es Fragezeichen')
+
+    assert text == 'Hallo Komma wie geht es Fragezeichen'
+
+
+@pytest.mark.parametrize('sentence', [
+    'Das ist ein wichtiger Punkt.',
+    'Es ist Punkt 12 Uhr.',
+    'null Komma fünf',
+    'Er sagte: Punkt.',
+])
+def test_punctuation_words_in_ordinary_speech_are_kept(german, sentence):
+    text, removed = german.process(sentence)
+
+    assert text == sentence
+    assert removed == []
+
+
+@pytest.mark.parametrize('spoken, expected', [
+    ('Hallo, Komma, wie geht es dir Fragezeichen', 'Hallo, wie geht es dir?'),
+    ('Hallo Komma, wie geht es dir Fragezeichen?', 'Hallo, wie geht es dir?'),
+    ('Wir sehen uns morgen Punkt', 'Wir sehen uns morgen.'),
+])
+def test_dictated_punctuation_is_replaced(german, spoken, expected):
+    assert german.process(spoken)[0] == expected
+
+
+@pytest.mark.parametrize('sentence', [
+    'Siehe (Anhang) bitte.',
+    '5 * 3 * 2',
+    'Das ist *wichtig* hier.',
+])
+def test_ordinary_brackets_are_kept(german, sentence):
+    assert german.process(sentence) == (sentence, [])
+
+
+@pytest.mark.parametrize('raw, expected, removed', [
+    ('[Musik] Hallo Welt (Applaus)', 'Hallo Welt', ['[Musik]', '(Applaus)']),
+    ('Hallo *lacht* Welt', 'Hallo Welt', ['*lacht*']),
+    ('♪ la la la ♪', None, ['♪ la la la ♪']),
+    ('Hallo. (Klopfen).', 'Hallo.', ['(Klopfen).']),
+])
+def test_non_speech_annotations_are_removed(german, raw, expected, removed):
+    assert german.process(raw) == (expected, removed)
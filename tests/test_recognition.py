@@ -0,0 +1,118 @@
+"""Tests for parsing whisper.cpp output and re-decoding uncertain words."""
+
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from dictate import VoiceDictation  # noqa: E402
+from recognition import Transcript, Word, plain_text  # noqa: E402
+
+# whisper-server answer to a verbose_json request made with --no-timestamps in effect
+VERBOSE_JSON_WITHOUT_TIMESTAMPS = {
+    'text': ' Hallo Welt, wie geht es?',
+    'segments': [{
+        'id': 0,
+        'text': ' Hallo Welt, wie geht es?',
+        'words': [
+            {'word': ' Hallo', 'probability': 0.95},
+            {'word': ' Welt', 'probability': 0.2},
+            {'word': ',', 'probability': 0.9},
+            {'word': ' wie', 'probability': 0.9},
+            {'word': ' geht', 'probability': 0.1},
+            {'word': ' es', 'probability': 0.9},
+            {'word': '?', 'probability': 0.9},
+        ],
+    }],
+}
+
+
+def test_missing_server_timestamps_are_unknown():
+    transcript = Transcript.from_server_json(VERBOSE_JSON_WITHOUT_TIMESTAMPS)
+
+    assert transcript.text == 'Hallo Welt, wie geht es?'
+    assert [word.start for word in transcript.words] == [None] * 5
+    assert [word.end for word in transcript.words] == [None] * 5
+    assert not transcript.has_timestamps
+    assert transcript.low_confidence_spans(0.4) == []
+
+
+def test_server_timestamps_give_spans():
+    payload = {'text': ' Hallo Welt', 'segments': [{'start': 0.0, 'end': 1.0, 'words': [
+        {'word': ' Hallo', 'start': 0.0, 'end': 0.4, 'probability': 0.95},
+        {'word': ' Welt', 'start': 0.5, 'end': 1.0, 'probability': 0.2},
+    ]}]}
+    transcript = Transcript.from_server_json(payload)
+
+    assert transcript.has_timestamps
+    assert transcript.low_confidence_spans(0.4) == [(1, 1)]
+
+
+def _fake_dictation(decoded):
+    """Just enough of VoiceDictation for _refine, recording every re-decode."""
+    def decode(pcm, model):
+        decoded.append((len(pcm), model))
+        return Transcript.from_text('Hallo Welt, wie geht es?')
+
+    return types.SimpleNamespace(
+        config={'sample_rate': 16000, 'channels': 1, 'word_min_confidence': 0.4},
+        model_tiers=None,
+        _pcm_seconds=lambda length: length / 2 / 16000,
+        _decode_transcript=decode,
+    )
+
+
+@pytest.mark.parametrize('probability, redecodes', [(0.1, 1), (0.9, 0)])
+def test_refine_without_timestamps_decodes_no_spans(probability, redecodes):
+    payload = {'text': VERBOSE_JSON_WITHOUT_TIMESTAMPS['text'], 'segments': [{
+        'words': [dict(word, probability=probability) for word in VERBOSE_JSON_WITHOUT_TIMESTAMPS['segments'][0]['words']],
+    }]}
+    transcript = Transcript.from_server_json(payload)
+    pcm = bytes(2 * 16000 * 3)
+    decoded = []
+
+    result = VoiceDictation._refine(_fake_dictation(decoded), pcm, transcript, 'base')
+
+    # Never a clip cut at made-up times: either the whole utterance or nothing
+    assert decoded == [(len(pcm), 'base')] * redecodes
+    assert result.text == 'Hallo Welt, wie geht es?'
+
+
+def test_cli_token_without_offsets_has_no_time():
+    data = {'transcription': [{'text': ' Hallo Welt', 'tokens': [
+        {'text': '[_BEG_]', 'offsets': {'from': 0, 'to': 0}, 'p': 1.0},
+        {'text': ' Hallo', 'offsets': {'from': 0, 'to': 400}, 'p': 0.2},
+        {'text': ' Welt', 'p': 0.1},
+    ]}]}
+    transcript = Transcript.from_cli_json(data)
+
+    hallo, welt = transcript.words
+    assert (hallo.start, hallo.end) == (0.0, 0.4)
+    assert (welt.start, welt.end) == (None, None)
+    # Only the timed word can be cut out and re-decoded
+    assert transcript.low_confidence_spans(0.4) == [(0, 0)]
+
+
+def test_untimed_word_separates_spans():
+    words = [Word(' a', 0.0, 0.2, 0.1), Word(' b', None, None, 0.9), Word(' c', 0.4, 0.6, 0.1)]
+
+    assert Transcript(words).low_confidence_spans(0.4, bridge=1) == [(0, 0), (2, 2)]
+
+
+def test_plain_text_drops_segment_timestamps():
+    output = '[00:00:00.000 --> 00:00:02.000]   Hallo Welt\n[00:00:02.000 --> 00:00:03.500]   wie geht es?\n'
+
+    assert plain_text(output) == 'Hallo Welt wie geht es?'
+
+
+def test_cli_keeps_timestamps_for_word_json():
+    dictation = types.SimpleNamespace(config={'whisper_cpp_path': 'whisper-cli', 'language': 'de'},
+                                      _get_model_path=lambda model: 'ggml-base.bin')
+    with_words = VoiceDictation._whisper_cli_command(dictation, 'a.wav', 'base', 2, json_prefix='/tmp/result')
+    text_only = VoiceDictation._whisper_cli_command(dictation, 'a.wav', 'base', 2)
+
+    assert '--no-timestamps' not in with_words and '--output-json-full' in with_words
+    assert '--no-timestamps' in text_only
@@ -0,0 +1,55 @@
+"""Tests for the session queue."""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from session_queue import SessionQueue  # noqa: E402
+
+
+def test_results_are_delivered_in_recording_order():
+    queue = SessionQueue(workers=3)
+    release = [threading.Event() for _ in range(3)]
+    decoded = [threading.Event() for _ in range(3)]
+    delivered = []
+
+    def decode(index):
+        def run():
+            release[index].wait(5)
+            decoded[index].set()
+            return f'satz {index}'
+        return run
+
+    for index in range(3):
+        queue.submit(decode(index), delivered.append)
+    # The later recordings finish decoding first and wait for the first one
+    for index in (2, 1):
+        release[index].set()
+        assert decoded[index].wait(5)
+    assert delivered == []
+    release[0].set()
+
+    assert queue.wait_idle(timeout=5)
+    assert delivered == ['satz 0', 'satz 1', 'satz 2']
+    queue.close()
+
+
+def test_failed_decode_keeps_its_place():
+    queue = SessionQueue(workers=2)
+    first_done = threading.Event()
+    delivered = []
+
+    def failing():
+        first_done.wait(5)
+        raise RuntimeError('whisper crashed')
+
+    assert queue.submit(failing, delivered.append) == 0
+    assert queue.submit(lambda: 'danach', delivered.append) == 1
+    first_done.set()
+
+    assert queue.wait_idle(timeout=5)
+    assert delivered == [None, 'danach']
+    assert queue.pending() == 0
+    queue.close()
@@ -0,0 +1,37 @@
+"""Tests for the launcher's import budget (see benchmarks/bench_startup.py for timings)."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+
+# Each costs tens of milliseconds on every hotkey press
+CLIENT_FORBIDDEN = ['numpy', 'pyaudio', 'pynput', 'gi', 'urllib.request', 'http.server', 'dictate']
+
+
+def imported_modules(code: str) -> set:
+    """Run code in a fresh interpreter and return the modules it imported."""
+    script = f"import sys\nsys.path.insert(0, {str(SRC_DIR)!r})\n{code}\n" \
+             "import json\nprint(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60, check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.fixture(scope='module')
+def client_modules():
+    return imported_modules("import launcher\nlauncher.build_parser().parse_args([])")
+
+
+@pytest.mark.parametrize('module', CLIENT_FORBIDDEN)
+def test_thin_client_stays_light(client_modules, module):
+    assert module not in client_modules
+
+
+def test_session_imports_pyaudio_on_first_stream():
+    modules = imported_modules("import dictate")
+
+    assert 'pyaudio' not in modules
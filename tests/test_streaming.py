@@ -0,0 +1,92 @@
+"""Tests for streaming and speculative decoding."""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from streaming import AudioRingBuffer, SpeculativeDecode, StreamingTranscriber  # noqa: E402
+
+
+def test_failed_speculation_is_a_miss():
+    speculation = SpeculativeDecode(lambda pcm: None)
+    speculation.launch(b'\0' * 320, 320)
+
+    assert speculation.result(320, timeout=5) == (False, None)
+
+
+def test_rollback_frees_the_next_pause():
+    release = threading.Event()
+    calls = []
+
+    def transcribe(pcm):
+        calls.append(len(pcm))
+        if len(calls) == 1:
+            release.wait(5)
+            return 'veraltet'
+        return 'hallo welt'
+
+    speculation = SpeculativeDecode(transcribe)
+    assert speculation.launch(b'\0' * 320, 320)
+    speculation.rollback()
+
+    # The first decode still runs, yet the next pause starts a new one
+    assert speculation.launch(b'\0' * 640, 640)
+    assert speculation.result(640, timeout=5) == (True, 'hallo welt')
+
+    first = threading.enumerate()
+    release.set()
+    for thread in first:
+        if thread is not threading.current_thread() and thread.daemon:
+            thread.join(5)
+    # The abandoned decode finishing late does not overwrite the newer result
+    assert speculation.result(640) == (True, 'hallo welt')
+
+
+def test_lagging_read_reports_overwritten_samples():
+    ring = AudioRingBuffer(100)
+    ring.write(np.arange(250, dtype=np.int16).tobytes())
+
+    samples, lost = ring.read(0, 250)
+    assert lost == 150
+    assert samples.tolist() == list(range(150, 250))
+
+    # Entirely overwritten range
+    samples, lost = ring.read(20, 120)
+    assert (len(samples), lost) == (0, 100)
+    assert ring.read(150, 200)[1] == 0
+
+
+def test_lagging_consumer_marks_incomplete_segment():
+    decoded = []
+
+    def transcribe(pcm):
+        decoded.append(len(pcm) // 2)
+        return 'hallo welt'
+
+    # 100 samples/s: the ring keeps max_segment + 5 s = 600 samples
+    streamer = StreamingTranscriber(transcribe, 100, max_segment=1.0)
+    streamer.push(np.ones(1000, dtype=np.int16).tobytes())
+    streamer.mark_speech()
+
+    assert streamer.finish() == 'hallo welt'
+    assert decoded == [600]
+    assert streamer.lost_samples == 400
+    assert streamer.incomplete == [0]
+
+
+def test_ring_keeps_the_newest_samples_across_the_wrap():
+    ring = AudioRingBuffer(50)
+    for start in range(0, 120, 25):
+        ring.write(np.arange(start, start + 25, dtype=np.int16).tobytes())
+
+    assert ring.oldest() == 75
+    samples, lost = ring.read(75, 125)
+    assert lost == 0
+    assert samples.tolist() == list(range(75, 125))
+    # A range inside the wrapped buffer, and one past the newest sample
+    assert ring.read(95, 105)[0].tolist() == list(range(95, 105))
+    assert ring.read(120, 200)[0].tolist() == list(range(120, 125))
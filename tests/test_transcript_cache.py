@@ -0,0 +1,63 @@
+"""Tests for the transcript cache."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from transcript_cache import TranscriptCache, audio_signature  # noqa: E402
+
+RATE = 16000
+
+
+def noise(seed, level=300.0, seconds=1.5):
+    return (np.random.default_rng(seed).normal(0.0, level, int(RATE * seconds))).astype(np.int16)
+
+
+def speech_like(seed, level=4000.0):
+    """Syllables: voiced bursts with changing pitch, separated by pauses, over faint noise."""
+    t = np.arange(int(RATE * 1.5)) / RATE
+    envelope = (np.sin(2 * np.pi * 3.0 * t) > 0.2).astype(np.float64)
+    pitch = 180.0 + 60.0 * np.sin(2 * np.pi * 0.7 * t)
+    voiced = sum(np.sin(2 * np.pi * k * np.cumsum(pitch) / RATE) / k for k in range(1, 12))
+    return (level * envelope * voiced / 3 + noise(seed, 30.0)).astype(np.int16)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptCache(tmp_path / 'transcripts.json', capacity=10)
+
+
+def test_noise_clips_do_not_collide(cache):
+    cache.store(noise(1).tobytes(), RATE, 'base', 'de', 'Punkt', fuzzy=True)
+
+    # Different noise, quieter or louder, never answers with the stored text
+    for seed, level in [(2, 300.0), (3, 100.0), (4, 3000.0)]:
+        assert cache.lookup(noise(seed, level).tobytes(), RATE, 'base', 'de', fuzzy=True) is None
+
+
+def test_stationary_noise_has_no_signature():
+    assert audio_signature(noise(1), RATE) is None
+    assert audio_signature(np.zeros(RATE, dtype=np.int16), RATE) is None
+    assert audio_signature(speech_like(1), RATE) is not None
+
+
+def test_repeated_utterance_matches_only_when_fuzzy(cache):
+    cache.store(speech_like(1).tobytes(), RATE, 'base', 'de', 'neue Zeile', fuzzy=True)
+    repeat = speech_like(2, level=2500.0).tobytes()
+
+    assert cache.lookup(repeat, RATE, 'base', 'de', fuzzy=True) == 'neue Zeile'
+    # Streaming partials and untrimmed clips only reuse exact repeats
+    assert cache.lookup(repeat, RATE, 'base', 'de') is None
+
+
+def test_model_variant_is_part_of_the_key(cache):
+    pcm = speech_like(1).tobytes()
+    cache.store(pcm, RATE, 'base@q5_0', 'de', 'neue Zeile', fuzzy=True)
+
+    assert cache.lookup(pcm, RATE, 'base@q5_0', 'de') == 'neue Zeile'
+    assert cache.lookup(pcm, RATE, 'base', 'de', fuzzy=True) is None
+    assert cache.lookup(pcm, RATE, 'base@q8_0', 'de', fuzzy=True) is None